@@ -1,5 +1,18 @@
 import random
 import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analogica.profiling import Profiler
+from analogica.store import SolutionStore
+
+try:
+    # Requerem NumPy: estimativa de consumo e frente de Pareto das tentativas
+    from analogica.power import power_summary
+    from analogica.selection import choose as escolher
+except ImportError:
+    power_summary = escolher = None
 
 # --- CONSTANTES ELÉTRICAS ---
 # CAMADA 1 (Oculta - N1 e N2)
@@ -15,6 +28,24 @@ L2_REF    = 3.75  # Terra Virtual
 L2_SAT    = 6.0   # Saída Máxima do N3
 
 GAIN = 3.2 # Ganho dos AmpOps (Igual para todos)
+MARGEM = 0.3 # Margem de segurança do treino
+
+WARM_EPOCHS = 2000 # Épocas quando parte de uma solução vizinha do banco
+# Soluções corretas coletadas antes de escolher pela frente de Pareto (opcional: --candidatos N).
+# Padrão 1: para na primeira solução perfeita.
+def ler_candidatos(argv) -> int:
+    # Valor de --candidatos N (inteiro >= 1); sem a opção, 1
+    if "--candidatos" not in argv:
+        return 1
+    try:
+        n = int(argv[argv.index("--candidatos") + 1])
+    except (IndexError, ValueError):
+        n = 0
+    if n < 1:
+        sys.exit("Uso: --candidatos N, com N inteiro >= 1")
+    return n
+
+CANDIDATOS = ler_candidatos(sys.argv)
 
 # Tabelas Verdade
 AND_TABLE = {(0, 0): 0, (0, 1): 0, (1, 0): 0, (1, 1): 1}
@@ -34,6 +65,14 @@ def sigmoid_derivative(x):
         s = 0 if x < 0 else 1
     return s * (1 - s)
 
+def circuit_constants():
+    # Constantes que identificam a configuração no banco de soluções
+    return {
+        "GAIN": GAIN, "MARGEM": MARGEM,
+        "L1_VCC": L1_VCC, "L1_SIGNAL": L1_SIGNAL, "L1_REF": L1_REF, "L1_SAT": L1_SAT,
+        "L2_VCC": L2_VCC, "L2_SIGNAL": L2_SIGNAL, "L2_REF": L2_REF, "L2_SAT": L2_SAT,
+    }
+
 class HardwareNeuron:
     def __init__(self, name, v_signal, v_supply, v_ref, v_sat):
         self.name = name
@@ -107,7 +146,7 @@ def print_res(neuron, layer_name):
     print(f"  P2 (w2): {neuron.w2*100:5.1f}% -> {v2:.2f}V ")
     print(f"  PB (wb): {neuron.w_bias*100:5.1f}% -> {vb:.2f}V")
 
-def train_network(target_table, epochs=500000, lr=0.005):
+def train_network(target_table, epochs=500000, lr=0.005, init=None, profiler=None):
     
     # --- CONFIGURAÇÃO DA TOPOLOGIA MISTA ---
     
@@ -118,8 +157,16 @@ def train_network(target_table, epochs=500000, lr=0.005):
     # Camada 2 (N3): Mundo 7.5V
     n3 = HardwareNeuron("Saída",    v_signal=L2_SIGNAL, v_supply=L2_VCC, v_ref=L2_REF, v_sat=L2_SAT)
     
+    # Warm-start: init = [[w1, w2, w_bias] de N1, N2 e N3] de uma solução vizinha
+    if init is not None:
+        for n, (w1, w2, w_bias) in zip([n1, n2, n3], init):
+            n.w1, n.w2, n.w_bias = w1, w2, w_bias
+    
     momentum = 0.9
-    margem = 0.3
+    margem = MARGEM
+    if profiler:
+        # --profile: mesma conta numa cópia do laço que mede cada fase
+        return train_network_profiled(n1, n2, n3, target_table, epochs, lr, momentum, margem, profiler)
     
     for i in range(epochs):
         errors_count = 0
@@ -227,7 +274,88 @@ def train_network(target_table, epochs=500000, lr=0.005):
             
     return n1, n2, n3
 
+def train_network_profiled(n1, n2, n3, target_table, epochs, lr, momentum, margem, prof):
+    # Cópia do laço de train_network com um cronômetro por fase (lista, shuffle,
+    # forward, sigmoid_derivative, atualização, clip). Cada lap custa mais que
+    # algumas fases, então os tempos servem para comparar fases, não como absolutos.
+    for i in range(epochs):
+        t = prof.clock()
+        errors_count = 0
+        exemplos = list(target_table.items())
+        t = prof.lap("lista", t)
+        random.shuffle(exemplos)
+        t = prof.lap("shuffle", t)
+        
+        for (x1, x2), y_target in exemplos:
+            out_n1 = n1.forward(x1, x2)
+            out_n2 = n2.forward(x1, x2)
+            n3.forward(out_n1, out_n2)
+            z_n3 = n3.last_va - n3.last_bias_v
+            y_sign = 1.0 if y_target == 1 else -1.0
+            L = max(0, margem - y_sign * z_n3)
+            t = prof.lap("forward", t)
+            if L <= 0:
+                continue
+            
+            errors_count += 1
+            delta_n3 = -y_sign
+            old_w1_n3 = n3.w1
+            old_w2_n3 = n3.w2
+            factor_n3 = lr * delta_n3 * (1.0/n3.last_n) * GAIN * n3.v_signal
+            step_w1 = factor_n3 if out_n1 else 0
+            n3.vel_w1 = momentum * n3.vel_w1 + step_w1
+            n3.w1 -= n3.vel_w1 
+            step_w2 = factor_n3 if out_n2 else 0
+            n3.vel_w2 = momentum * n3.vel_w2 + step_w2
+            n3.w2 -= n3.vel_w2
+            step_bias = lr * delta_n3 * (-1.0) * n3.v_supply
+            n3.vel_bias = momentum * n3.vel_bias + step_bias
+            n3.w_bias -= n3.vel_bias
+            t = prof.lap("atualização", t)
+            
+            dist_n1 = (n1.last_va - n1.last_bias_v)
+            delta_n1 = (delta_n3 * old_w1_n3) * sigmoid_derivative(dist_n1)
+            dist_n2 = (n2.last_va - n2.last_bias_v)
+            delta_n2 = (delta_n3 * old_w2_n3) * sigmoid_derivative(dist_n2)
+            t = prof.lap("sigmoid_derivative", t)
+            
+            factor_n1 = lr * delta_n1 * (1.0/n1.last_n) * GAIN * n1.v_signal
+            step_w1_n1 = factor_n1 if x1 else 0
+            n1.vel_w1 = momentum * n1.vel_w1 + step_w1_n1
+            n1.w1 -= n1.vel_w1
+            step_w2_n1 = factor_n1 if x2 else 0
+            n1.vel_w2 = momentum * n1.vel_w2 + step_w2_n1
+            n1.w2 -= n1.vel_w2
+            step_bias_n1 = lr * delta_n1 * (-1.0) * n1.v_supply
+            n1.vel_bias = momentum * n1.vel_bias + step_bias_n1
+            n1.w_bias -= n1.vel_bias
+            
+            factor_n2 = lr * delta_n2 * (1.0/n2.last_n) * GAIN * n2.v_signal
+            step_w1_n2 = factor_n2 if x1 else 0
+            n2.vel_w1 = momentum * n2.vel_w1 + step_w1_n2
+            n2.w1 -= n2.vel_w1
+            step_w2_n2 = factor_n2 if x2 else 0
+            n2.vel_w2 = momentum * n2.vel_w2 + step_w2_n2
+            n2.w2 -= n2.vel_w2
+            step_bias_n2 = lr * delta_n2 * (-1.0) * n2.v_supply
+            n2.vel_bias = momentum * n2.vel_bias + step_bias_n2
+            n2.w_bias -= n2.vel_bias
+            t = prof.lap("atualização", t)
+            
+            for n in [n1, n2, n3]:
+                n.w1 = clip(n.w1, 0, 1)
+                n.w2 = clip(n.w2, 0, 1)
+                max_bias_w = n.v_sat / n.v_supply
+                n.w_bias = clip(n.w_bias, 0, max_bias_w)
+            t = prof.lap("clip", t)
+        
+        if errors_count == 0:
+            break
+            
+    return n1, n2, n3
+
 if __name__ == "__main__":
+    PROFILE = "--profile" in sys.argv
     while True:
         print("Digite a tabela verdade desejada como uma string de 4 bits.")
         print("Ordem de Entrada: (0,0), (1,0), (0,1), (1,1)")
@@ -254,37 +382,62 @@ if __name__ == "__main__":
         
         gate_name = known_gates.get(s_input, f"Custom: {s_input}")
         
-        best_n1, best_n2, best_n3 = None, None, None
-        min_errors = 999
+        candidatos, erros_lista, margens = [], [], []
         
         print(f"--- Treinando {gate_name} (Hinge Loss + Backprop) ---")
         
+        # Warm-start: a primeira tentativa parte da solução mais próxima já salva
+        store = SolutionStore()
+        vizinha = store.nearest("3N", s_input, circuit_constants())
+        if vizinha:
+            print(f"  Warm-start a partir de {vizinha['table']} (margem {vizinha['margin']:.2f}V)")
+        
+        prof = Profiler() if PROFILE else None
+        
         # Tentativas múltiplas para evitar mínimos locais (comum em MLP)
         for attempt in range(10): 
-            n1, n2, n3 = train_network(custom_table, epochs=50000)
+            if attempt == 0 and vizinha:
+                n1, n2, n3 = train_network(custom_table, epochs=WARM_EPOCHS, init=vizinha["weights"], profiler=prof)
+            else:
+                n1, n2, n3 = train_network(custom_table, epochs=50000, profiler=prof)
             erros = 0
+            m3_min = 999.0
 
             for (x1, x2), target in custom_table.items():
                 y1 = n1.forward(x1, x2)
                 y2 = n2.forward(x1, x2)
                 y3 = n3.forward(y1, y2)
                 
-                m3 = abs(n3.last_va - n3.last_bias_v)
+                m3_min = min(m3_min, abs(n3.last_va - n3.last_bias_v))
                 
                 if y3 != target:
                     erros += 1
-                elif m3 < 0.3: # Se acertou mas margem ruim, conta como "meio erro" para desempate
-                    erros += 0.1
-                    
-            if erros < min_errors:
-                min_errors = erros
-                best_n1, best_n2, best_n3 = n1, n2, n3
-                print(f"  Tentativa {attempt+1}: Erros={erros:.1f} (Novo Melhor)")
             
-            if erros == 0: 
-                print(f"  Tentativa {attempt+1}: Convergência Perfeita!")
+            candidatos.append((n1, n2, n3))
+            erros_lista.append(erros)
+            margens.append(m3_min)
+            print(f"  Tentativa {attempt+1}: Erros={erros} Margem={m3_min:.2f}V")
+            
+            # Soluções perfeitas (com a margem do treino) suficientes para escolher
+            if sum(e == 0 and m >= MARGEM for e, m in zip(erros_lista, margens)) >= CANDIDATOS:
+                print(f"  Tentativa {attempt+1}: Convergência Perfeita!" if CANDIDATOS == 1
+                      else f"  Tentativa {attempt+1}: {CANDIDATOS} soluções perfeitas, escolhendo entre elas")
                 break
+        
+        # Só disputam a escolha as tentativas que passaram no critério de parada
+        aptos = [k for k in range(len(candidatos)) if erros_lista[k] == 0 and margens[k] >= MARGEM]
+        if escolher and aptos:
+            pesos_candidatos = [[[n.w1, n.w2, n.w_bias] for n in c] for c in candidatos]
+            best = aptos[escolher("3N", [pesos_candidatos[k] for k in aptos], s_input, circuit_constants(),
+                                  verbose=CANDIDATOS > 1, numbers=[k + 1 for k in aptos])]
+        else:
+            # Critério: Menos erros > Maior Margem
+            best = min(range(len(candidatos)), key=lambda k: (erros_lista[k], -margens[k]))
+        best_n1, best_n2, best_n3 = candidatos[best]
 
+        if prof:
+            print("\n" + prof.report())
+        
         print(f"\n=== RESULTADOS PARA {gate_name} ===")
         
         if best_n1:
@@ -294,10 +447,14 @@ if __name__ == "__main__":
             
             print("\n--- TESTE FINAL ---")
             final_errors = 0
+            final_margin = 999.0
             for (x1, x2), target in custom_table.items():
                 y1 = best_n1.forward(x1, x2)
                 y2 = best_n2.forward(x1, x2)
                 y3 = best_n3.forward(y1, y2)
+                # Margem do banco: menor |Va - Vbias| entre os 3 neurônios (a de model.evaluate e do MSE)
+                final_margin = min(final_margin, abs(best_n1.last_va - best_n1.last_bias_v),
+                                   abs(best_n2.last_va - best_n2.last_bias_v), abs(best_n3.last_va - best_n3.last_bias_v))
                 
                 if y3 != target:
                     final_errors += 1
@@ -308,6 +465,12 @@ if __name__ == "__main__":
                 print(f"  In({x1},{x2}) | N1={y1} N2={y2} -> N3={y3} (Meta {target}) | {status}")
 
             if final_errors == 0:
+                pesos = [[n.w1, n.w2, n.w_bias] for n in (best_n1, best_n2, best_n3)]
+                store.add("3N", s_input, circuit_constants(), pesos, final_margin, loss="hinge")
+                store.save()
                 print("\nSUCESSO: A rede aprendeu a porta perfeitamente!")
+                if power_summary:
+                    consumo = power_summary("3N", pesos, circuit_constants())
+                    print(f"Consumo estimado: {consumo['mean'] * 1e3:.1f} mW em média, {consumo['max'] * 1e3:.1f} mW no pior caso")
             else:
                 print(f"\nFALHA: A rede errou {final_errors} casos.")
@@ -1,5 +1,15 @@
 import random
 import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analogica.store import SolutionStore
+
+try:
+    from analogica.power import power_summary # Estimativa de consumo (requer NumPy)
+except ImportError:
+    power_summary = None
 
 # --- CONSTANTES DO CIRCUITO ---
 V_PLUS = 9.0
@@ -7,10 +17,18 @@ V_MINUS = 0.0
 V_REF = V_PLUS / 2  # Terra Virtual
 GAIN = 3.2   # Ganho do AmpOp A
 DELTA_V = V_PLUS - V_MINUS # 9V
+V_SAT = 7.5  # Saturação do LM324
+MARGEM = 0.3 # Margem de segurança (Zona Morta)
+
+WARM_EPOCHS = 1000 # Épocas quando parte de uma solução vizinha do banco
 
 def clip(v: float, vmin: float = 0.0, vmax: float = 1.0) -> float:
     return max(vmin, min(vmax, v))
 
+def circuit_constants() -> dict:
+    # Constantes que identificam a configuração no banco de soluções
+    return {"GAIN": GAIN, "V_PLUS": V_PLUS, "V_REF": V_REF, "V_SAT": V_SAT, "MARGEM": MARGEM}
+
 def frac_to_voltage(frac: float) -> float:
     # Converte 0.0-1.0 para 0V-9V
     return V_MINUS + frac * DELTA_V
@@ -21,7 +39,7 @@ def forward_pass(w1: float, w2: float, w_bias: float, x1: int, x2: int):
     """
     
     # 1. Tensão de Bias (Threshold)
-    v_bias = clip(frac_to_voltage(w_bias), V_MINUS, 7.5)
+    v_bias = clip(frac_to_voltage(w_bias), V_MINUS, V_SAT)
     
     # 2. Nó de Entrada
     soma_v = V_REF
@@ -38,25 +56,29 @@ def forward_pass(w1: float, w2: float, w_bias: float, x1: int, x2: int):
     
     # 3. Amplificação
     v_a_raw = V_REF + GAIN * (v_in - V_REF)
-    v_a = clip(v_a_raw, V_MINUS, 7.5)
+    v_a = clip(v_a_raw, V_MINUS, V_SAT)
     
     # 4. Predição Binária
     pred_binaria = 1 if v_a > v_bias else 0
     
     return v_a, v_bias, n, pred_binaria
 
-def train_neuron(target_table: dict, gate_name: str = "Custom", lr: float = 0.001, epochs: int = 500000):
+def train_neuron(target_table: dict, gate_name: str = "Custom", lr: float = 0.001, epochs: int = 500000, init=None):
     """
     Treina usando Hinge Loss (Perceptron com Margem).
     Objetivo: y * (Va - Vbias) >= margem
+    init: (w1, w2, w_bias) de uma solução vizinha (warm-start); None sorteia.
     """
     
-    # Inicialização Aleatória
-    w1 = random.uniform(0.0, 1.0)
-    w2 = random.uniform(0.0, 1.0)
-    w_bias = random.uniform(0.0, 1.0)
+    if init is not None:
+        w1, w2, w_bias = init
+    else:
+        # Inicialização Aleatória
+        w1 = random.uniform(0.0, 1.0)
+        w2 = random.uniform(0.0, 1.0)
+        w_bias = random.uniform(0.0, 1.0)
     
-    margem = 0.3 # Margem de segurança (Zona Morta)
+    margem = MARGEM
 
     print(f"--- Treinando {gate_name} (Hinge Loss - Perceptron Puro) ---")
     
@@ -111,7 +133,7 @@ def train_neuron(target_table: dict, gate_name: str = "Custom", lr: float = 0.00
                 # Clip
                 w1 = clip(w1)
                 w2 = clip(w2)
-                w_bias = clip(w_bias, 0.0, 7.5 / DELTA_V)
+                w_bias = clip(w_bias, 0.0, V_SAT / DELTA_V)
         
         if errors_count == 0:
             # Se passou por todos os exemplos sem violar a margem, ACABOU.
@@ -144,7 +166,17 @@ if __name__ == "__main__":
         }
         gate_name = known_gates.get(s_input, f"Custom: {s_input}")
         
-        w1_final, w2_final, w_bias_final = train_neuron(custom_table, gate_name=gate_name)
+        # Warm-start a partir da solução mais próxima já salva; se falhar, volta ao sorteio
+        store = SolutionStore()
+        vizinha = store.nearest("1N", s_input, circuit_constants())
+        w1_final, w2_final, w_bias_final = None, None, None
+        if vizinha:
+            print(f"  Warm-start a partir de {vizinha['table']} (margem {vizinha['margin']:.2f}V)")
+            w1_final, w2_final, w_bias_final = train_neuron(custom_table, gate_name=gate_name, epochs=WARM_EPOCHS, init=vizinha["weights"])
+            if any(forward_pass(w1_final, w2_final, w_bias_final, x1, x2)[3] != t for (x1, x2), t in custom_table.items()):
+                w1_final = None
+        if w1_final is None:
+            w1_final, w2_final, w_bias_final = train_neuron(custom_table, gate_name=gate_name)
         
         v1 = frac_to_voltage(w1_final)
         v2 = frac_to_voltage(w2_final)
@@ -157,11 +189,19 @@ if __name__ == "__main__":
         
         print("-" * 30)
         erros = 0
+        margem_min = 999.0
         for (x1, x2), target in custom_table.items():
             va, vb, n, pred = forward_pass(w1_final, w2_final, w_bias_final, x1, x2)
             status = "OK" if pred == target else "ERRO"
             if pred != target: erros += 1
+            margem_min = min(margem_min, abs(va - vb))
             print(f"  In({x1},{x2}) | Va={va:4.2f}V Bias={vb:4.2f}V | Out={pred} ({target}) -> {status}")
             
-        if erros == 0: print("\nSUCESSO!")
+        if erros == 0:
+            store.add("1N", s_input, circuit_constants(), [w1_final, w2_final, w_bias_final], margem_min, loss="hinge")
+            store.save()
+            print("\nSUCESSO!")
+            if power_summary:
+                consumo = power_summary("1N", [w1_final, w2_final, w_bias_final], circuit_constants())
+                print(f"Consumo estimado: {consumo['mean'] * 1e3:.1f} mW em média, {consumo['max'] * 1e3:.1f} mW no pior caso")
         else: print(f"\nFALHA ({erros} erros)")
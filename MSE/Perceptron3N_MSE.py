@@ -1,5 +1,18 @@
 import random
 import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analogica.profiling import Profiler
+from analogica.store import SolutionStore
+
+try:
+    # Requerem NumPy: estimativa de consumo e frente de Pareto das tentativas
+    from analogica.power import power_summary
+    from analogica.selection import choose as escolher
+except ImportError:
+    power_summary = escolher = None
 
 # --- CONSTANTES ELÉTRICAS ---
 # CAMADA 1 (Oculta - N1 e N2)
@@ -15,6 +28,25 @@ L2_REF    = 3.75  # Terra Virtual
 L2_SAT    = 6   # Saída Máxima do N3
 
 GAIN = 3.2 # Ganho dos AmpOps (Igual para todos)
+MARGEM = 0.3 # Margem de segurança do treino
+
+WARM_EPOCHS = 2000 # Épocas quando parte de uma solução vizinha do banco
+# Soluções corretas coletadas antes de escolher pela frente de Pareto (opcional: --candidatos N).
+# Padrão 1: para na primeira solução perfeita.
+def ler_candidatos(argv) -> int:
+    # Valor de --candidatos N (inteiro >= 1); sem a opção, 1
+    if "--candidatos" not in argv:
+        return 1
+    try:
+        n = int(argv[argv.index("--candidatos") + 1])
+    except (IndexError, ValueError):
+        n = 0
+    if n < 1:
+        sys.exit("Uso: --candidatos N, com N inteiro >= 1")
+    return n
+
+CANDIDATOS = ler_candidatos(sys.argv)
+MARGEM_PARADA = 0.2 # Margem mínima (V) de uma tentativa perfeita para parar de tentar
 
 # Tabelas Verdade
 AND_TABLE = {(0, 0): 0, (0, 1): 0, (1, 0): 0, (1, 1): 1}
@@ -37,6 +69,14 @@ def sigmoid_derivative(x):
     s = sigmoid(x)
     return s * (1 - s)
 
+def circuit_constants():
+    # Constantes que identificam a configuração no banco de soluções
+    return {
+        "GAIN": GAIN, "MARGEM": MARGEM,
+        "L1_VCC": L1_VCC, "L1_SIGNAL": L1_SIGNAL, "L1_REF": L1_REF, "L1_SAT": L1_SAT,
+        "L2_VCC": L2_VCC, "L2_SIGNAL": L2_SIGNAL, "L2_REF": L2_REF, "L2_SAT": L2_SAT,
+    }
+
 class HardwareNeuron:
     def __init__(self, name, v_signal, v_supply, v_ref, v_sat):
         self.name = name
@@ -110,13 +150,21 @@ def print_res(neuron, layer_name):
     print(f"  P2 (w2): {neuron.w2*100:5.1f}% -> {v2:.2f}V ")
     print(f"  PB (wb): {neuron.w_bias*100:5.1f}% -> {vb:.2f}V")
 
-def train_network(target_table, epochs=500000, lr=0.001):
+def train_network(target_table, epochs=500000, lr=0.001, init=None, profiler=None):
     n1 = HardwareNeuron("Oculto 1", v_signal=L1_SIGNAL, v_supply=L1_VCC, v_ref=L1_REF, v_sat=L1_SAT)
     n2 = HardwareNeuron("Oculto 2", v_signal=L1_SIGNAL, v_supply=L1_VCC, v_ref=L1_REF, v_sat=L1_SAT)
     n3 = HardwareNeuron("Saída",    v_signal=L2_SIGNAL, v_supply=L2_VCC, v_ref=L2_REF, v_sat=L2_SAT)
     
-    margem = 0.3
+    # Warm-start: init = [[w1, w2, w_bias] de N1, N2 e N3] de uma solução vizinha
+    if init is not None:
+        for n, (w1, w2, w_bias) in zip([n1, n2, n3], init):
+            n.w1, n.w2, n.w_bias = w1, w2, w_bias
+    
+    margem = MARGEM
     decay = 1e-5
+    if profiler:
+        # --profile: mesma conta numa cópia do laço que mede cada fase
+        return train_network_profiled(n1, n2, n3, target_table, epochs, lr, margem, decay, profiler)
     
     for i in range(epochs):
         total_error = 0.0
@@ -186,7 +234,75 @@ def train_network(target_table, epochs=500000, lr=0.001):
             
     return n1, n2, n3
 
+def train_network_profiled(n1, n2, n3, target_table, epochs, lr, margem, decay, prof):
+    # Cópia do laço de train_network com um cronômetro por fase (lista, shuffle,
+    # forward, sigmoid_derivative, atualização, clip). Cada lap custa mais que
+    # algumas fases, então os tempos servem para comparar fases, não como absolutos.
+    for i in range(epochs):
+        t = prof.clock()
+        total_error = 0.0
+        exemplos = list(target_table.items())
+        t = prof.lap("lista", t)
+        random.shuffle(exemplos)
+        t = prof.lap("shuffle", t)
+        
+        for (x1, x2), y_target in exemplos:
+            out_n1 = n1.forward(x1, x2)
+            out_n2 = n2.forward(x1, x2)
+            n3.forward(out_n1, out_n2)
+            z_n3 = n3.last_va - n3.last_bias_v
+            y_sign = 1.0 if y_target == 1 else -1.0
+            z_shifted = z_n3 - (y_sign * margem)
+            t = prof.lap("forward", t)
+            
+            if (y_target == 1 and z_n3 > margem) or (y_target == 0 and z_n3 < -margem):
+                delta_n3 = 0.0
+            else:
+                y_pred = sigmoid(z_shifted)
+                error = y_target - y_pred
+                total_error += error ** 2
+                delta_n3 = -2 * error * sigmoid_derivative(z_shifted)
+            t = prof.lap("sigmoid_derivative", t)
+            
+            if delta_n3 == 0: continue
+
+            factor_n3 = lr * delta_n3 * (1.0/n3.last_n) * GAIN * n3.v_signal
+            decay_val = lr * decay
+            old_w1_n3, old_w2_n3 = n3.w1, n3.w2
+            if out_n1: n3.w1 -= (factor_n3 + decay_val * n3.w1)
+            if out_n2: n3.w2 -= (factor_n3 + decay_val * n3.w2)
+            n3.w_bias -= lr * delta_n3 * (-1.0) * n3.v_supply
+            t = prof.lap("atualização", t)
+            
+            dist_n1 = (n1.last_va - n1.last_bias_v)
+            delta_n1 = delta_n3 * old_w1_n3 * sigmoid_derivative(dist_n1)
+            dist_n2 = (n2.last_va - n2.last_bias_v)
+            delta_n2 = delta_n3 * old_w2_n3 * sigmoid_derivative(dist_n2)
+            t = prof.lap("sigmoid_derivative", t)
+
+            factor_n1 = lr * delta_n1 * (1.0/n1.last_n) * GAIN * n1.v_signal
+            if x1: n1.w1 -= (factor_n1 + decay_val * n1.w1)
+            if x2: n1.w2 -= (factor_n1 + decay_val * n1.w2)
+            n1.w_bias -= lr * delta_n1 * (-1.0) * n1.v_supply
+            factor_n2 = lr * delta_n2 * (1.0/n2.last_n) * GAIN * n2.v_signal
+            if x1: n2.w1 -= (factor_n2 + decay_val * n2.w1)
+            if x2: n2.w2 -= (factor_n2 + decay_val * n2.w2)
+            n2.w_bias -= lr * delta_n2 * (-1.0) * n2.v_supply
+            t = prof.lap("atualização", t)
+
+            for n in [n1, n2, n3]:
+                n.w1 = clip(n.w1, 0.1, 0.9)
+                n.w2 = clip(n.w2, 0.1, 0.9)
+                max_bias = (n.v_sat - 0.5) / n.v_supply
+                n.w_bias = clip(n.w_bias, 0.1, max_bias)
+            t = prof.lap("clip", t)
+        
+        if total_error < 1e-6: break
+            
+    return n1, n2, n3
+
 if __name__ == "__main__":
+    PROFILE = "--profile" in sys.argv
     while True:
         print("Digite a tabela verdade desejada como uma string de 4 bits.")
         print("Ordem de Entrada: (0,0), (1,0), (0,1), (1,1)")
@@ -220,18 +336,24 @@ if __name__ == "__main__":
         
         gate_name = known_gates.get(s_input, f"Custom: {s_input}")
         
-        best_n1, best_n2, best_n3 = None, None, None
-        min_errors = 999
-        
         print(f"--- Treinando {gate_name} (MSE Shifted Sigmoid - Multi-Start) ---")
         
-        best_n1, best_n2, best_n3 = None, None, None
-        min_errors = 999
-        best_margin_min = -1.0
+        candidatos, erros_lista, margens = [], [], []
+        
+        # Warm-start: a primeira tentativa parte da solução mais próxima já salva
+        store = SolutionStore()
+        vizinha = store.nearest("3N", s_input, circuit_constants())
+        if vizinha:
+            print(f"  Warm-start a partir de {vizinha['table']} (margem {vizinha['margin']:.2f}V)")
+        
+        prof = Profiler() if PROFILE else None
         
         # 20 Tentativas para fugir de mínimos locais (XOR é difícil)
         for attempt in range(20): 
-            n1, n2, n3 = train_network(custom_table, epochs=100000)
+            if attempt == 0 and vizinha:
+                n1, n2, n3 = train_network(custom_table, epochs=WARM_EPOCHS, init=vizinha["weights"], profiler=prof)
+            else:
+                n1, n2, n3 = train_network(custom_table, epochs=100000, profiler=prof)
             
             current_errors = 0
             current_margin_min = 999.0
@@ -253,20 +375,29 @@ if __name__ == "__main__":
                 if y3 != target:
                     current_errors += 1
             
-            # Critério: Menos erros > Maior Margem
-            if current_errors < min_errors:
-                min_errors = current_errors
-                best_margin_min = current_margin_min
-                best_n1, best_n2, best_n3 = n1, n2, n3
-            elif current_errors == min_errors:
-                if current_margin_min > best_margin_min:
-                    best_margin_min = current_margin_min
-                    best_n1, best_n2, best_n3 = n1, n2, n3
+            candidatos.append((n1, n2, n3))
+            erros_lista.append(current_errors)
+            margens.append(current_margin_min)
             
-            # Se achou solução perfeita com boa margem, para
-            if min_errors == 0 and best_margin_min > 0.2:
+            # Já há soluções perfeitas com boa margem suficientes para escolher, para
+            if sum(e == 0 and m > MARGEM_PARADA for e, m in zip(erros_lista, margens)) >= CANDIDATOS:
                 break
+        
+        # Só disputam a escolha as tentativas que passaram no critério de parada
+        aptos = [k for k in range(len(candidatos)) if erros_lista[k] == 0 and margens[k] > MARGEM_PARADA]
+        if escolher and aptos:
+            pesos_candidatos = [[[n.w1, n.w2, n.w_bias] for n in c] for c in candidatos]
+            best = aptos[escolher("3N", [pesos_candidatos[k] for k in aptos], s_input, circuit_constants(),
+                                  verbose=CANDIDATOS > 1, numbers=[k + 1 for k in aptos])]
+        else:
+            # Critério: Menos erros > Maior Margem
+            best = min(range(len(candidatos)), key=lambda k: (erros_lista[k], -margens[k]))
+        best_n1, best_n2, best_n3 = candidatos[best]
+        best_margin_min = margens[best]
 
+        if prof:
+            print("\n" + prof.report())
+        
         print(f"\n=== RESULTADOS PARA {gate_name} ===")
         
         if best_n1:
@@ -300,7 +431,13 @@ if __name__ == "__main__":
                     print(f"    [DEBUG] Margens: N1={m1:.2f}V, N2={m2:.2f}V, N3={m3:.2f}V (Min 0.10V)")
 
             if total_errors == 0:
+                pesos = [[n.w1, n.w2, n.w_bias] for n in (best_n1, best_n2, best_n3)]
+                store.add("3N", s_input, circuit_constants(), pesos, best_margin_min, loss="mse")
+                store.save()
                 print("\n>>> SUCESSO: A rede aprendeu a porta perfeitamente! <<<")
+                if power_summary:
+                    consumo = power_summary("3N", pesos, circuit_constants())
+                    print(f"Consumo estimado: {consumo['mean'] * 1e3:.1f} mW em média, {consumo['max'] * 1e3:.1f} mW no pior caso")
             else:
                 print(f"\n>>> FALHA: A rede errou {total_errors} casos. <<<")
         else:
@@ -1,5 +1,17 @@
 import random
 import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analogica.store import SolutionStore
+
+try:
+    # Requerem NumPy: estimativa de consumo e frente de Pareto das tentativas
+    from analogica.power import power_summary
+    from analogica.selection import choose as escolher
+except ImportError:
+    power_summary = escolher = None
 
 # --- CONSTANTES DO CIRCUITO ---
 V_PLUS = 9.0
@@ -7,6 +19,26 @@ V_MINUS = 0.0
 V_REF = V_PLUS / 2  # Terra Virtual
 GAIN = 3.2   # Ganho do AmpOp A
 DELTA_V = V_PLUS - V_MINUS # 9V
+V_SAT = 7.5  # Saturação do LM324
+MARGEM = 0.3 # Margem de segurança do treino
+
+WARM_EPOCHS = 1000 # Épocas quando parte de uma solução vizinha do banco
+# Soluções corretas coletadas antes de escolher pela frente de Pareto (opcional: --candidatos N).
+# Padrão 1: para na primeira solução perfeita.
+def ler_candidatos(argv) -> int:
+    # Valor de --candidatos N (inteiro >= 1); sem a opção, 1
+    if "--candidatos" not in argv:
+        return 1
+    try:
+        n = int(argv[argv.index("--candidatos") + 1])
+    except (IndexError, ValueError):
+        n = 0
+    if n < 1:
+        sys.exit("Uso: --candidatos N, com N inteiro >= 1")
+    return n
+
+CANDIDATOS = ler_candidatos(sys.argv)
+MARGEM_PARADA = 0.2 # Margem mínima (V) de uma tentativa perfeita para parar de tentar
 
 # Tabelas Verdade
 AND_TABLE = {(0, 0): 0, (0, 1): 0, (1, 0): 0, (1, 1): 1}
@@ -31,6 +63,10 @@ def sigmoid_derivative(x):
     s = sigmoid(x)
     return s * (1 - s)
 
+def circuit_constants() -> dict:
+    # Constantes que identificam a configuração no banco de soluções
+    return {"GAIN": GAIN, "V_PLUS": V_PLUS, "V_REF": V_REF, "V_SAT": V_SAT, "MARGEM": MARGEM}
+
 def frac_to_voltage(frac: float) -> float:
     # Converte 0.0-1.0 para 0V-9V
     return V_MINUS + frac * DELTA_V
@@ -43,7 +79,7 @@ def forward_pass(w1: float, w2: float, w_bias: float, x1: int, x2: int):
     
     # 1. Tensão de Bias (Threshold)
     # O LM324 satura em ~7.5V, então limitamos o bias também (caso venha de um buffer)
-    v_bias = clip(frac_to_voltage(w_bias), V_MINUS, 7.5)
+    v_bias = clip(frac_to_voltage(w_bias), V_MINUS, V_SAT)
     
     # 2. Nó de Entrada (Média Ponderada Dinâmica)
     # R_ref sempre conectado. R1 conecta se x1=1. R2 conecta se x2=1.
@@ -62,7 +98,7 @@ def forward_pass(w1: float, w2: float, w_bias: float, x1: int, x2: int):
     # 3. Amplificação (AmpOp A)
     # Formula: V_out = V_ref + Gain * (V_in - V_ref)
     v_a_raw = V_REF + GAIN * (v_in - V_REF)
-    v_a = clip(v_a_raw, V_MINUS, 7.5) # Saturação do OpAmp real
+    v_a = clip(v_a_raw, V_MINUS, V_SAT) # Saturação do OpAmp real
     
     # 4. Predição (Comparador / Hinge)
     # Margem de decisão: Va > Vbias
@@ -70,12 +106,16 @@ def forward_pass(w1: float, w2: float, w_bias: float, x1: int, x2: int):
     
     return v_a, v_bias, n, pred_binaria
 
-def train_neuron(target_table: dict, gate_name: str = "Custom", lr: float = 0.001, epochs: int = 200000):
-    w1 = random.uniform(0.0, 1.0)
-    w2 = random.uniform(0.0, 1.0)
-    w_bias = random.uniform(0.0, 1.0)
+def train_neuron(target_table: dict, gate_name: str = "Custom", lr: float = 0.001, epochs: int = 200000, init=None):
+    # init: (w1, w2, w_bias) de uma solução vizinha (warm-start); None sorteia
+    if init is not None:
+        w1, w2, w_bias = init
+    else:
+        w1 = random.uniform(0.0, 1.0)
+        w2 = random.uniform(0.0, 1.0)
+        w_bias = random.uniform(0.0, 1.0)
     
-    margem = 0.3
+    margem = MARGEM
     
     for epoch in range(epochs):
         total_error = 0.0
@@ -112,7 +152,7 @@ def train_neuron(target_table: dict, gate_name: str = "Custom", lr: float = 0.00
                 
                 w1 = clip(w1)
                 w2 = clip(w2)
-                w_bias = clip(w_bias, 0.0, 7.5 / DELTA_V)
+                w_bias = clip(w_bias, 0.0, V_SAT / DELTA_V)
     
         if total_error < 1e-5: break
             
@@ -155,13 +195,20 @@ if __name__ == "__main__":
         
         print(f"--- Treinando {gate_name} (MSE Shifted Sigmoid - Multi-Start) ---")
         
-        best_w1, best_w2, best_bias = None, None, None
-        min_errors = 999
-        best_margin_min = -1.0
+        candidatos, erros_lista, margens = [], [], []
+        
+        # Warm-start: a primeira tentativa parte da solução mais próxima já salva
+        store = SolutionStore()
+        vizinha = store.nearest("1N", s_input, circuit_constants())
+        if vizinha:
+            print(f"  Warm-start a partir de {vizinha['table']} (margem {vizinha['margin']:.2f}V)")
         
         # 10 Tentativas para fugir de mínimos locais
         for attempt in range(10):
-            w1, w2, w_bias = train_neuron(custom_table, gate_name=gate_name, epochs=100000)
+            if attempt == 0 and vizinha:
+                w1, w2, w_bias = train_neuron(custom_table, gate_name=gate_name, epochs=WARM_EPOCHS, init=vizinha["weights"])
+            else:
+                w1, w2, w_bias = train_neuron(custom_table, gate_name=gate_name, epochs=100000)
             
             # Avaliação
             current_errors = 0
@@ -176,21 +223,29 @@ if __name__ == "__main__":
                 if margin < current_margin_min:
                     current_margin_min = margin
             
-            # Critério: Menos erros > Maior Margem
-            if current_errors < min_errors:
-                min_errors = current_errors
-                best_margin_min = current_margin_min
-                best_w1, best_w2, best_bias = w1, w2, w_bias
-            elif current_errors == min_errors:
-                if current_margin_min > best_margin_min:
-                    best_margin_min = current_margin_min
-                    best_w1, best_w2, best_bias = w1, w2, w_bias
+            candidatos.append([w1, w2, w_bias])
+            erros_lista.append(current_errors)
+            margens.append(current_margin_min)
             
-            # Se achou solução perfeita com boa margem, para
-            if min_errors == 0 and best_margin_min > 0.2:
+            # Já há soluções perfeitas com boa margem suficientes para escolher, para
+            if sum(e == 0 and m > MARGEM_PARADA for e, m in zip(erros_lista, margens)) >= CANDIDATOS:
                 break
         
-        w1_final, w2_final, w_bias_final = best_w1, best_w2, best_bias
+        # Só disputam a escolha as tentativas que passaram no critério de parada
+        aptos = [k for k in range(len(candidatos)) if erros_lista[k] == 0 and margens[k] > MARGEM_PARADA]
+        if escolher and aptos:
+            best = aptos[escolher("1N", [candidatos[k] for k in aptos], s_input, circuit_constants(),
+                                  verbose=CANDIDATOS > 1, numbers=[k + 1 for k in aptos])]
+        else:
+            # Critério: Menos erros > Maior Margem
+            best = min(range(len(candidatos)), key=lambda k: (erros_lista[k], -margens[k]))
+        
+        w1_final, w2_final, w_bias_final = candidatos[best]
+        min_errors, best_margin_min = erros_lista[best], margens[best]
+        
+        if min_errors == 0:
+            store.add("1N", s_input, circuit_constants(), [w1_final, w2_final, w_bias_final], best_margin_min, loss="mse")
+            store.save()
         
         # Exibir Resultados
         v1 = frac_to_voltage(w1_final)
@@ -220,5 +275,8 @@ if __name__ == "__main__":
 
         if erros == 0:
             print("\nSUCESSO: A rede aprendeu a porta perfeitamente!")
+            if power_summary:
+                consumo = power_summary("1N", [w1_final, w2_final, w_bias_final], circuit_constants())
+                print(f"Consumo estimado: {consumo['mean'] * 1e3:.1f} mW em média, {consumo['max'] * 1e3:.1f} mW no pior caso")
         else:
             print(f"\nFALHA: A rede errou {erros} casos (talvez precise de mais épocas ou a porta não é linearmente separável).")
\ No newline at end of file
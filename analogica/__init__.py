@@ -0,0 +1,6 @@
+"""
+Ferramentas compartilhadas pelos scripts de treinamento (MSE/ e Hinge Loss/).
+
+Os scripts continuam independentes; este pacote guarda o que precisa ser
+comum entre eles (banco de soluções, modelos vetorizados, etc.).
+"""
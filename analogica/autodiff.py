@@ -0,0 +1,212 @@
+"""
+Autodiff reverse-mode mínimo sobre arrays NumPy.
+
+Serve para derivar o modelo vetorizado inteiro (divisor, ganho, clip da
+saturação e comparador) sem derivação manual: qualquer função de perda
+montada com estes Tensors ganha o gradiente de graça.
+
+Convenções de subgradiente:
+  clip(x, lo, hi) -> derivada 1 dentro de [lo, hi] (bordas incluídas) e 0 fora:
+                     o subgradiente do modelo.
+  clip_st(x, ...) -> heurística straight-through parcial, usada no treino: fora
+                     da faixa, o gradiente que empurraria x ainda mais para
+                     dentro da saturação é zerado, mas o que traz x de volta
+                     passa. Não é a derivada do modelo (lá ela é 0), mas sem isso
+                     um neurônio saturado fica sem gradiente para sempre e a
+                     fração de restarts que converge cai muito
+                     (python -m analogica.benchmark --gradients autodiff,subgradiente).
+  step(x)         -> degrau do comparador; na volta usa a derivada da sigmoide
+                     (surrogate gradient, como nos scripts 3N).
+  relu(x)         -> derivada 0 em x = 0 (linha exatamente na margem não empurra).
+"""
+import numpy as np
+
+from .model import INPUTS, layer_constants, neuron_calibration
+
+def unbroadcast(grad, shape):
+    # Soma o gradiente nos eixos que sofreram broadcast, voltando ao shape original
+    while grad.ndim > len(shape):
+        grad = grad.sum(axis=0)
+    for axis, size in enumerate(shape):
+        if size == 1 and grad.shape[axis] != 1:
+            grad = grad.sum(axis=axis, keepdims=True)
+    return grad
+
+class Tensor:
+    # Faz ndarray + Tensor cair nos operadores refletidos do Tensor
+    __array_ufunc__ = None
+
+    def __init__(self, value, parents=(), backward=None, requires_grad=False):
+        self.value = np.asarray(value, dtype=float)
+        self.parents = parents      # Tensors de entrada da operação
+        self.backward_fn = backward # grad da saída -> grads dos parents
+        self.requires_grad = requires_grad or any(p.requires_grad for p in parents)
+        self.grad = None
+
+    @property
+    def shape(self):
+        return self.value.shape
+
+    def backward(self, grad=None):
+        """Propaga a partir deste nó; acumula .grad em todos os Tensors que exigem gradiente."""
+        order, seen = [], set()
+        stack = [(self, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                order.append(node)
+                continue
+            if id(node) in seen or not node.requires_grad:
+                continue
+            seen.add(id(node))
+            stack.append((node, True))
+            stack.extend((p, False) for p in node.parents)
+
+        self.grad = np.ones_like(self.value) if grad is None else np.asarray(grad, dtype=float)
+        for node in reversed(order):
+            if node.backward_fn is None or node.grad is None:
+                continue
+            for parent, g in zip(node.parents, node.backward_fn(node.grad)):
+                if not parent.requires_grad:
+                    continue
+                g = unbroadcast(g, parent.shape)
+                parent.grad = g if parent.grad is None else parent.grad + g
+
+    # --- Operações elementares ---
+    def __add__(self, other):
+        other = lift(other)
+        return Tensor(self.value + other.value, (self, other), lambda g: (g, g))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = lift(other)
+        return Tensor(self.value - other.value, (self, other), lambda g: (g, -g))
+
+    def __rsub__(self, other):
+        return lift(other) - self
+
+    def __neg__(self):
+        return Tensor(-self.value, (self,), lambda g: (-g,))
+
+    def __mul__(self, other):
+        other = lift(other)
+        return Tensor(self.value * other.value, (self, other), lambda g: (g * other.value, g * self.value))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        other = lift(other)
+        out = self.value / other.value
+        return Tensor(out, (self, other), lambda g: (g / other.value, -g * out / other.value))
+
+    def __rtruediv__(self, other):
+        return lift(other) / self
+
+    def __getitem__(self, idx):
+        def backward(g):
+            full = np.zeros_like(self.value)
+            full[idx] = g
+            return (full,)
+        return Tensor(self.value[idx], (self,), backward)
+
+    def sum(self, axis=None):
+        def backward(g):
+            if axis is not None:
+                g = np.expand_dims(g, axis)
+            return (np.broadcast_to(g, self.shape),)
+        return Tensor(self.value.sum(axis=axis), (self,), backward)
+
+    def mean(self, axis=None):
+        count = self.value.size if axis is None else self.value.shape[axis]
+        return self.sum(axis) / count
+
+def lift(x):
+    # Constantes (floats, arrays) viram Tensors sem gradiente
+    return x if isinstance(x, Tensor) else Tensor(x)
+
+def variable(value):
+    # Folha do grafo cujo gradiente queremos (os pesos)
+    return Tensor(value, requires_grad=True)
+
+# --- Não-linearidades do circuito e das perdas ---
+def clip(x, lo, hi):
+    lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+    inside = (x.value >= lo) & (x.value <= hi)
+    return Tensor(np.clip(x.value, lo, hi), (x,), lambda g: (g * inside,))
+
+def clip_st(x, lo, hi):
+    lo, hi = np.asarray(lo, dtype=float), np.asarray(hi, dtype=float)
+    inside = (x.value >= lo) & (x.value <= hi)
+    above, below = x.value > hi, x.value < lo
+
+    def backward(g):
+        # Fora da faixa só passa o gradiente que traz x de volta (descida = -g)
+        return (g * (inside | (above & (g > 0)) | (below & (g < 0))),)
+    return Tensor(np.clip(x.value, lo, hi), (x,), backward)
+
+def _sigmoid(v):
+    return 0.5 * (1.0 + np.tanh(0.5 * v))
+
+def step(x, scale=1.0):
+    # Comparador: saída 1 se x > 0. Na volta: derivada da sigmoide(x / scale)
+    s = _sigmoid(x.value / scale)
+    return Tensor((x.value > 0).astype(float), (x,), lambda g: (g * s * (1 - s) / scale,))
+
+def relu(x):
+    return Tensor(np.maximum(x.value, 0.0), (x,), lambda g: (g * (x.value > 0),))
+
+def sigmoid(x):
+    s = _sigmoid(x.value)
+    return Tensor(s, (x,), lambda g: (g * s * (1 - s),))
+
+def softplus(x):
+    # log(1 + e^x) estável; derivada = sigmoide(x)
+    out = np.logaddexp(0.0, x.value)
+    return Tensor(out, (x,), lambda g: (g * _sigmoid(x.value),))
+
+def square(x):
+    return Tensor(x.value ** 2, (x,), lambda g: (2.0 * g * x.value,))
+
+def absolute(x):
+    return Tensor(np.abs(x.value), (x,), lambda g: (g * np.sign(x.value),))
+
+def where(cond, a, b):
+    a, b = lift(a), lift(b)
+    cond = np.asarray(cond, dtype=bool)
+    return Tensor(np.where(cond, a.value, b.value), (a, b), lambda g: (g * cond, g * ~cond))
+
+# --- Modelo do circuito como grafo diferenciável ---
+def neuron(w1, w2, w_bias, x1, x2, v_signal, v_supply, v_ref, v_sat, gain, offset=0.0, cmp_offset=0.0, surrogate=1.0,
+           straight_through=False):
+    """
+    Mesmas equações de model.neuron, montadas com Tensors.
+    x1/x2 podem ser Tensors (saídas de outros comparadores, no 3N).
+    straight_through troca o clip exato por clip_st (treino).
+    """
+    saturate = clip_st if straight_through else clip
+    n = 1.0 + x1 + x2
+    v_in = (v_ref + x1 * (w1 * v_signal) + x2 * (w2 * v_signal)) / n
+    v_a = saturate(v_ref + gain * (v_in - v_ref) + offset, 0.0, v_sat)
+    v_bias = saturate(w_bias * v_supply, 0.0, v_sat) + cmp_offset
+    out = step(v_a - v_bias, surrogate)
+    return v_a, v_bias, n, out
+
+def forward(model: str, w: Tensor, const: dict, surrogate=1.0, straight_through=False):
+    """
+    Versão diferenciável de model.forward: lista com (v_a, v_bias, n, out)
+    de cada neurônio, todos Tensors (..., R, S).
+    """
+    layers = layer_constants(const, model)
+    calib = neuron_calibration(const, model)
+    x1, x2 = INPUTS[:, 0], INPUTS[:, 1]
+    st = straight_through
+    if model == "1N":
+        return [neuron(w[..., 0, None], w[..., 1, None], w[..., 2, None], x1, x2, *layers[0], *calib[0], surrogate, st)]
+    res = []
+    for k in range(2):
+        res.append(neuron(w[..., k, 0, None], w[..., k, 1, None], w[..., k, 2, None], x1, x2, *layers[k], *calib[k],
+                          surrogate, st))
+    res.append(neuron(w[..., 2, 0, None], w[..., 2, 1, None], w[..., 2, 2, None],
+                      res[0][3], res[1][3], *layers[2], *calib[2], surrogate, st))
+    return res
@@ -0,0 +1,112 @@
+"""
+Benchmark das perdas e das regras de gradiente (analogica.train.GRADIENTS):
+compara lado a lado, com as mesmas sementes (mesmos pesos iniciais) para
+cada porta, a fração de restarts que converge e as épocas até convergir, e
+aponta a combinação mais rápida.
+
+Uso:
+    python -m analogica.benchmark --model 1N --tables 0001,1110
+    python -m analogica.benchmark --model 3N --tables 0110 --losses hinge,mse,logloss --seeds 0,1,2
+    python -m analogica.benchmark --model 1N --losses hinge --gradients autodiff,subgradiente,manual
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from .losses import LOSSES
+from .model import KNOWN_GATES, evaluate, table_targets
+from .profiling import Profiler
+from .train import GRADIENTS, train_batch
+
+def run_benchmark(model: str, tables, losses=None, seeds=(0, 1, 2), restarts: int = 64, epochs: int = 5000,
+                  gradients=("autodiff",), profiler=None) -> list:
+    """
+    Uma linha de resultado por (tabela, perda, gradiente), agregando todas as sementes:
+      convergiu   -> fração dos restarts com todas as linhas além da margem (margem > 0)
+      epocas_p50  -> mediana das épocas até convergir (entre os que convergiram)
+      epocas_min  -> épocas do restart mais rápido (tempo até a primeira solução)
+      margem      -> melhor margem da população
+      tempo       -> segundos de treino
+    """
+    losses = losses or sorted(LOSSES)
+    rows = []
+    for table in tables:
+        targets = table_targets(table)
+        for loss, gradient in itertools.product(losses, gradients):
+            ok_all, epocas_ok, best, elapsed = [], [], -np.inf, 0.0
+            for seed in seeds:
+                t0 = time.perf_counter()
+                w, epocas = train_batch(model, targets, restarts=restarts, epochs=epochs, seed=seed, gradient=gradient,
+                                        loss=loss, profiler=profiler)
+                elapsed += time.perf_counter() - t0
+                _, margin = evaluate(model, w, targets)
+                ok = margin > 0
+                ok_all.append(ok)
+                epocas_ok.append(epocas[ok])
+                best = max(best, margin.max())
+            epocas_ok = np.concatenate(epocas_ok)
+            rows.append({
+                "table": table,
+                "loss": loss,
+                "gradiente": gradient,
+                "convergiu": float(np.concatenate(ok_all).mean()),
+                "epocas_p50": float(np.median(epocas_ok)) if epocas_ok.size else None,
+                "epocas_min": int(epocas_ok.min()) if epocas_ok.size else None,
+                "margem": float(best),
+                "tempo": elapsed,
+            })
+    return rows
+
+def best_loss_per_table(rows) -> dict:
+    """
+    Combinação mais rápida por tabela: maior fração convergida, desempate
+    pela menor mediana de épocas. Valor "perda" (ou "perda/gradiente" quando
+    mais de uma regra de gradiente foi comparada).
+    """
+    several = len({row["gradiente"] for row in rows}) > 1
+    best = {}
+    for row in rows:
+        key = (-row["convergiu"], row["epocas_p50"] if row["epocas_p50"] is not None else np.inf)
+        if row["table"] not in best or key < best[row["table"]][0]:
+            best[row["table"]] = (key, f"{row['loss']}/{row['gradiente']}" if several else row["loss"])
+    return {table: name for table, (_, name) in best.items()}
+
+def print_rows(rows):
+    print(f"{'Tabela':<16} {'Perda':<8} {'Gradiente':<13} {'Conv.':>6} {'Ép. p50':>8} {'Ép. min':>8} {'Margem':>7} {'Tempo':>7}")
+    for r in rows:
+        name = f"{r['table']} {KNOWN_GATES.get(r['table'], '')}"
+        p50 = f"{r['epocas_p50']:.0f}" if r["epocas_p50"] is not None else "-"
+        emin = f"{r['epocas_min']}" if r["epocas_min"] is not None else "-"
+        print(f"{name:<16} {r['loss']:<8} {r['gradiente']:<13} {r['convergiu']*100:5.1f}% {p50:>8} {emin:>8} "
+              f"{r['margem']:6.2f}V {r['tempo']:6.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara as perdas do registro com as mesmas sementes")
+    parser.add_argument("--model", choices=["1N", "3N"], default="1N")
+    parser.add_argument("--tables", default="0001,0111,1110,1000,0100")
+    parser.add_argument("--losses", default=None, help="Perdas separadas por vírgula (padrão: todas)")
+    parser.add_argument("--seeds", default="0,1,2")
+    parser.add_argument("--restarts", type=int, default=64)
+    parser.add_argument("--epochs", type=int, default=5000)
+    parser.add_argument("--gradients", default="autodiff",
+                        help=f"Regras de gradiente separadas por vírgula ({', '.join(GRADIENTS)})")
+    parser.add_argument("--manual", action="store_true", help="Atalho para --gradients manual (regra dos scripts)")
+    parser.add_argument("--profile", action="store_true", help="Mostra o tempo por fase do treino")
+    parser.add_argument("--profile-out", default=None, help="Exporta o profiling (.json = Chrome trace, outro = collapsed)")
+    args = parser.parse_args()
+
+    prof = Profiler() if (args.profile or args.profile_out) else None
+    rows = run_benchmark(args.model, args.tables.split(","), args.losses.split(",") if args.losses else None,
+                         [int(s) for s in args.seeds.split(",")], args.restarts, args.epochs,
+                         ["manual"] if args.manual else args.gradients.split(","), prof)
+    print_rows(rows)
+    print("\nCombinação mais rápida por porta:")
+    for table, loss in best_loss_per_table(rows).items():
+        print(f"  {table} {KNOWN_GATES.get(table, '')}: {loss}")
+
+    if prof:
+        print("\n" + prof.report())
+        if args.profile_out:
+            prof.export(args.profile_out)
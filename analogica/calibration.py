@@ -0,0 +1,342 @@
+"""
+Calibração com a placa no laço (hardware-in-the-loop).
+
+A placa real não segue o modelo nominal: resistores de 5% mudam o ganho do
+amplificador, o divisor da referência desloca Va e o comparador tem offset.
+A calibração mede a placa, ajusta esses desvios por neurônio e retreina os
+pots a partir da configuração atual (menor reajuste possível).
+
+Transporte (como falar com a placa), a mesma interface para os dois lados:
+    SerialTransport -> placa com pots digitais e ADC, por porta serial (pyserial)
+    SimulatedBoard  -> placa simulada: modelo vetorizado (o forward_pass dos
+                       scripts) com desvios sorteados e ruído de leitura
+
+Roteiro de medida, em dois lotes (cada lote = uma ida e volta na serial):
+    1. pots atuais + PROBES configurações sorteadas, todas as linhas da tabela:
+       Va medido contra o divisor nominal -> ganho e offset de Va (mínimos
+       quadrados nos pontos fora da saturação)
+    2. varredura do bias em torno do Va medido com os pots atuais (na linha
+       de Va mais longe dos trilhos), todas as linhas: a tensão em que o
+       comparador vira -> offset do comparador
+Os desvios entram nas constantes como GAIN_Nk / OFFSET_Nk / CMP_Nk, que o
+modelo (analogica.model) e o autodiff já entendem, então o retreino é o
+train_batch de sempre com warm-start nos pots atuais.
+
+Uso:
+    python -m analogica.calibration --model 3N --table 0110
+    python -m analogica.calibration --model 1N --table 0001 --port /dev/ttyUSB0
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from .model import (INPUTS, KNOWN_GATES, NEURONS, default_constants, evaluate, forward, layer_constants,
+                    table_targets, weight_bounds)
+from .train import train_batch
+
+try:
+    import serial
+except ImportError:
+    serial = None
+
+PROBES = 16          # Configurações sorteadas no lote 1
+SWEEP_STEPS = 41     # Passos da varredura do bias no lote 2
+SWEEP_SPAN = 0.4     # Varredura de +-SWEEP_SPAN V em torno de Va
+SAMPLES = 8          # Leituras do ADC por linha (média feita na placa)
+LINEAR_GUARD = 0.2   # Distância mínima (V) de Va aos trilhos para entrar no ajuste de ganho
+ALL_ROWS = (0, 1, 2, 3)
+
+# Desvios sorteados da placa simulada (desvio padrão)
+GAIN_SPREAD = 0.05   # Relativo ao GAIN nominal
+OFFSET_SPREAD = 0.15 # V em Va
+CMP_SPREAD = 0.05    # V no comparador
+
+class Transport:
+    """
+    Interface com uma placa. measure() aplica cada configuração de pots
+    (C, 3) ou (C, 3, 3) e mede as linhas pedidas, tudo em um lote.
+    Retorna (v_a, out), ambos (C, len(rows), neurônios).
+    """
+    model = "1N"
+
+    def measure(self, configs, rows=ALL_ROWS, samples: int = SAMPLES):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+class SimulatedBoard(Transport):
+    """
+    Placa simulada. Sem desvios explícitos, sorteia ganho, offset de Va e
+    offset do comparador por neurônio (seed); noise é o desvio padrão (V) de
+    uma leitura do ADC, reduzido pela média de samples leituras.
+    """
+    def __init__(self, model: str, const=None, gain=None, offset=None, cmp_offset=None, noise: float = 0.01,
+                 seed=None):
+        self.model = model
+        self.rng = np.random.default_rng(seed)
+        self.const = dict(const or default_constants(model))
+        names = NEURONS[model]
+        if gain is None:
+            gain = self.const["GAIN"] * (1.0 + self.rng.normal(0.0, GAIN_SPREAD, len(names)))
+        if offset is None:
+            offset = self.rng.normal(0.0, OFFSET_SPREAD, len(names))
+        if cmp_offset is None:
+            cmp_offset = self.rng.normal(0.0, CMP_SPREAD, len(names))
+        for k, name in enumerate(names):
+            self.const[f"GAIN_{name}"] = float(np.broadcast_to(gain, len(names))[k])
+            self.const[f"OFFSET_{name}"] = float(np.broadcast_to(offset, len(names))[k])
+            self.const[f"CMP_{name}"] = float(np.broadcast_to(cmp_offset, len(names))[k])
+        self.noise = noise
+
+    def measure(self, configs, rows=ALL_ROWS, samples: int = SAMPLES):
+        res = forward(self.model, np.asarray(configs, dtype=float), self.const, INPUTS[list(rows)])
+        v_a = np.stack([r[0] for r in res], axis=-1)
+        out = np.stack([r[3] for r in res], axis=-1)
+        return v_a + self.rng.normal(0.0, self.noise / np.sqrt(samples), v_a.shape), out
+
+class SerialTransport(Transport):
+    """
+    Placa com pots digitais (fração 0..1 do curso) e ADC em Va, protocolo de linhas:
+        "W w1 w2 wb [w1 w2 wb w1 w2 wb]" -> "OK"               (ajusta os pots)
+        "M r1,r2,... samples"            -> uma linha por r:    (mede as linhas)
+                                            "va out [va out va out]"
+    va vem em contagens do ADC (média de samples leituras) e vira volts por
+    adc_scale; out é 0/1. O lote inteiro é enviado de uma vez e as respostas
+    lidas depois, para não pagar a latência da serial por comando.
+    """
+    def __init__(self, port: str, model: str, baudrate: int = 115200, adc_scale: float = 9.0 / 1023, timeout: float = 5.0):
+        if serial is None:
+            raise ImportError("SerialTransport requer pyserial (pip install pyserial)")
+        self.model = model
+        self.adc_scale = adc_scale
+        self.port = serial.Serial(port, baudrate, timeout=timeout)
+
+    def _readline(self) -> str:
+        line = self.port.readline().decode("ascii", errors="replace").strip()
+        if not line:
+            raise TimeoutError(f"{self.port.port}: placa não respondeu")
+        return line
+
+    def measure(self, configs, rows=ALL_ROWS, samples: int = SAMPLES):
+        configs = np.asarray(configs, dtype=float)
+        flat = configs.reshape(len(configs), -1)
+        row_list = ",".join(str(r) for r in rows)
+        commands = []
+        for pots in flat:
+            commands.append("W " + " ".join(f"{p:.4f}" for p in pots))
+            commands.append(f"M {row_list} {samples}")
+        self.port.write(("\n".join(commands) + "\n").encode("ascii"))
+
+        n = len(NEURONS[self.model])
+        v_a = np.zeros((len(configs), len(rows), n))
+        out = np.zeros((len(configs), len(rows), n))
+        for c in range(len(configs)):
+            reply = self._readline()
+            if reply != "OK":
+                raise RuntimeError(f"Resposta inesperada da placa: {reply!r}")
+            for s in range(len(rows)):
+                values = [float(v) for v in self._readline().split()]
+                v_a[c, s] = np.asarray(values[0::2]) * self.adc_scale
+                out[c, s] = values[1::2]
+        return v_a, out
+
+    def close(self):
+        self.port.close()
+
+def probe_configs(model: str, w, const: dict, count: int = PROBES, seed=None):
+    # Pots atuais + configurações sorteadas no meio do curso (Va espalhado, pouca saturação)
+    rng = np.random.default_rng(seed)
+    w = np.asarray(w, dtype=float)
+    probes = rng.uniform(0.2, 0.8, (count,) + w.shape)
+    lo, hi = weight_bounds(model, const)
+    return np.clip(np.concatenate([w[None], probes]), lo, hi)
+
+def _neuron_inputs(model: str, rows, out):
+    # Entradas de cada neurônio nas linhas medidas: no 3N, N3 recebe as saídas medidas dos ocultos
+    x = INPUTS[list(rows)]
+    if model == "1N":
+        return [(x[:, 0], x[:, 1])]
+    return [(x[:, 0], x[:, 1])] * 2 + [(out[..., 0], out[..., 1])]
+
+def _pots(model: str, configs, k: int):
+    return configs if model == "1N" else configs[:, k, :]
+
+def fit_amplifier(model: str, configs, rows, v_a, out, const: dict):
+    """
+    Ganho e offset de Va por neurônio: Va - Vref = gain * (Vin - Vref) + offset,
+    com Vin do divisor nominal. Retorna lista de (gain, offset).
+    """
+    layers = layer_constants(const, model)
+    fit = []
+    for k, (x1, x2) in enumerate(_neuron_inputs(model, rows, out)):
+        v_signal, _, v_ref, v_sat = layers[k]
+        pots = _pots(model, configs, k)
+        n = 1.0 + x1 + x2
+        v_in = (v_ref + x1 * pots[:, 0, None] * v_signal + x2 * pots[:, 1, None] * v_signal) / n
+        u = np.broadcast_to(v_in - v_ref, v_a.shape[:2]).ravel()
+        y = v_a[..., k].ravel() - v_ref
+        linear = (v_a[..., k].ravel() > LINEAR_GUARD) & (v_a[..., k].ravel() < v_sat - LINEAR_GUARD)
+        if linear.sum() < 2 or np.ptp(u[linear]) == 0:
+            fit.append((const["GAIN"], 0.0))  # Sem pontos para ajustar: fica o nominal
+            continue
+        a = np.stack([u[linear], np.ones(linear.sum())], axis=-1)
+        gain, offset = np.linalg.lstsq(a, y[linear], rcond=None)[0]
+        fit.append((float(gain), float(offset)))
+    return fit
+
+def bias_sweep(model: str, w, v_a0, const: dict, steps: int = SWEEP_STEPS, span: float = SWEEP_SPAN):
+    """
+    Configurações do lote 2: v_a0 (S, neurônios) é Va medido com os pots atuais;
+    o bias de cada neurônio varre +- span em torno do Va da linha mais longe dos
+    trilhos (onde a varredura certamente cruza o limiar).
+    No 3N, os ocultos varrem juntos com N3 parado, depois N3 varre com os ocultos
+    nos pots atuais (a entrada de N3 não muda durante a sua varredura).
+    """
+    w = np.asarray(w, dtype=float)
+    layers = layer_constants(const, model)
+    lo, hi = weight_bounds(model, const)
+    delta = np.linspace(-span, span, steps)
+    groups = [(0,)] if model == "1N" else [(0, 1), (2,)]
+    configs = []
+    for group in groups:
+        sweep = np.repeat(w[None], steps, axis=0)
+        for k in group:
+            v_sat = layers[k][3]
+            center = v_a0[np.argmin(np.abs(v_a0[:, k] - v_sat / 2)), k]
+            bias = (center + delta) / layers[k][1]
+            if model == "1N":
+                sweep[:, 2] = bias
+            else:
+                sweep[:, k, 2] = bias
+        configs.append(sweep)
+    return np.clip(np.concatenate(configs), lo, hi)
+
+def fit_comparator(model: str, configs, v_a, out, const: dict):
+    """
+    Offset do comparador por neurônio: o limiar c em que out = (Va - Vbias > c)
+    erra menos pontos (no meio do intervalo de empate).
+    """
+    layers = layer_constants(const, model)
+    fit = []
+    for k in range(len(layers)):
+        v_supply, v_sat = layers[k][1], layers[k][3]
+        d = (v_a[..., k] - np.clip(_pots(model, configs, k)[:, 2, None] * v_supply, 0.0, v_sat)).ravel()
+        o = out[..., k].ravel() > 0.5
+        order = np.argsort(d)
+        d, o = d[order], o[order]
+        # Limiar entre d[i-1] e d[i]: erros = uns abaixo + zeros acima
+        errors = np.concatenate([[0], np.cumsum(o)]) + np.concatenate([np.cumsum((~o)[::-1])[::-1], [0]])
+        best = np.flatnonzero(errors == errors.min())
+        edges = np.concatenate([[d[0] - 1e-3], (d[1:] + d[:-1]) / 2, [d[-1] + 1e-3]])
+        fit.append(float(edges[best].mean()))
+    return fit
+
+def board_constants(model: str, const: dict, amplifier, comparator) -> dict:
+    # Constantes da placa: nominais + GAIN_Nk / OFFSET_Nk / CMP_Nk ajustados
+    board = dict(const)
+    for name, (gain, offset), cmp_offset in zip(NEURONS[model], amplifier, comparator):
+        board[f"GAIN_{name}"] = gain
+        board[f"OFFSET_{name}"] = offset
+        board[f"CMP_{name}"] = cmp_offset
+    return board
+
+def retrain(model: str, w, targets, board: dict, restarts: int = 32, epochs: int = 5000, margem: float = 0.3, seed=None):
+    """
+    Retreino incremental com o modelo da placa. Se os pots atuais já passam da
+    margem, ficam como estão; senão o restart 0 parte deles e, entre os que
+    passam da margem, fica o que menos mexe nos pots (maior |dw|). Sem nenhum,
+    avisa e fica o de maior margem.
+    """
+    w = np.asarray(w, dtype=float)
+    _, margin = evaluate(model, w[None], targets, board)
+    if margin[0] >= margem:
+        return w, float(margin[0])
+    w_new, _ = train_batch(model, targets, board, restarts=restarts, epochs=epochs, seed=seed, init=w, margem=margem)
+    _, margin = evaluate(model, w_new, targets, board)
+    moved = np.abs(w_new - w).reshape(restarts, -1).max(axis=-1)
+    ok = margin >= margem
+    if ok.any():
+        best = int(np.argmin(np.where(ok, moved, np.inf)))
+    else:
+        best = int(np.argmax(margin))
+        warnings.warn(f"Nenhum restart passou da margem de {margem:.2f}V no modelo da placa; "
+                      f"usando o de maior margem ({margin[best]:.2f}V)", RuntimeWarning)
+    return w_new[best], float(margin[best])
+
+def board_errors(board: Transport, w, targets, samples: int = SAMPLES) -> int:
+    # Linhas erradas medidas na placa (saída do último neurônio)
+    _, out = board.measure(np.asarray(w, dtype=float)[None], ALL_ROWS, samples)
+    return int((out[0, :, -1] != np.asarray(targets)).sum())
+
+def calibrate(board: Transport, w, targets, const=None, samples: int = SAMPLES, restarts: int = 32,
+              epochs: int = 5000, seed=None) -> dict:
+    """
+    Calibração completa de uma placa: dois lotes de medida, ajuste dos desvios e
+    retreino. Retorna dict com "const" (constantes da placa), "w" (pots novos),
+    "margem" (no modelo da placa), "erros" (medidos com os pots novos) e
+    "tempo" (s) de medida + ajuste + retreino.
+    """
+    model = board.model
+    const = dict(const or default_constants(model))
+    t0 = time.perf_counter()
+
+    configs = probe_configs(model, w, const, seed=seed)
+    v_a, out = board.measure(configs, ALL_ROWS, samples)
+    amplifier = fit_amplifier(model, configs, ALL_ROWS, v_a, out, const)
+
+    sweep = bias_sweep(model, w, v_a[0], const)
+    v_a2, out2 = board.measure(sweep, ALL_ROWS, samples)
+    comparator = fit_comparator(model, sweep, v_a2, out2, const)
+
+    fitted = board_constants(model, const, amplifier, comparator)
+    w_new, margin = retrain(model, w, targets, fitted, restarts, epochs, seed=seed)
+    elapsed = time.perf_counter() - t0
+    return {"const": fitted, "w": w_new, "margem": margin, "erros": board_errors(board, w_new, targets, samples),
+            "tempo": elapsed}
+
+def print_fit(model: str, fitted: dict, true=None):
+    # Desvios ajustados por neurônio (e os verdadeiros, na placa simulada)
+    print(f"{'Neurônio':<9} {'Ganho':>7} {'Offset Va':>10} {'Offset comp.':>13}")
+    for name in NEURONS[model]:
+        keys = (f"GAIN_{name}", f"OFFSET_{name}", f"CMP_{name}")
+        print(f"{name:<9} {fitted[keys[0]]:7.3f} {fitted[keys[1]] * 1e3:8.1f}mV {fitted[keys[2]] * 1e3:11.1f}mV")
+        if true is not None:
+            print(f"{'  real':<9} {true[keys[0]]:7.3f} {true[keys[1]] * 1e3:8.1f}mV {true[keys[2]] * 1e3:11.1f}mV")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibração com a placa no laço e retreino incremental dos pots")
+    parser.add_argument("--model", choices=["1N", "3N"], default="3N")
+    parser.add_argument("--table", default="0110")
+    parser.add_argument("--port", default=None, help="Porta serial da placa (sem ela, usa a placa simulada)")
+    parser.add_argument("--baud", type=int, default=115200)
+    parser.add_argument("--noise", type=float, default=0.01, help="Ruído de leitura da placa simulada (V)")
+    parser.add_argument("--samples", type=int, default=SAMPLES)
+    parser.add_argument("--restarts", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    targets = table_targets(args.table)
+    w, _ = train_batch(args.model, targets, restarts=args.restarts, epochs=args.epochs, seed=args.seed)
+    _, margin = evaluate(args.model, w, targets)
+    w = w[np.argmax(margin)]
+
+    board = (SerialTransport(args.port, args.model, args.baud) if args.port
+             else SimulatedBoard(args.model, noise=args.noise, seed=args.seed))
+    try:
+        print(f"{args.table} {KNOWN_GATES.get(args.table, '')}: solução nominal com margem {margin.max():.2f}V, "
+              f"{board_errors(board, w, targets, args.samples)} linha(s) erradas na placa")
+        result = calibrate(board, w, targets, samples=args.samples, restarts=args.restarts, epochs=args.epochs,
+                           seed=args.seed)
+    finally:
+        board.close()
+
+    print()
+    print_fit(args.model, result["const"], board.const if isinstance(board, SimulatedBoard) else None)
+    print(f"\nPots retreinados (margem {result['margem']:.2f}V no modelo da placa, "
+          f"reajuste máximo {np.abs(result['w'] - w).max() * 100:.1f}% do curso):")
+    print(np.round(result["w"], 3))
+    print(f"Placa com os pots novos: {result['erros']} linha(s) erradas; calibração em {result['tempo']:.2f}s")
@@ -0,0 +1,286 @@
+"""
+Teste diferencial: a mesma física por caminhos diferentes, em milhares de
+posições de pots sorteadas, com o desvio máximo de cada nó.
+
+Referência: o modelo escalar dos scripts (forward_pass no 1N,
+HardwareNeuron.forward no 3N), carregado direto dos arquivos em MSE/.
+Caminhos comparados contra ela (registro PATHS):
+    scripts  -> a mesma função dos scripts em Hinge Loss/ (cópias que não podem divergir)
+    model    -> analogica.model.forward (vetorizado)
+    autodiff -> analogica.autodiff.forward (o grafo usado no treino)
+    grade    -> model.forward com as constantes no eixo de broadcast (G, 1, 1) da varredura
+Opcional (--spice): ponto de operação no ngspice local, com o LM324 do
+ltspice/ e a topologia dos .asc (pots como fontes, chaves SW, 100k/220k).
+O SPICE tem AmpOp real (saturação e offset do macromodelo), então o desvio
+é informativo e não entra no critério de aprovação.
+
+Nós por neurônio: Va, Vbias, n (divisor) e out (saída lógica: linhas trocadas).
+Sai com código 1 se algum caminho passar de --tol, para barrar mudanças de
+desempenho que alterem a física.
+
+Uso:
+    python -m analogica.difftest --model 1N --count 5000
+    python -m analogica.difftest --model 3N --count 5000 --spice --spice-count 64
+"""
+import argparse
+import importlib.util
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from . import autodiff as ad
+from .ltspice import LM324_LIB
+from .model import INPUTS, NEURONS, default_constants, forward, weight_bounds
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS = {
+    "1N": (os.path.join(ROOT, "MSE", "PerceptronMSE.py"), os.path.join(ROOT, "Hinge Loss", "Perceptron_Hinge.py")),
+    "3N": (os.path.join(ROOT, "MSE", "Perceptron3N_MSE.py"), os.path.join(ROOT, "Hinge Loss", "Perceptron3N_Hinge.py")),
+}
+NODES = ("Va", "Vbias", "n", "out")
+EDGE_FRACTION = 0.1  # Fração das configurações com pots nas pontas (0, 1 e limite do bias)
+SPICE_CHUNK = 32     # Instâncias (configuração x linha) por netlist do ngspice
+
+def load_script(path: str):
+    # Importa um script pelo caminho (o bloco __main__ não roda)
+    name = "ref_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def script_constants(module, model: str) -> dict:
+    # Constantes do script no formato de analogica.model (sem MARGEM)
+    const = module.circuit_constants()
+    return {k: float(const[k]) for k in default_constants(model)}
+
+def random_weights(model: str, count: int, const: dict, seed=None):
+    """
+    Pots uniformes dentro dos limites físicos; EDGE_FRACTION das configurações
+    tem cada pot com 1/2 de chance de ir para uma ponta (exercita os clips).
+    """
+    rng = np.random.default_rng(seed)
+    lo, hi = weight_bounds(model, const)
+    shape = (count, 3) if model == "1N" else (count, 3, 3)
+    w = rng.uniform(0.0, 1.0, shape) * hi
+    edge = (rng.uniform(size=shape) < 0.5) & (rng.uniform(size=(count,) + (1,) * (len(shape) - 1)) < EDGE_FRACTION)
+    return np.where(edge, np.where(rng.uniform(size=shape) < 0.5, lo, hi), w)
+
+def _stack(res):
+    # Lista de neurônios com (v_a, v_bias, n, out) -> dict nó -> (C, S, neurônios)
+    values = [[np.asarray(getattr(v, "value", v), dtype=float) for v in neuron] for neuron in res]
+    shape = values[0][0].shape  # n do 1N vem só com o eixo S
+    return {node: np.stack([np.broadcast_to(neuron[k], shape) for neuron in values], axis=-1)
+            for k, node in enumerate(NODES)}
+
+def scalar_forward(module, model: str, w) -> dict:
+    """
+    Referência escalar: chama a função dos scripts configuração por
+    configuração, linha por linha. Retorna nó -> (C, S, neurônios).
+    """
+    w = np.asarray(w, dtype=float)
+    out = {node: np.zeros((len(w), len(INPUTS), len(NEURONS[model]))) for node in NODES}
+    rows = [(int(x1), int(x2)) for x1, x2 in INPUTS]
+    if model == "1N":
+        for c, (w1, w2, wb) in enumerate(w.tolist()):
+            for s, (x1, x2) in enumerate(rows):
+                for node, v in zip(NODES, module.forward_pass(w1, w2, wb, x1, x2)):
+                    out[node][c, s, 0] = v
+        return out
+
+    layers = [(module.L1_SIGNAL, module.L1_VCC, module.L1_REF, module.L1_SAT)] * 2
+    layers.append((module.L2_SIGNAL, module.L2_VCC, module.L2_REF, module.L2_SAT))
+    neurons = [module.HardwareNeuron(name, *layer) for name, layer in zip(NEURONS[model], layers)]
+    for c, config in enumerate(w.tolist()):
+        for neuron, (w1, w2, wb) in zip(neurons, config):
+            neuron.w1, neuron.w2, neuron.w_bias = w1, w2, wb
+        for s, (x1, x2) in enumerate(rows):
+            o1 = neurons[0].forward(x1, x2)
+            o2 = neurons[1].forward(x1, x2)
+            neurons[2].forward(o1, o2)
+            for k, neuron in enumerate(neurons):
+                for node, v in zip(NODES, (neuron.last_va, neuron.last_bias_v, neuron.last_n, neuron.last_out_logic)):
+                    out[node][c, s, k] = v
+    return out
+
+def _model_path(model, w, const):
+    return _stack(forward(model, w, const))
+
+def _autodiff_path(model, w, const):
+    return _stack(ad.forward(model, ad.variable(w), const))
+
+def _grid_path(model, w, const):
+    grid = {name: np.full((1, 1, 1), value) for name, value in const.items()}
+    return {node: v[0] for node, v in _stack(forward(model, w[None], grid)).items()}
+
+# Caminho novo: função (model, w, const) -> nó -> (C, S, neurônios)
+PATHS = {"model": _model_path, "autodiff": _autodiff_path, "grade": _grid_path}
+
+def deviations(ref: dict, other: dict) -> dict:
+    """
+    Desvio máximo por nó e neurônio, ex: {"N1.Va": 0.0, ..., "N3.out": 2}.
+    Em out conta linhas com saída lógica diferente em vez do desvio.
+    """
+    result = {}
+    names = NEURONS["1N" if ref["Va"].shape[-1] == 1 else "3N"]
+    for node in NODES:
+        diff = np.abs(ref[node] - other[node])
+        for k, name in enumerate(names):
+            d = diff[..., k]
+            result[f"{name}.{node}"] = int((d > 0.5).sum()) if node == "out" else float(d.max())
+    return result
+
+def _spice_neuron(p: str, sig1, sig2, sw1, sw2, w, v_signal, v_supply, ref, vcc, pot_fed: bool):
+    """
+    Netlist de um neurônio (prefixo p): chaves SW em série com 100k até o nó
+    somador, 100k da referência, amplificador não inversor 220k/100k e
+    comparador. pot_fed: pesos como pots de 10k alimentados por sig1/sig2
+    (N3, ligado aos ocultos); senão fontes ideais w * v_signal (como nos .asc).
+    """
+    lines = []
+    for j, (sig, sw) in enumerate(((sig1, sw1), (sig2, sw2)), start=1):
+        if pot_fed:
+            top = max(1e-3, (1.0 - w[j - 1]) * 10e3)
+            bottom = max(1e-3, w[j - 1] * 10e3)
+            lines += [f"R{p}pt{j} {sig} {p}wp{j} {top:.6g}", f"R{p}pb{j} {p}wp{j} 0 {bottom:.6g}"]
+        else:
+            lines.append(f"V{p}w{j} {p}wp{j} 0 {w[j - 1] * v_signal:.9g}")
+        lines += [f"S{p}{j} {p}wp{j} {p}sw{j} {sw} 0 sw", f"R{p}in{j} {p}sw{j} {p}sum 100k"]
+    lines += [
+        f"R{p}ref {ref} {p}sum 100k",
+        f"X{p}amp {p}sum {p}neg {vcc} 0 {p}va LM324",
+        f"R{p}fb {p}va {p}neg 220k",
+        f"R{p}g {p}neg {ref} 100k",
+        f"V{p}b {p}vb 0 {w[2] * v_supply:.9g}",
+        f"X{p}cmp {p}va {p}vb {vcc} 0 {p}out LM324",
+    ]
+    return lines
+
+def _spice_instance(i: int, model: str, w, x1: int, x2: int, const: dict):
+    # Uma linha da tabela para uma configuração: alimentação, referências e neurônios
+    p = f"i{i}"
+    if model == "1N":
+        lines = [f"V{p}cc {p}vcc 0 {const['V_PLUS']:.9g}",
+                 f"V{p}x1 {p}x1 0 {5 * x1}", f"V{p}x2 {p}x2 0 {5 * x2}",
+                 f"R{p}d1 {p}vcc {p}div 1k", f"R{p}d2 {p}div 0 1k",
+                 f"X{p}buf {p}div {p}ref {p}vcc 0 {p}ref LM324"]
+        lines += _spice_neuron(f"{p}n1", None, None, f"{p}x1", f"{p}x2", w, const["V_PLUS"], const["V_PLUS"],
+                               f"{p}ref", f"{p}vcc", False)
+        return lines, [f"{p}n1"]
+    lines = [f"V{p}c1 {p}vc1 0 {const['L1_VCC']:.9g}", f"V{p}c2 {p}vc2 0 {const['L2_VCC']:.9g}",
+             f"V{p}x1 {p}x1 0 {5 * x1}", f"V{p}x2 {p}x2 0 {5 * x2}"]
+    for layer, vcc in (("1", f"{p}vc1"), ("2", f"{p}vc2")):
+        lines += [f"R{p}d{layer}a {vcc} {p}div{layer} 1k", f"R{p}d{layer}b {p}div{layer} 0 1k",
+                  f"X{p}buf{layer} {p}div{layer} {p}ref{layer} {vcc} 0 {p}ref{layer} LM324"]
+    for k in range(2):
+        lines += _spice_neuron(f"{p}n{k + 1}", None, None, f"{p}x1", f"{p}x2", w[k], const["L1_SIGNAL"],
+                               const["L1_VCC"], f"{p}ref1", f"{p}vc1", False)
+    lines += _spice_neuron(f"{p}n3", f"{p}n1out", f"{p}n2out", f"{p}n1out", f"{p}n2out", w[2], const["L2_SIGNAL"],
+                           const["L2_VCC"], f"{p}ref2", f"{p}vc2", True)
+    return lines, [f"{p}n1", f"{p}n2", f"{p}n3"]
+
+def spice_forward(model: str, w, const: dict, ngspice: str = "ngspice", chunk: int = SPICE_CHUNK) -> dict:
+    """
+    Ponto de operação de cada (configuração, linha) no ngspice, em netlists de
+    chunk instâncias independentes. Retorna nó -> (C, S, neurônios); n vem do
+    modelo (não é um nó do circuito).
+    """
+    w = np.asarray(w, dtype=float)
+    names = NEURONS[model]
+    out = {node: np.zeros((len(w), len(INPUTS), len(names))) for node in NODES}
+    out["n"] = _model_path(model, w, const)["n"]
+    jobs = [(c, s) for c in range(len(w)) for s in range(len(INPUTS))]
+    with tempfile.TemporaryDirectory() as tmp:
+        for start in range(0, len(jobs), chunk):
+            lines = ["* analogica.difftest", f".include \"{LM324_LIB}\"", ".model sw SW(Vt=2.5 Vh=0.2 Ron=10 Roff=10Meg)"]
+            prefixes = []
+            for i, (c, s) in enumerate(jobs[start:start + chunk]):
+                inst, neurons = _spice_instance(i, model, w[c], int(INPUTS[s, 0]), int(INPUTS[s, 1]), const)
+                lines += inst
+                prefixes.append(neurons)
+            probes = " ".join(f"v({n}va) v({n}vb) v({n}out)" for neurons in prefixes for n in neurons)
+            lines += [".control", "op", f"print {probes}", ".endc", ".end"]
+            path = os.path.join(tmp, "op.cir")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            run = subprocess.run([ngspice, "-b", path], capture_output=True, text=True, timeout=600)
+            values = {m.group(1).lower(): float(m.group(2))
+                      for m in re.finditer(r"^\s*(v\(\S+\))\s*=\s*([-+0-9.eE]+)", run.stdout, re.MULTILINE)}
+            for i, ((c, s), neurons) in enumerate(zip(jobs[start:start + chunk], prefixes)):
+                for k, n in enumerate(neurons):
+                    try:
+                        out["Va"][c, s, k] = values[f"v({n}va)"]
+                        out["Vbias"][c, s, k] = values[f"v({n}vb)"]
+                        out["out"][c, s, k] = values[f"v({n}out)"] > 2.5
+                    except KeyError:
+                        raise RuntimeError(f"ngspice não devolveu os nós de {n}:\n{run.stdout[-2000:]}{run.stderr[-2000:]}")
+    return out
+
+def run_difftest(model: str, count: int = 5000, seed: int = 0, spice: str = None, spice_count: int = 64) -> dict:
+    """
+    Roda todos os caminhos contra a referência escalar.
+    Retorna {caminho: {"desvios": nó -> desvio, "tempo": s}}, com a própria
+    referência em "escalar" (só o tempo).
+    """
+    reference, *others = [load_script(path) for path in SCRIPTS[model]]
+    const = script_constants(reference, model)
+    w = random_weights(model, count, const, seed)
+
+    t0 = time.perf_counter()
+    ref = scalar_forward(reference, model, w)
+    report = {"escalar": {"desvios": {}, "tempo": time.perf_counter() - t0}}
+    paths = {"scripts": lambda m, w, c: scalar_forward(others[0], m, w)} if others else {}
+    paths.update(PATHS)
+    for name, fn in paths.items():
+        t0 = time.perf_counter()
+        values = fn(model, w, const)
+        report[name] = {"desvios": deviations(ref, values), "tempo": time.perf_counter() - t0}
+
+    if spice:
+        sub = slice(0, min(spice_count, count))
+        t0 = time.perf_counter()
+        values = spice_forward(model, w[sub], const, spice)
+        report["spice"] = {"desvios": deviations({k: v[sub] for k, v in ref.items()}, values),
+                           "tempo": time.perf_counter() - t0}
+    return report
+
+def print_report(report: dict, tol: float) -> bool:
+    # Tabela caminho x nó; retorna True se todos os caminhos (menos o SPICE) passaram
+    nodes = next(iter(r["desvios"] for r in report.values() if r["desvios"]))
+    ok = True
+    print(f"{'Caminho':<10} {'Tempo':>8}  " + " ".join(f"{n:>10}" for n in nodes))
+    for name, r in report.items():
+        if not r["desvios"]:
+            print(f"{name:<10} {r['tempo']:7.3f}s  (referência)")
+            continue
+        cols = []
+        for node, d in r["desvios"].items():
+            cols.append(f"{d:>10d}" if node.endswith(".out") else f"{d:10.2e}")
+            if name != "spice" and (d > tol if not node.endswith(".out") else d > 0):
+                ok = False
+        print(f"{name:<10} {r['tempo']:7.3f}s  " + " ".join(cols))
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste diferencial: modelo escalar dos scripts vs caminhos vetorizados (e SPICE)")
+    parser.add_argument("--model", choices=["1N", "3N"], default="1N")
+    parser.add_argument("--count", type=int, default=5000, help="Configurações de pots sorteadas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tol", type=float, default=1e-9, help="Desvio máximo aceito nas tensões (V)")
+    parser.add_argument("--spice", nargs="?", const="ngspice", default=None, help="Roda também no ngspice (caminho opcional)")
+    parser.add_argument("--spice-count", type=int, default=64, help="Configurações enviadas ao ngspice")
+    args = parser.parse_args()
+
+    if args.spice and shutil.which(args.spice) is None:
+        sys.exit(f"ngspice não encontrado: {args.spice}")
+    report = run_difftest(args.model, args.count, args.seed, args.spice, args.spice_count)
+    ok = print_report(report, args.tol)
+    print(f"\n{'OK' if ok else 'FALHOU'}: {args.count} configurações x {len(INPUTS)} linhas, tolerância {args.tol:g}V"
+          + (" (SPICE só informativo)" if args.spice else ""))
+    sys.exit(0 if ok else 1)
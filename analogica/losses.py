@@ -0,0 +1,90 @@
+"""
+Registro de funções de perda para os treinadores vetorizados.
+
+Cada perda recebe z = Va - Vbias da saída, com shape (..., R, S), o alvo
+bipolar y_sign (+1/-1) e a margem, e fornece:
+    value(z, y_sign, margem) -> perda por linha (..., R, S)
+    grad(z, y_sign, margem)  -> dL/dz por linha (..., R, S)
+O resto do caminho até os pesos vem do autodiff (ou da regra manual).
+
+Perdas registradas:
+    "hinge"   -> max(0, margem - y*z)                    (Hinge Loss/)
+    "mse"     -> (alvo - sigmoid(z - y*margem))^2, zerada quando y*z passa da margem (MSE/)
+    "logloss" -> log(1 + exp(margem - y*z))               (Cross-Entropy com margem)
+
+Perda nova: herdar de Loss, implementar value/grad e chamar register_loss.
+"""
+import numpy as np
+
+from . import autodiff as ad
+
+LOSSES = {}
+
+def _sigmoid(x):
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+class Loss:
+    name = None
+
+    def value(self, z, y_sign, margem):
+        raise NotImplementedError
+
+    def grad(self, z, y_sign, margem):
+        raise NotImplementedError
+
+class HingeLoss(Loss):
+    name = "hinge"
+
+    def value(self, z, y_sign, margem):
+        return np.maximum(margem - y_sign * z, 0.0)
+
+    def grad(self, z, y_sign, margem):
+        # dL/dz = -y_sign só nas linhas que violam a margem
+        return np.where(margem - y_sign * z > 0, -y_sign, 0.0)
+
+class ShiftedSigmoidMSE(Loss):
+    name = "mse"
+
+    def value(self, z, y_sign, margem):
+        target = (y_sign + 1.0) / 2
+        err = target - _sigmoid(z - y_sign * margem)
+        return np.where(y_sign * z > margem, 0.0, err ** 2)
+
+    def grad(self, z, y_sign, margem):
+        # delta = -2 * erro * sigmoid'(z_shifted), como nos scripts da pasta MSE/
+        target = (y_sign + 1.0) / 2
+        s = _sigmoid(z - y_sign * margem)
+        return np.where(y_sign * z > margem, 0.0, -2.0 * (target - s) * s * (1 - s))
+
+class LogLoss(Loss):
+    name = "logloss"
+
+    def value(self, z, y_sign, margem):
+        return np.logaddexp(0.0, margem - y_sign * z)
+
+    def grad(self, z, y_sign, margem):
+        return -y_sign * _sigmoid(margem - y_sign * z)
+
+def register_loss(loss: Loss):
+    LOSSES[loss.name] = loss
+    return loss
+
+def get_loss(loss):
+    # Aceita o nome registrado ou uma instância de Loss
+    if isinstance(loss, Loss):
+        return loss
+    if loss not in LOSSES:
+        raise ValueError(f"Perda desconhecida: {loss} (disponíveis: {', '.join(sorted(LOSSES))})")
+    return LOSSES[loss]
+
+def loss_graph(loss, z, y_sign, margem):
+    """
+    Nó do autodiff para a perda: valor e gradiente vêm da entrada do registro.
+    z é um Tensor (..., R, S); retorna a perda por linha como Tensor.
+    """
+    loss = get_loss(loss)
+    zv = z.value
+    return ad.Tensor(loss.value(zv, y_sign, margem), (z,), lambda g: (g * loss.grad(zv, y_sign, margem),))
+
+for _loss in (HingeLoss(), ShiftedSigmoidMSE(), LogLoss()):
+    register_loss(_loss)
@@ -0,0 +1,69 @@
+"""
+Leitura dos arquivos do LTspice que acompanham o projeto (pasta ltspice/).
+
+.lib: elementos de um .SUBCKT (nome -> tokens da linha), com os valores no
+formato do SPICE ("5.544E-12", "10k", "1Meg") convertidos por spice_value.
+
+.raw binário: cabeçalho em UTF-16 terminado por "Binary:", depois um registro
+por ponto com o tempo em float64 e as demais variáveis em float32. O LTspice
+usa o sinal do tempo como marcador interno, por isso o tempo vem em módulo.
+"""
+import os
+
+import numpy as np
+
+LTSPICE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ltspice")
+LM324_LIB = os.path.join(LTSPICE_DIR, "LM324.ti.lib")
+
+def spice_value(text: str) -> float:
+    # "5.544E-12", "100.0E3", "10k", "1Meg" -> float
+    text = text.strip().lower()
+    for suffix, scale in (("meg", 1e6), ("t", 1e12), ("g", 1e9), ("k", 1e3), ("m", 1e-3),
+                          ("u", 1e-6), ("n", 1e-9), ("p", 1e-12), ("f", 1e-15)):
+        if text.endswith(suffix) and not text.endswith("e" + suffix):
+            try:
+                return float(text[:-len(suffix)]) * scale
+            except ValueError:
+                break
+    return float(text)
+
+def read_subckt(path: str = LM324_LIB) -> dict:
+    # Elementos do .lib: "C1" -> ["C1", "11", "12", "5.544E-12"] (comentários e diretivas ignorados)
+    elements = {}
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            tokens = line.split()
+            if tokens and not tokens[0].startswith(("*", ".")):
+                elements[tokens[0].upper()] = tokens
+    return elements
+
+def read_raw(path: str):
+    """
+    Retorna (header, data): header com os campos do cabeçalho ("Plotname",
+    "No. Points"...) e data com nome da variável -> array, ex: data["V(sw1)"].
+    Só lê arquivos binários de análise transitória (tempo em float64).
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    marker = "Binary:\n".encode("utf-16-le")
+    start = raw.find(marker)
+    if start < 0:
+        raise ValueError(f"{path}: não é um .raw binário do LTspice")
+    lines = raw[:start].decode("utf-16-le").splitlines()
+
+    header, names = {}, []
+    for k, line in enumerate(lines):
+        if line.startswith("Variables:"):
+            names = [entry.split("\t")[2] for entry in lines[k + 1:] if entry.startswith("\t")]
+            break
+        key, _, value = line.partition(":")
+        header[key.strip()] = value.strip()
+
+    points = int(header["No. Points"])
+    record = np.dtype([("time", "<f8"), ("values", "<f4", (len(names) - 1,))])
+    rows = np.frombuffer(raw, record, count=points, offset=start + len(marker))
+
+    data = {names[0]: np.abs(rows["time"])}
+    for k, name in enumerate(names[1:]):
+        data[name] = rows["values"][:, k].astype(float)
+    return header, data
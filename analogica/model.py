@@ -0,0 +1,160 @@
+"""
+Modelo vetorizado (NumPy) dos neurônios analógicos.
+
+Mesma física de forward_pass (1N) e HardwareNeuron.forward (3N), mas avaliando
+uma população inteira de pesos (restarts) contra todas as linhas da tabela de
+uma vez. Formatos usados em todo o pacote:
+    1N -> w com shape (..., R, 3)      [w1, w2, w_bias]
+    3N -> w com shape (..., R, 3, 3)   [N1, N2, N3] x [w1, w2, w_bias]
+    saídas por linha da tabela -> (..., R, S), S = 4
+
+As constantes do circuito podem ser escalares ou arrays com shape (G, 1, 1):
+nesse caso viram um eixo extra de broadcast (grade de GAIN, saturação...).
+Chaves opcionais por neurônio (GAIN_N1, OFFSET_N1, CMP_N1...) descrevem uma
+placa calibrada (analogica.calibration); sem elas vale o circuito nominal.
+"""
+import numpy as np
+
+# Ordem das linhas da tabela verdade usada em todo o projeto: (0,0), (1,0), (0,1), (1,1)
+INPUTS = np.array([[0, 0], [1, 0], [0, 1], [1, 1]], dtype=float)
+
+# Mesmos valores dos scripts em MSE/ e Hinge Loss/
+DEFAULT_1N = {"GAIN": 3.2, "V_PLUS": 9.0, "V_REF": 4.5, "V_SAT": 7.5}
+DEFAULT_3N = {
+    "GAIN": 3.2,
+    "L1_VCC": 9.0, "L1_SIGNAL": 9.0, "L1_REF": 4.5, "L1_SAT": 7.5,
+    "L2_VCC": 7.5, "L2_SIGNAL": 7.5, "L2_REF": 3.75, "L2_SAT": 6.0,
+}
+
+# Identificação de portas conhecidas (Baseado na ordem 00, 10, 01, 11)
+KNOWN_GATES = {
+    "0001": "AND", "0111": "OR", "1110": "NAND", "1000": "NOR",
+    "0110": "XOR", "1001": "XNOR",
+    "0100": "INHIBIT A", "0010": "INHIBIT B",
+}
+
+# Nome de cada neurônio, na ordem de forward()
+NEURONS = {"1N": ("N1",), "3N": ("N1", "N2", "N3")}
+
+def default_constants(model: str) -> dict:
+    return dict(DEFAULT_1N if model == "1N" else DEFAULT_3N)
+
+def table_targets(table: str) -> np.ndarray:
+    # "0110" -> array([0., 1., 1., 0.]) na ordem de INPUTS
+    return np.array([int(c) for c in table], dtype=float)
+
+def layer_constants(const: dict, model: str):
+    """
+    Constantes de cada neurônio como (v_signal, v_supply, v_ref, v_sat).
+    1N: um neurônio alimentado por V_PLUS (V_MINUS = 0).
+    3N: (camada 1, camada 1, camada 2).
+    """
+    if model == "1N":
+        return [(const["V_PLUS"], const["V_PLUS"], const["V_REF"], const["V_SAT"])]
+    l1 = (const["L1_SIGNAL"], const["L1_VCC"], const["L1_REF"], const["L1_SAT"])
+    l2 = (const["L2_SIGNAL"], const["L2_VCC"], const["L2_REF"], const["L2_SAT"])
+    return [l1, l1, l2]
+
+def neuron_calibration(const: dict, model: str):
+    """
+    (gain, offset, cmp_offset) de cada neurônio:
+      GAIN_Nk   -> ganho real do amplificador (padrão: GAIN)
+      OFFSET_Nk -> offset somado a Va (V)
+      CMP_Nk    -> offset do comparador, somado ao limiar do bias (V)
+    """
+    return [(const.get(f"GAIN_{name}", const["GAIN"]), const.get(f"OFFSET_{name}", 0.0), const.get(f"CMP_{name}", 0.0))
+            for name in NEURONS[model]]
+
+def neuron(w1, w2, w_bias, x1, x2, v_signal, v_supply, v_ref, v_sat, gain, offset=0.0, cmp_offset=0.0):
+    """
+    Um neurônio (divisor + AmpOp + comparador) para arrays que fazem broadcast.
+    Retorna v_a, v_bias, n (divisor) e a saída lógica (0.0/1.0).
+    offset/cmp_offset: desvios de uma placa real (zero no circuito nominal).
+    """
+    # 1. Divisor de Tensão Variável (R_ref sempre conectado, R1/R2 conforme as chaves)
+    n = 1.0 + x1 + x2
+    v_in = (v_ref + x1 * (w1 * v_signal) + x2 * (w2 * v_signal)) / n
+
+    # 2. Amplificação com saturação
+    v_a = np.clip(v_ref + gain * (v_in - v_ref) + offset, 0.0, v_sat)
+
+    # 3. Comparador (bias também limitado pela saturação; o offset do comparador desloca o limiar)
+    v_bias = np.clip(w_bias * v_supply, 0.0, v_sat) + cmp_offset
+    # Saída no mesmo dtype de Va: uma população em float32 não volta para float64 na camada 2
+    out = (v_a > v_bias).astype(v_a.dtype)
+    return v_a, v_bias, n, out
+
+def forward_1n(w, const=DEFAULT_1N, inputs=INPUTS):
+    # w: (..., R, 3) -> (v_a, v_bias, n, out), cada um (..., R, S)
+    v_signal, v_supply, v_ref, v_sat = layer_constants(const, "1N")[0]
+    x1, x2 = inputs[:, 0], inputs[:, 1]
+    return neuron(w[..., 0, None], w[..., 1, None], w[..., 2, None], x1, x2,
+                  v_signal, v_supply, v_ref, v_sat, *neuron_calibration(const, "1N")[0])
+
+def forward_3n(w, const=DEFAULT_3N, inputs=INPUTS):
+    # w: (..., R, 3, 3) -> lista com (v_a, v_bias, n, out) de N1, N2 e N3
+    layers = layer_constants(const, "3N")
+    calib = neuron_calibration(const, "3N")
+    x1, x2 = inputs[:, 0], inputs[:, 1]
+    res = []
+    for k in range(2):
+        wk = w[..., k, :]
+        res.append(neuron(wk[..., 0, None], wk[..., 1, None], wk[..., 2, None], x1, x2, *layers[k], *calib[k]))
+    w3 = w[..., 2, :]
+    res.append(neuron(w3[..., 0, None], w3[..., 1, None], w3[..., 2, None], res[0][3], res[1][3], *layers[2], *calib[2]))
+    return res
+
+def forward(model: str, w, const=None, inputs=INPUTS):
+    # Saídas de todos os neurônios como lista (1 elemento no 1N, 3 no 3N)
+    if const is None:
+        const = default_constants(model)
+    if model == "1N":
+        return [forward_1n(w, const, inputs)]
+    return forward_3n(w, const, inputs)
+
+def evaluate(model: str, w, targets, const=None):
+    """
+    Avalia a população inteira.
+    Retorna (erros, margem), ambos (..., R):
+      erros  -> linhas da tabela com saída errada
+      margem -> menor y_sign * (Va - Vbias) da saída; no 3N também limitada pela
+                menor |Va - Vbias| dos ocultos (como no teste do Perceptron3N_MSE).
+                Só é positiva se todas as linhas estão certas.
+    """
+    res = forward(model, w, const)
+    y_sign = 2.0 * np.asarray(targets) - 1.0
+    v_a, v_bias, _, out = res[-1]
+    errors = (out != targets).sum(axis=-1)
+    margin = (y_sign * (v_a - v_bias)).min(axis=-1)
+    for v_a_h, v_bias_h, _, _ in res[:-1]:
+        margin = np.minimum(margin, np.abs(v_a_h - v_bias_h).min(axis=-1))
+    return errors, margin
+
+def weight_shape(model: str, const: dict, restarts: int):
+    """
+    Shape da população de pesos: eixos de broadcast das constantes
+    (tudo menos os dois últimos eixos, que são R e S) + (R, 3) ou (R, 3, 3).
+    """
+    lead = np.broadcast_shapes(*(np.shape(v) for v in const.values()))[:-2]
+    return tuple(lead) + (restarts, 3) + ((3,) if model == "3N" else ())
+
+def weight_bounds(model: str, const: dict):
+    """
+    Limites físicos dos pesos (mesma regra dos scripts Hinge):
+    w1, w2 em [0, 1] e w_bias em [0, v_sat / v_supply].
+    Retorna (lo, hi) que fazem broadcast com a população.
+    """
+    his = []
+    for _, v_supply, _, v_sat in layer_constants(const, model):
+        bias_hi = np.asarray(v_sat / v_supply, dtype=float)
+        # Constantes em grade vêm como (G, 1, 1): descarta o eixo S e mantém o eixo R
+        if bias_hi.ndim >= 2:
+            bias_hi = bias_hi[..., 0]
+        his.append(bias_hi)
+    his = np.broadcast_arrays(*his)
+    hi = np.ones(his[0].shape + (len(his), 3))
+    for k, bias_hi in enumerate(his):
+        hi[..., k, 2] = bias_hi
+    if model == "1N":
+        hi = hi[..., 0, :]
+    return 0.0, hi
@@ -0,0 +1,202 @@
+"""
+Busca aleatória com milhões (ou bilhões) de configurações de pots, sem
+guardar objetos HardwareNeuron: cada configuração é um registro de um array
+estruturado em float32.
+
+Registro (record_dtype):
+    w      -> pots no formato do modelo, (3,) no 1N e (3, 3) no 3N, float32
+    margin -> margem de cada linha da tabela, (S,) float32 (a mesma regra de
+              evaluate, sem o min entre as linhas)
+    errors -> linhas erradas, uint8
+São 53 bytes por configuração no 3N, contra centenas de bytes por neurônio em
+objetos Python. A população pode ficar na RAM ou em um .npy aberto com memmap
+(spill para o disco): só o bloco em avaliação passa pela memória.
+
+A RAM de pico é limitada por --max-ram: o tamanho do bloco sai do custo por
+configuração (registro + temporários do forward em float32, WORK_BYTES).
+Cada bloco é sorteado com a semente (seed, índice do bloco), então o
+resultado não depende do número de workers.
+
+Uso:
+    python -m analogica.population --model 3N --table 0110 --n 1e7
+    python -m analogica.population --model 3N --table 0110 --n 1e9 --out pop.npy --max-ram 512 --workers 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .model import INPUTS, KNOWN_GATES, default_constants, forward, table_targets, weight_bounds
+
+MAX_RAM = 256  # MiB por processo (bloco em avaliação)
+# Bytes de temporários por configuração no forward em float32 (medido com tracemalloc, com folga)
+WORK_BYTES = {"1N": 128, "3N": 384}
+INPUTS32 = INPUTS.astype(np.float32)
+
+def record_dtype(model: str) -> np.dtype:
+    shape = (3,) if model == "1N" else (3, 3)
+    return np.dtype([("w", np.float32, shape), ("margin", np.float32, (len(INPUTS),)), ("errors", np.uint8)])
+
+def chunk_size(model: str, max_ram: float = MAX_RAM) -> int:
+    # Configurações por bloco para caber em max_ram MiB
+    per_config = WORK_BYTES[model] + record_dtype(model).itemsize
+    return max(int(max_ram * (1 << 20)) // per_config, 1)
+
+def constants32(const: dict) -> dict:
+    # Constantes escalares em float32 (arrays de grade não fazem sentido aqui)
+    for name, value in const.items():
+        if np.ndim(value):
+            raise ValueError(f"A busca aleatória usa constantes escalares: {name} tem shape {np.shape(value)}")
+    return {name: np.float32(value) for name, value in const.items()}
+
+def row_margins(model: str, w, targets, const: dict):
+    """
+    Margem por linha (..., R, S) e erros (..., R): y_sign * (Va - Vbias) da
+    saída, limitada por |Va - Vbias| dos ocultos no 3N. O min em S é a
+    margem de evaluate.
+    """
+    res = forward(model, w, const, INPUTS32)
+    y_sign = (2.0 * np.asarray(targets) - 1.0).astype(w.dtype)
+    v_a, v_bias, _, out = res[-1]
+    margin = y_sign * (v_a - v_bias)
+    for v_a_h, v_bias_h, _, _ in res[:-1]:
+        np.minimum(margin, np.abs(v_a_h - v_bias_h), out=margin)
+    return margin, (out != targets).sum(axis=-1)
+
+def sample_weights(model: str, const: dict, size: int, rng):
+    # Pots sorteados uniformes dentro dos limites físicos, float32
+    _, hi = weight_bounds(model, const)
+    shape = (size, 3) + ((3,) if model == "3N" else ())
+    w = rng.random(shape, dtype=np.float32)
+    w *= np.asarray(hi, dtype=np.float32)
+    return w
+
+def fill_block(records, model: str, targets, const: dict, rng):
+    # Sorteia e avalia um bloco, escrevendo direto nos registros (RAM ou memmap)
+    w = sample_weights(model, const, len(records), rng)
+    margin, errors = row_margins(model, w, targets, const)
+    records["w"] = w
+    records["margin"] = margin
+    records["errors"] = errors
+
+def allocate(model: str, n: int, path: str = None):
+    # População vazia: na RAM ou em um .npy mapeado em disco
+    if path is None:
+        return np.empty(n, dtype=record_dtype(model))
+    return np.lib.format.open_memmap(path, mode="w+", dtype=record_dtype(model), shape=(n,))
+
+def open_population(path: str, mode: str = "r"):
+    return np.load(path, mmap_mode=mode)
+
+def iter_blocks(pop, chunk: int, mode: str = "r", first: int = 0, last: int = None):
+    """
+    (início, bloco) percorrendo os registros [first, last) da população. Num
+    memmap, cada bloco é um mapa próprio do arquivo, desfeito ao passar para
+    o próximo: as páginas lidas ou escritas não se acumulam na memória.
+    """
+    last = len(pop) if last is None else last
+    for start in range(first, last, chunk):
+        stop = min(start + chunk, last)
+        if isinstance(pop, np.memmap):
+            yield start, np.memmap(pop.filename, dtype=pop.dtype, mode=mode, shape=(stop - start,),
+                                   offset=pop.offset + start * pop.dtype.itemsize)
+        else:
+            yield start, pop[start:stop]
+
+def _search_range(args) -> int:
+    # Avalia as configurações [first, last) direto no arquivo, bloco a bloco
+    path, model, table, const, chunk, first, last, seed = args
+    pop = open_population(path)
+    targets = table_targets(table)
+    for start, block in iter_blocks(pop, chunk, "r+", first, last):
+        fill_block(block, model, targets, const, np.random.default_rng([seed, start // chunk]))
+        block.flush()
+    return last - first
+
+def search(model: str, table: str, n: int, path: str = None, const=None, max_ram: float = MAX_RAM,
+           workers: int = 1, seed: int = 0):
+    """
+    Sorteia e avalia n configurações em blocos de chunk_size(model, max_ram).
+    Com path, a população vai para um .npy (memmap) e os workers escrevem
+    cada um na sua faixa de blocos do arquivo; sem path fica na RAM (um
+    processo, e aí a população inteira conta na RAM).
+    """
+    const = constants32(const or default_constants(model))
+    chunk = min(chunk_size(model, max_ram), n)
+    pop = allocate(model, n, path)
+    if path is None:
+        targets = table_targets(table)
+        for start, block in iter_blocks(pop, chunk):
+            fill_block(block, model, targets, const, np.random.default_rng([seed, start // chunk]))
+        return pop
+
+    del pop
+    blocks = -(-n // chunk)
+    bounds = np.minimum(np.linspace(0, blocks, min(workers, blocks) + 1).astype(int) * chunk, n)
+    jobs = [(path, model, table, const, chunk, first, last, seed) for first, last in zip(bounds[:-1], bounds[1:])]
+    if len(jobs) == 1:
+        _search_range(jobs[0])
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as ex:
+            list(ex.map(_search_range, jobs))
+    return open_population(path)
+
+def top_k(pop, k: int = 10, chunk: int = None):
+    """
+    Índices das k configurações de maior margem (min entre as linhas),
+    percorrendo a população em blocos (serve para memmap maior que a RAM).
+    """
+    chunk = chunk or chunk_size("3N")
+    best_idx = np.zeros(0, dtype=np.int64)
+    best_val = np.zeros(0, dtype=np.float32)
+    for start, block in iter_blocks(pop, chunk):
+        margin = block["margin"].min(axis=-1)
+        keep = np.argpartition(-margin, k - 1)[:k] if len(margin) > k else np.arange(len(margin))
+        best_idx = np.concatenate([best_idx, keep + start])
+        best_val = np.concatenate([best_val, margin[keep]])
+        if len(best_val) > k:
+            top = np.argpartition(-best_val, k - 1)[:k]
+            best_idx, best_val = best_idx[top], best_val[top]
+    order = np.argsort(-best_val, kind="stable")
+    return best_idx[order]
+
+def summary(pop, chunk: int = None) -> dict:
+    # Contagem de configurações corretas e histograma de erros, em blocos
+    chunk = chunk or chunk_size("3N")
+    correct, hist = 0, np.zeros(len(INPUTS) + 1, dtype=np.int64)
+    for _, block in iter_blocks(pop, chunk):
+        hist += np.bincount(block["errors"], minlength=len(hist))
+        correct += int(((block["errors"] == 0) & (block["margin"].min(axis=-1) > 0)).sum())
+    return {"configuracoes": len(pop), "corretas": correct, "erros": hist.tolist()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Busca aleatória com população compacta (float32, memmap, blocos)")
+    parser.add_argument("--model", choices=["1N", "3N"], default="3N")
+    parser.add_argument("--table", default="0110")
+    parser.add_argument("--n", type=float, default=1e7, help="Configurações sorteadas")
+    parser.add_argument("--out", default=None, help="Arquivo .npy da população (memmap); sem ele, fica na RAM")
+    parser.add_argument("--max-ram", type=float, default=MAX_RAM, help="RAM por processo para o bloco em avaliação (MiB)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos (só com --out)")
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n = int(args.n)
+    workers = args.workers or os.cpu_count() or 1
+    size = n * record_dtype(args.model).itemsize
+    print(f"{args.table} {KNOWN_GATES.get(args.table, '')}: {n} configurações, "
+          f"{record_dtype(args.model).itemsize} bytes cada ({size / 1e9:.2f} GB), "
+          f"blocos de {chunk_size(args.model, args.max_ram)} ({args.max_ram:g} MiB)")
+    t0 = time.perf_counter()
+    pop = search(args.model, args.table, n, args.out, max_ram=args.max_ram, workers=workers, seed=args.seed)
+    elapsed = time.perf_counter() - t0
+    print(f"Avaliadas em {elapsed:.2f}s: {n / max(elapsed, 1e-9) / 1e6:.2f} M/s "
+          f"({n / max(elapsed, 1e-9) * 3600 / 1e9:.1f} G/hora)")
+
+    s = summary(pop)
+    print(f"Corretas: {s['corretas']} ({s['corretas'] / n * 100:.4f}%), erros por configuração (0 a 4): {s['erros']}")
+    for i in top_k(pop, args.top):
+        rec = pop[i]
+        print(f"  #{i}: margem {rec['margin'].min():.3f}V, pots {np.round(rec['w'].astype(float).ravel(), 3).tolist()}")
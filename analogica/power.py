@@ -0,0 +1,172 @@
+"""
+Estimativa de consumo estático de uma configuração treinada.
+
+Para cada linha da tabela (regime estático), soma a corrente puxada de cada
+trilho de alimentação, com os componentes dos .asc em ltspice/:
+    - divisor da referência (1k/1k) de cada camada
+    - corrente quiescente dos AmpOps (V / RP + IEE do macromodelo LM324)
+    - pots de 10k (peso e bias) ligados entre a tensão de sinal e o terra
+    - corrente dos pesos (wiper -> 100k -> nó somador -> 100k -> referência)
+    - realimentação do amplificador (220k + 100k até a referência)
+    - carga da saída: LED (470 ohm no 1N, 100 ohm no 3N) voltando para a
+      referência, e no 3N os pots de peso de N3, alimentados pelos ocultos
+A referência é um buffer: corrente líquida entrando nela vai para o terra,
+saindo dela vem do trilho da camada.
+
+Trilhos: 1N -> V_PLUS (9 V); 3N -> L1_VCC (9 V) e L2_VCC (7.5 V).
+Tudo vetorizado sobre a população (..., R, S), para servir de critério de
+seleção ao lado da margem.
+
+Uso:
+    python -m analogica.power --model 3N --table 0110 --restarts 256
+"""
+import argparse
+import functools
+
+import numpy as np
+
+from .ltspice import LM324_LIB, read_subckt, spice_value
+from .model import INPUTS, KNOWN_GATES, default_constants, evaluate, forward, layer_constants, table_targets
+from .train import train_batch
+
+R_POT = 10e3        # Potenciômetros de peso e de bias
+R_IN = 100e3        # Resistores do divisor de entrada (peso e referência)
+R_FB = 220e3 + 100e3 # Realimentação do amplificador (ganho 1 + 220k/100k)
+R_DIV = 1e3 + 1e3   # Divisor da referência (V/2)
+LED_VF = 0.7        # Queda do LED no modelo padrão do LTspice (medida nos .raw); LED vermelho real ~1.8 V
+LED_R = {"1N": 470.0, "3N": 100.0}
+
+# AmpOps por trilho: amplificador + comparador por neurônio + buffer da referência
+OPAMPS = {"1N": {"V_PLUS": 3}, "3N": {"L1_VCC": 5, "L2_VCC": 3}}
+
+@functools.lru_cache(maxsize=None)
+def _opamp_params(path: str):
+    # (RP, IEE) do macromodelo, lidos do .lib uma vez por arquivo
+    elements = read_subckt(path)
+    return spice_value(elements["RP"][3]), spice_value(elements["IEE"][-1])
+
+def quiescent_current(v_supply, path: str = LM324_LIB):
+    # Corrente de alimentação de um AmpOp do macromodelo: RP entre os trilhos + fonte IEE
+    rp, iee = _opamp_params(path)
+    return v_supply / rp + iee
+
+def _neuron_currents(w, x1, x2, s1, s2, v_ref, v_a):
+    """
+    Correntes de um neurônio que dependem dos pesos, (..., R, S):
+      wiper -> corrente saindo de cada pot de peso para o divisor
+      ref   -> corrente entrando na referência (divisor + realimentação)
+      amp   -> corrente que a saída do amplificador fornece (> 0) ou absorve (< 0)
+    """
+    n = 1.0 + x1 + x2
+    v_in = (v_ref + x1 * (w[..., 0, None] * s1) + x2 * (w[..., 1, None] * s2)) / n
+    wiper1 = x1 * (w[..., 0, None] * s1 - v_in) / R_IN
+    wiper2 = x2 * (w[..., 1, None] * s2 - v_in) / R_IN
+    amp = (v_a - v_ref) / R_FB
+    return wiper1, wiper2, (v_in - v_ref) / R_IN + amp, amp
+
+def supply_currents(model: str, w, const=None) -> dict:
+    """
+    Corrente estática de cada trilho por linha da tabela.
+    w: (..., R, 3) ou (..., R, 3, 3). Retorna trilho -> (..., R, S) em ampères.
+    """
+    const = const or default_constants(model)
+    w = np.asarray(w, dtype=float)
+    res = forward(model, w, const)
+    layers = layer_constants(const, model)
+    x1, x2 = INPUTS[:, 0], INPUTS[:, 1]
+
+    if model == "1N":
+        v_signal, v_supply, v_ref, v_sat = layers[0]
+        v_a, _, _, out = res[0]
+        wiper1, wiper2, ref, amp = _neuron_currents(w, x1, x2, v_signal, v_signal, v_ref, v_a)
+        led = out * np.maximum(v_sat - v_ref - LED_VF, 0.0) / LED_R["1N"]
+        ref = ref + led
+        rail = (v_supply / R_DIV + OPAMPS["1N"]["V_PLUS"] * quiescent_current(v_supply)
+                + 3 * v_supply / R_POT + wiper1 + wiper2
+                + np.maximum(amp, 0.0) + led + np.maximum(-ref, 0.0))
+        return {"V_PLUS": rail}
+
+    l1, l2 = layers[0], layers[2]
+    rail1 = l1[1] / R_DIV + OPAMPS["3N"]["L1_VCC"] * quiescent_current(l1[1]) + 6 * l1[1] / R_POT
+    ref1 = 0.0
+    for k in range(2):
+        v_a, _, _, _ = res[k]
+        wiper1, wiper2, ref, amp = _neuron_currents(w[..., k, :], x1, x2, l1[0], l1[0], l1[2], v_a)
+        rail1 = rail1 + wiper1 + wiper2 + np.maximum(amp, 0.0)
+        ref1 = ref1 + ref
+    rail1 = rail1 + np.maximum(-ref1, 0.0)
+
+    # N3: pots de peso alimentados pela saída dos ocultos (L2_SIGNAL quando em 1), pelo trilho de L1
+    o1, o2 = res[0][3], res[1][3]
+    v_a3, _, _, out3 = res[2]
+    wiper1, wiper2, ref2, amp = _neuron_currents(w[..., 2, :], o1, o2, l2[0], l2[0], l2[2], v_a3)
+    rail1 = rail1 + (o1 + o2) * l2[0] / R_POT + wiper1 + wiper2
+
+    led = out3 * np.maximum(l2[3] - l2[2] - LED_VF, 0.0) / LED_R["3N"]
+    ref2 = ref2 + led
+    rail2 = (l2[1] / R_DIV + OPAMPS["3N"]["L2_VCC"] * quiescent_current(l2[1]) + l2[1] / R_POT
+             + np.maximum(amp, 0.0) + led + np.maximum(-ref2, 0.0))
+    return {"L1_VCC": rail1, "L2_VCC": rail2}
+
+def power(model: str, w, const=None):
+    # Potência total (W) por linha da tabela: soma de V_trilho * I_trilho, (..., R, S)
+    const = const or default_constants(model)
+    return sum(const[rail] * i for rail, i in supply_currents(model, w, const).items())
+
+def power_summary(model: str, w, const=None) -> dict:
+    """
+    Por restart (..., R): potência média entre as linhas (entradas equiprováveis),
+    pior linha e corrente máxima de cada trilho.
+    """
+    const = const or default_constants(model)
+    currents = supply_currents(model, w, const)
+    p = sum(const[rail] * i for rail, i in currents.items())
+    summary = {"mean": p.mean(axis=-1), "max": p.max(axis=-1)}
+    for rail, i in currents.items():
+        summary[rail] = i.max(axis=-1)
+    return summary
+
+def lowest_power(model: str, w, targets, const=None, margin_min: float = 0.0):
+    """
+    Entre os restarts corretos (todas as linhas certas e margem > margin_min),
+    o de menor potência média. Retorna o índice no eixo R (..., ), -1 se nenhum serve.
+    """
+    _, margin = evaluate(model, w, targets, const)
+    mean = np.where(margin > margin_min, power_summary(model, w, const)["mean"], np.inf)
+    best = np.argmin(mean, axis=-1)
+    return np.where(np.isfinite(np.min(mean, axis=-1)), best, -1)
+
+def print_breakdown(model: str, w, const=None):
+    # Corrente por trilho e potência para cada linha da tabela (uma configuração)
+    const = const or default_constants(model)
+    currents = supply_currents(model, np.asarray(w)[None], const)
+    p = power(model, np.asarray(w)[None], const)
+    rails = list(currents)
+    print(f"{'Entrada':<8} " + " ".join(f"{r + ' (' + format(const[r], 'g') + 'V)':>16}" for r in rails) + f" {'Potência':>10}")
+    for s, (x1, x2) in enumerate(INPUTS.astype(int)):
+        cols = " ".join(f"{currents[r][0, s] * 1e3:14.3f}mA" for r in rails)
+        print(f"({x1},{x2})    {cols} {p[0, s] * 1e3:8.2f}mW")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consumo estático por trilho e seleção do restart de menor potência")
+    parser.add_argument("--model", choices=["1N", "3N"], default="3N")
+    parser.add_argument("--table", default="0110")
+    parser.add_argument("--restarts", type=int, default=256)
+    parser.add_argument("--epochs", type=int, default=20000)
+    parser.add_argument("--margin", type=float, default=0.3, help="Margem mínima para contar como correto (V)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    targets = table_targets(args.table)
+    w, _ = train_batch(args.model, targets, restarts=args.restarts, epochs=args.epochs, seed=args.seed)
+    _, margin = evaluate(args.model, w, targets)
+    summary = power_summary(args.model, w)
+    ok = margin > args.margin
+    print(f"{args.table} {KNOWN_GATES.get(args.table, '')}: {ok.sum()} de {args.restarts} restarts corretos "
+          f"(margem > {args.margin}V)")
+    if ok.any():
+        print(f"Potência média dos corretos: {summary['mean'][ok].min() * 1e3:.2f} a {summary['mean'][ok].max() * 1e3:.2f} mW")
+        best = lowest_power(args.model, w, targets, margin_min=args.margin)
+        print(f"\nMenor consumo: restart {best} (margem {margin[best]:.2f}V, média {summary['mean'][best] * 1e3:.2f} mW, "
+              f"pior linha {summary['max'][best] * 1e3:.2f} mW)")
+        print_breakdown(args.model, w[best])
@@ -0,0 +1,168 @@
+"""
+Modo de profiling: tempo acumulado por fase do treino (forward, loss,
+backward, clip...).
+
+Uso:
+    prof = Profiler()
+    with prof.phase("forward"):
+        ...
+    print(prof.report())
+
+As fases podem ser aninhadas; cada uma é identificada pelo caminho
+("sweep;treino;forward"). Nos workers de um pool, cada processo devolve
+prof.snapshot() e o processo principal junta com merge(). O resultado pode
+ser exportado como pilhas "collapsed" (flamegraph.pl, speedscope) ou como
+trace JSON (chrome://tracing, Perfetto).
+
+Quando o profiling está desligado, NULL_PROFILER devolve sempre o mesmo
+contexto vazio, então o custo no laço de treino é só a entrada/saída do with.
+Em laços Python muito curtos (os scripts, 4 amostras por época) nem isso é
+de graça: lá o laço normal não mede nada e --profile roda uma cópia do laço
+que separa as fases encadeando clock/lap:
+    t = prof.clock()
+    ...
+    t = prof.lap("shuffle", t)
+No NULL_PROFILER as duas chamadas não leem o relógio.
+"""
+import json
+import os
+import time
+from collections import defaultdict
+
+class _Phase:
+    __slots__ = ("prof", "name", "t0")
+
+    def __init__(self, prof, name):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self):
+        self.prof._stack.append(self.name)
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter_ns() - self.t0
+        stack = self.prof._stack
+        path = ";".join(stack)
+        stack.pop()
+        self.prof.totals[path] += dt
+        self.prof.counts[path] += 1
+        return False
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class Profiler:
+    enabled = True
+
+    def __init__(self):
+        self.totals = defaultdict(int)  # caminho -> ns acumulados
+        self.counts = defaultdict(int)  # caminho -> número de chamadas
+        self.pids = {os.getpid()}       # processos que contribuíram
+        self._stack = []
+
+    def phase(self, name: str):
+        return _Phase(self, name)
+
+    def clock(self) -> int:
+        return time.perf_counter_ns()
+
+    def lap(self, name: str, t0: int) -> int:
+        # Soma o tempo desde t0 na fase name (dentro das fases abertas) e devolve o relógio atual
+        t = time.perf_counter_ns()
+        path = ";".join(self._stack + [name])
+        self.totals[path] += t - t0
+        self.counts[path] += 1
+        return t
+
+    def snapshot(self) -> dict:
+        # Estado serializável (pickle/JSON) para voltar de um worker
+        return {"totals": dict(self.totals), "counts": dict(self.counts), "pids": sorted(self.pids | {os.getpid()})}
+
+    def merge(self, snapshot: dict):
+        for path, ns in snapshot["totals"].items():
+            self.totals[path] += ns
+        for path, n in snapshot["counts"].items():
+            self.counts[path] += n
+        self.pids.update(snapshot["pids"])
+
+    def self_times(self) -> dict:
+        # Tempo próprio de cada fase (total menos o tempo das subfases)
+        own = dict(self.totals)
+        for path, ns in self.totals.items():
+            parent = path.rpartition(";")[0]
+            if parent in own:
+                own[parent] -= ns
+        return own
+
+    def _children(self, prefix: str):
+        # Subfases diretas de prefix ("" = raízes), da mais cara para a mais barata
+        children = [p for p in self.totals if p.rpartition(";")[0] == prefix]
+        return sorted(children, key=lambda p: -self.totals[p])
+
+    def report(self, width: int = 30) -> str:
+        """Resumo em árvore (estilo flame graph): tempo total, % da raiz, chamadas e barra."""
+        if not self.totals:
+            return "(nenhuma fase registrada)"
+        roots = sum(ns for path, ns in self.totals.items() if ";" not in path)
+        lines = [f"{'Fase':<32} {'Total':>10} {'%':>6} {'Chamadas':>10}  (processos: {len(self.pids)})"]
+
+        def walk(prefix, depth):
+            for path in self._children(prefix):
+                ns = self.totals[path]
+                frac = ns / roots if roots else 0.0
+                name = "  " * depth + path.rpartition(";")[2]
+                bar = "#" * max(1, int(round(frac * width)))
+                lines.append(f"{name:<32} {ns / 1e6:8.1f}ms {frac * 100:5.1f}% {self.counts[path]:>10}  {bar}")
+                walk(path, depth + 1)
+
+        walk("", 0)
+        return "\n".join(lines)
+
+    def export(self, path: str):
+        """
+        .json -> trace no formato Chrome (fases agregadas lado a lado, com aninhamento)
+        outro -> pilhas collapsed ("a;b;c <tempo próprio em µs>") para flamegraph.pl/speedscope
+        """
+        if path.endswith(".json"):
+            events = []
+
+            def place(prefix, start):
+                t = start
+                for child in self._children(prefix):
+                    dur = self.totals[child] / 1e3
+                    events.append({"name": child.rpartition(";")[2], "ph": "X", "ts": t, "dur": dur,
+                                   "pid": 0, "tid": 0, "args": {"chamadas": self.counts[child], "caminho": child}})
+                    place(child, t)
+                    t += dur
+
+            place("", 0.0)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                for p, ns in sorted(self.self_times().items()):
+                    if ns > 0:
+                        f.write(f"{p} {ns // 1000}\n")
+
+class NullProfiler(Profiler):
+    enabled = False
+    _null_phase = _NullPhase()
+
+    def phase(self, name: str):
+        return self._null_phase
+
+    def clock(self) -> int:
+        return 0
+
+    def lap(self, name: str, t0: int) -> int:
+        return 0
+
+NULL_PROFILER = NullProfiler()
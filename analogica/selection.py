@@ -0,0 +1,130 @@
+"""
+Seleção multiobjetivo dos restarts: em vez de ficar só com o de menos erros
+(e, no empate, maior margem), pontua a população inteira em vários objetivos
+e devolve a frente de Pareto, um cardápio de soluções corretas.
+
+Objetivos (todos vetorizados sobre (..., R); maior é melhor, exceto corrente):
+    margem     -> menor y * (Va - Vbias) da saída / |Va - Vbias| dos ocultos (V)
+    tolerancia -> maior erro de posição dos pots (fração do curso, o mesmo em
+                  todos os pots, no pior sentido) que nenhuma linha aguenta
+                  virar. Sai da estrutura linear por partes do modelo, sem
+                  Monte Carlo: |z| / soma |dz/dw| por neurônio e linha
+                  (analogica.sensitivity)
+    curso      -> menor distância de um pot às pontas 0% / 100%
+    corrente   -> corrente média total dos trilhos (A), de analogica.power
+
+Uso:
+    python -m analogica.selection --model 3N --table 0110 --restarts 256
+"""
+import argparse
+
+import numpy as np
+
+from .model import KNOWN_GATES, default_constants, evaluate, table_targets
+from .power import supply_currents
+from .sensitivity import jacobian, uniform_tolerance
+from .train import train_batch
+
+OBJECTIVES = ("margem", "tolerancia", "curso", "corrente")
+MAXIMIZE = {"margem": True, "tolerancia": True, "curso": True, "corrente": False}
+
+def pot_tolerance(model: str, w, targets, const=None):
+    # Maior erro uniforme dos pots (fração do curso) que não vira nenhuma linha, (..., R)
+    return uniform_tolerance(*jacobian(model, w, targets, const))
+
+def objectives(model: str, w, targets, const=None) -> dict:
+    """Todos os objetivos da população: nome -> (..., R), e "erros" para filtrar."""
+    const = const or default_constants(model)
+    w = np.asarray(w, dtype=float)
+    errors, margin = evaluate(model, w, targets, const)
+    pots = w.reshape(w.shape[:-2] + (-1,)) if model == "3N" else w
+    currents = supply_currents(model, w, const)
+    return {
+        "erros": errors,
+        "margem": margin,
+        "tolerancia": pot_tolerance(model, w, targets, const),
+        "curso": np.minimum(pots, 1.0 - pots).min(axis=-1),
+        "corrente": sum(currents.values()).mean(axis=-1),
+    }
+
+def pareto_front(scores, valid=None):
+    """
+    scores: (..., R, K), todos para maximizar. valid: (..., R) restarts que
+    podem entrar na frente. Retorna máscara (..., R) dos não dominados.
+    """
+    scores = np.asarray(scores, dtype=float)
+    if valid is None:
+        valid = np.ones(scores.shape[:-1], dtype=bool)
+    a = scores[..., :, None, :]  # restart candidato i
+    b = scores[..., None, :, :]  # restart j que pode dominar i
+    dominates = (b >= a).all(axis=-1) & (b > a).any(axis=-1) & valid[..., None, :]
+    return valid & ~dominates.any(axis=-1)
+
+def select(model: str, w, targets, const=None, names=OBJECTIVES) -> dict:
+    """
+    Frente de Pareto dos restarts corretos (erros == 0 e margem > 0).
+    Retorna dict com os objetivos, "front" (..., R) e "best": o ponto da frente
+    mais perto do ideal (todos os objetivos no melhor valor da frente), -1 se
+    nenhum é correto.
+    """
+    obj = objectives(model, w, targets, const)
+    valid = (obj["erros"] == 0) & (obj["margem"] > 0)
+    scores = np.stack([obj[n] if MAXIMIZE[n] else -obj[n] for n in names], axis=-1)
+    front = pareto_front(scores, valid)
+
+    # Normaliza cada objetivo em [0, 1] dentro da frente
+    lo = np.where(front[..., None], scores, np.inf).min(axis=-2, keepdims=True)
+    hi = np.where(front[..., None], scores, -np.inf).max(axis=-2, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        norm = np.where(hi > lo, (scores - lo) / (hi - lo), 1.0)
+    distance = np.where(front, np.sqrt(((1.0 - norm) ** 2).sum(axis=-1)), np.inf)
+    best = np.where(front.any(axis=-1), distance.argmin(axis=-1), -1)
+    return {**obj, "valid": valid, "front": front, "best": best}
+
+def print_menu(result, label: str = "Restart", first: int = 0, numbers=None):
+    # Cardápio (população sem eixos extras): restarts da frente, do de maior margem para o de menor.
+    # numbers: rótulo de cada restart (padrão: índice + first)
+    idx = np.nonzero(result["front"])[0]
+    numbers = np.arange(len(result["front"])) + first if numbers is None else numbers
+    idx = idx[np.argsort(-result["margem"][idx])]
+    print(f"{label:>9} {'Margem':>8} {'Tolerância':>11} {'Curso':>7} {'Corrente':>10}")
+    for r in idx:
+        mark = "  <- compromisso" if r == result["best"] else ""
+        print(f"{numbers[r]:>9} {result['margem'][r]:7.2f}V {result['tolerancia'][r] * 100:10.1f}% "
+              f"{result['curso'][r] * 100:6.1f}% {result['corrente'][r] * 1e3:8.2f}mA{mark}")
+
+def choose(model: str, candidates, table: str, const=None, verbose: bool = True, numbers=None) -> int:
+    """
+    Para os scripts: candidates é a lista de pesos de cada tentativa
+    ([w1, w2, w_bias] no 1N, [[...], [...], [...]] no 3N). Mostra a frente e
+    retorna o índice escolhido (compromisso); sem nenhum correto, o de menos
+    erros e maior margem, como o critério antigo. numbers: número de cada
+    tentativa no cardápio (padrão 1, 2, ...).
+    """
+    const = {k: v for k, v in (const or default_constants(model)).items() if k in default_constants(model)}
+    w = np.asarray(candidates, dtype=float)
+    targets = table_targets(table)
+    result = select(model, w, targets, const)
+    if result["best"] < 0:
+        return int(np.lexsort((-result["margem"], result["erros"]))[0])
+    if verbose:
+        print(f"\nFrente de Pareto ({result['front'].sum()} de {len(candidates)} tentativas):")
+        print_menu(result, "Tentativa", 1, numbers)
+    return int(result["best"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Frente de Pareto dos restarts (margem, tolerância, curso, corrente)")
+    parser.add_argument("--model", choices=["1N", "3N"], default="3N")
+    parser.add_argument("--table", default="0110")
+    parser.add_argument("--restarts", type=int, default=256)
+    parser.add_argument("--epochs", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    targets = table_targets(args.table)
+    w, _ = train_batch(args.model, targets, restarts=args.restarts, epochs=args.epochs, seed=args.seed)
+    result = select(args.model, w, targets)
+    print(f"{args.table} {KNOWN_GATES.get(args.table, '')}: {result['valid'].sum()} de {args.restarts} restarts corretos, "
+          f"{result['front'].sum()} na frente de Pareto\n")
+    if result["best"] >= 0:
+        print_menu(result)
@@ -0,0 +1,142 @@
+"""
+Sensibilidade de cada pot: d(margem)/d(w) analítico, para todos os pots,
+todas as linhas da tabela e todos os restarts de uma vez.
+
+O modelo é linear por partes (divisor e ganho lineares, clips na saturação),
+então a derivada sai fechada no trecho em que cada linha está:
+    dz/dw1 = GAIN * V_sinal * x1 / n   (0 se Va saturado, olhando o Va antes do clip)
+    dz/dw2 = GAIN * V_sinal * x2 / n   (0 se Va saturado)
+    dz/dwb = -V_alim                   (0 se o bias está clipado)
+com z = Va - Vbias. Nas bordas dos clips vale o trecho linear (como no
+autodiff): pot encostado no 0% ainda muda a tensão quando sai de lá. A margem de uma linha em um neurônio é y * z na saída e
+|z| nos ocultos (como em evaluate). No 3N um pot de N1/N2 só muda N3 quando
+vira a saída do oculto, então localmente cada pot mexe só no seu neurônio.
+
+Aperto do ajuste (trim) de um pot: quanto ele pode andar (fração do curso),
+com os outros parados, até alguma linha virar = menor margem / |derivada|.
+O pot de menor trim é o que mais importa na bancada.
+
+Uso:
+    python -m analogica.sensitivity --model 3N --table 0110
+"""
+import argparse
+
+import numpy as np
+
+from .model import (INPUTS, KNOWN_GATES, NEURONS, default_constants, evaluate, forward, layer_constants,
+                    neuron_calibration, table_targets)
+from .train import train_batch
+
+POT_NAMES = ("w1", "w2", "w_bias")
+
+def pot_names(model: str):
+    # "w1", "w2", "w_bias" no 1N; "N1.w1" ... "N3.w_bias" no 3N (ordem de w.reshape(..., 9))
+    if model == "1N":
+        return list(POT_NAMES)
+    return [f"{n}.{p}" for n in NEURONS[model] for p in POT_NAMES]
+
+def jacobian(model: str, w, targets, const=None):
+    """
+    Margem e derivada por neurônio, linha e pot do próprio neurônio.
+    Retorna (margin (..., R, S, N), jac (..., R, S, N, 3)) com N neurônios;
+    jac[..., s, k, j] = d margin[..., s, k] / d w[k, j] (pot j do neurônio k).
+    """
+    const = const or default_constants(model)
+    w = np.asarray(w, dtype=float)
+    res = forward(model, w, const)
+    layers = layer_constants(const, model)
+    calib = neuron_calibration(const, model)
+    y_sign = 2.0 * np.asarray(targets, dtype=float) - 1.0
+    wn = [w] if model == "1N" else [w[..., k, :] for k in range(3)]
+    x1, x2 = INPUTS[:, 0], INPUTS[:, 1]
+    inputs = [(x1, x2)] * (len(res) - 1) + [(x1, x2) if model == "1N" else (res[0][3], res[1][3])]
+
+    margins, jacs = [], []
+    for k, ((v_a, v_bias, n, _), (in1, in2)) in enumerate(zip(res, inputs)):
+        v_signal, v_supply, v_ref, v_sat = layers[k]
+        gain, offset, _ = calib[k]
+        z = v_a - v_bias
+        sign = y_sign if k == len(res) - 1 else np.where(z >= 0, 1.0, -1.0)
+        # Trecho do Va antes do clip (o Va devolvido pelo forward já está clipado)
+        v_in = (v_ref + in1 * wn[k][..., 0, None] * v_signal + in2 * wn[k][..., 1, None] * v_signal) / n
+        v_a_raw = v_ref + gain * (v_in - v_ref) + offset
+        linear = (v_a_raw >= 0.0) & (v_a_raw <= v_sat)
+        bias_raw = wn[k][..., 2, None] * v_supply
+        d_w = gain * v_signal / n * linear
+        d_bias = -v_supply * ((bias_raw >= 0.0) & (bias_raw <= v_sat))
+        margins.append(sign * z)
+        jacs.append(np.stack(np.broadcast_arrays(sign * d_w * in1, sign * d_w * in2, sign * d_bias), axis=-1))
+    return np.stack(margins, axis=-1), np.stack(jacs, axis=-2)
+
+def uniform_tolerance(margin, jac):
+    # Maior erro igual em todos os pots, no pior sentido, sem virar nenhuma linha, (..., R)
+    m = np.maximum(margin, 0.0)
+    slope = np.abs(jac).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tol = np.where(slope > 0, m / slope, np.inf)
+    return np.minimum(tol.min(axis=(-2, -1)), 1.0)
+
+def sensitivity_report(model: str, w, targets, const=None) -> dict:
+    """
+    Tudo por restart, com os pots achatados na ordem de pot_names:
+      jac   -> (..., R, S, P) derivada da margem de cada linha no neurônio do
+               próprio pot em relação ao pot, V por curso inteiro (a mesma
+               derivada que dá o trim)
+      trim  -> (..., R, P) aperto do ajuste de cada pot (fração do curso)
+      rank  -> (..., R, P) pots do mais apertado para o mais folgado
+      worst -> (..., R, P) linha que limita cada pot
+    """
+    margin, jac = jacobian(model, w, targets, const)
+    # Localmente cada pot só mexe no seu neurônio: trim e jac usam a margem dele
+    flat = jac.reshape(jac.shape[:-2] + (-1,))
+
+    m = np.maximum(margin, 0.0)[..., None]
+    slope = np.abs(jac)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_row = np.where(slope > 0, m / slope, np.inf).reshape(flat.shape)
+    trim = np.minimum(per_row.min(axis=-2), 1.0)
+    return {
+        "jac": flat,
+        "trim": trim,
+        "rank": np.argsort(trim, axis=-1, kind="stable"),
+        "worst": per_row.argmin(axis=-2),
+        "uniform": uniform_tolerance(margin, jac),
+    }
+
+def print_report(model: str, report: dict, r: int = 0):
+    # Tabela de um restart: pots do mais apertado para o mais folgado
+    names = pot_names(model)
+    rows = ["(0,0)", "(1,0)", "(0,1)", "(1,1)"]
+    print(f"{'Pot':<10} {'Trim':>7} {'Linha crítica':>14}  " + " ".join(f"{'dm/dw ' + s:>13}" for s in rows))
+    for p in report["rank"][r]:
+        trim = report["trim"][r, p]
+        cols = " ".join(f"{report['jac'][r, s, p] * 10 + 0.0:10.1f}mV%" for s in range(len(rows)))
+        print(f"{names[p]:<10} {trim * 100:6.1f}% {rows[report['worst'][r, p]]:>14}  {cols}")
+    print(f"Erro uniforme tolerado (todos os pots juntos): {report['uniform'][r] * 100:.2f}% do curso")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sensibilidade da margem a cada pot (analítica, vetorizada)")
+    parser.add_argument("--model", choices=["1N", "3N"], default="3N")
+    parser.add_argument("--table", default="0110")
+    parser.add_argument("--restarts", type=int, default=256)
+    parser.add_argument("--epochs", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    targets = table_targets(args.table)
+    w, _ = train_batch(args.model, targets, restarts=args.restarts, epochs=args.epochs, seed=args.seed)
+    errors, margin = evaluate(args.model, w, targets)
+    report = sensitivity_report(args.model, w, targets)
+    ok = (errors == 0) & (margin > 0)
+    print(f"{args.table} {KNOWN_GATES.get(args.table, '')}: {ok.sum()} de {args.restarts} restarts corretos")
+    if ok.any():
+        best = int(np.argmax(np.where(ok, report["uniform"], -np.inf)))
+        print(f"\nRestart mais robusto ({best}, margem {margin[best]:.2f}V), dm/dw em mV por 1% do curso:")
+        print_report(args.model, report, best)
+
+        names = pot_names(args.model)
+        tightest = np.bincount(report["rank"][ok, 0], minlength=len(names))
+        print("\nPot mais apertado entre os restarts corretos:")
+        for p in np.argsort(-tightest):
+            if tightest[p]:
+                print(f"  {names[p]:<10} {tightest[p]:>5} ({tightest[p] / ok.sum() * 100:.0f}%)")
@@ -0,0 +1,280 @@
+"""
+Servidor local de treino: vários pedidos de pots ao mesmo tempo, sem cada um
+rodar o script interativo.
+
+HTTP simples (TCP ou socket Unix), corpo em JSON:
+    POST /train  {"model": "3N", "table": "0110", "loss": "hinge",
+                  "constants": {"L2_SAT": 6.5}, "margem": 0.3,
+                  "restarts": 64, "epochs": 20000, "seed": 0}
+                 -> {"weights": ..., "margin": ..., "errors": ..., "cached": ...}
+    GET  /stats  -> contadores (cache, deduplicados, lotes, tempo de treino)
+Só "table" é obrigatório; constantes não informadas ficam nos valores dos scripts.
+
+Caminho de um pedido:
+    1. cache de soluções (banco solucoes.json carregado na partida) -> milissegundos
+    2. pedido idêntico já em treino -> espera o mesmo resultado (deduplicação)
+    3. fila do grupo (modelo, perda, restarts, épocas, semente): pedidos que
+       chegam dentro de WINDOW s viram um treino só, com tabelas e constantes
+       empilhadas no eixo de broadcast (G, 1, 1) do treino vetorizado
+Os lotes rodam em um pool de processos, então lotes diferentes usam núcleos
+diferentes. Cada pedido do lote para no primeiro restart que converge, e o
+lote treina em trechos de SEGMENT épocas: pedido resolvido responde no fim
+do trecho e só os que faltam continuam (um pedido difícil ou sem solução não
+segura os outros). Só soluções sem erros e com a margem pedida (evaluate,
+ocultos incluídos) voltam para o cache e para o banco; as outras são
+respondidas sem ficar no cache.
+
+Uso:
+    python -m analogica.server --port 8765
+    python -m analogica.server --unix /tmp/analogica.sock
+    curl -d '{"model": "1N", "table": "0001"}' http://127.0.0.1:8765/train
+"""
+import argparse
+import asyncio
+import json
+import os
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from .losses import LOSSES
+from .model import default_constants, evaluate, table_targets
+from .store import DEFAULT_PATH, SolutionStore
+from .train import train_batch
+
+WINDOW = 0.02       # Janela (s) para juntar pedidos no mesmo lote
+MAX_BATCH = 64      # Pedidos por lote; lote cheio é enviado sem esperar a janela
+MAX_BODY = 1 << 16  # Tamanho máximo do corpo JSON (bytes)
+SEGMENT = 2000      # Épocas por trecho de treino de um lote
+DEFAULTS = {"model": "1N", "loss": "hinge", "margem": 0.3, "restarts": 64, "epochs": 20000, "seed": 0}
+
+def normalize(request: dict) -> dict:
+    """
+    Pedido completo e validado: constantes do modelo com as sobrescritas do
+    pedido, mais MARGEM (como no banco de soluções dos scripts).
+    Levanta ValueError para pedido inválido.
+    """
+    job = {**DEFAULTS, **{k: v for k, v in request.items() if k != "constants"}}
+    if job["model"] not in ("1N", "3N"):
+        raise ValueError(f"Modelo desconhecido: {job['model']}")
+    table = str(job.get("table", ""))
+    if len(table) != 4 or set(table) - {"0", "1"}:
+        raise ValueError(f"Tabela inválida: {table!r} (4 bits na ordem 00, 10, 01, 11)")
+    if job["loss"] not in LOSSES:
+        raise ValueError(f"Perda desconhecida: {job['loss']} (disponíveis: {', '.join(sorted(LOSSES))})")
+    const = default_constants(job["model"])
+    for name, value in request.get("constants", {}).items():
+        if name not in const:
+            raise ValueError(f"Constante desconhecida para o modelo {job['model']}: {name}")
+        const[name] = float(value)
+    const["MARGEM"] = float(job["margem"])
+    for name in ("restarts", "epochs", "seed"):
+        job[name] = int(job[name])
+    job["table"], job["constants"] = table, const
+    return job
+
+def job_key(model: str, table: str, loss: str, constants: dict) -> tuple:
+    # Identidade de um pedido no cache e na deduplicação (restarts/épocas não mudam a resposta esperada)
+    return (model, table, loss or "hinge", tuple(sorted((k, float(v)) for k, v in constants.items())))
+
+def train_group(args) -> list:
+    """
+    Um trecho de treino de um lote no worker: as constantes de cada pedido
+    viram o eixo (G, 1, 1) e as tabelas o alvo (G, 1, S). Cada pedido para no
+    primeiro restart que passa da margem (stop="any").
+    states: população de cada pedido no fim do trecho anterior (None no começo;
+    o momentum do 3N recomeça a cada trecho).
+    Retorna, por pedido, o melhor restart (maior margem), se o treino parou
+    antes do fim do trecho e a população para continuar. Parar não garante a
+    margem pedida: stop="any" olha só a perda (margem da saída), e evaluate
+    conta também os ocultos.
+    """
+    model, loss, restarts, epochs, seed, jobs, states = args
+    names = list(default_constants(model))
+    const = {name: np.array([job["constants"][name] for job in jobs])[:, None, None] for name in names}
+    margem = np.array([job["constants"]["MARGEM"] for job in jobs])[:, None, None]
+    targets = np.stack([table_targets(job["table"]) for job in jobs])[:, None, :]
+    init = None if states[0] is None else np.stack(states)
+    w, epocas = train_batch(model, targets, const, restarts=restarts, epochs=epochs, seed=seed, loss=loss, margem=margem,
+                            init=init, stop="any")
+    errors, margin = evaluate(model, w, targets, const)
+    stalled = ~((errors == 0) & (margin >= margem[..., 0])).any(axis=-1) & (epocas.max(axis=-1) < epochs)
+    if stalled.any():
+        # O restart que parou o pedido tem a margem só na saída: o resto do trecho segue com todos os restarts
+        w2, epocas2 = train_batch(model, targets[stalled], {name: c[stalled] for name, c in const.items()},
+                                  restarts=restarts, epochs=epochs, seed=seed, loss=loss, margem=margem[stalled],
+                                  init=w[stalled], stop="all")
+        w[stalled], epocas[stalled] = w2, epocas[stalled] + epocas2
+        errors, margin = evaluate(model, w, targets, const)
+    best = margin.argmax(axis=-1)
+    return [{"weights": w[g, r].tolist(), "margin": float(margin[g, r]), "errors": int(errors[g, r]),
+             "epochs": int(epocas[g, r]), "stopped": bool(epocas[g].max() < epochs), "state": w[g]}
+            for g, r in enumerate(best)]
+
+class JobServer:
+    def __init__(self, workers: int = None, window: float = WINDOW, max_batch: int = MAX_BATCH,
+                 store_path: str = DEFAULT_PATH):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.io = ThreadPoolExecutor(max_workers=1)  # Gravação do banco fora do loop, uma de cada vez
+        self.window = window
+        self.max_batch = max_batch
+        self.store = SolutionStore(store_path) if store_path else None
+        self.cache = {}
+        self.inflight = {}   # chave -> Future do treino em andamento
+        self.pending = {}    # grupo -> (id do lote, [(chave, pedido)]) esperando a janela
+        self.batch_ids = itertools.count()
+        self.stats = {"pedidos": 0, "cache": 0, "deduplicados": 0, "lotes": 0, "treinados": 0, "tempo_treino": 0.0}
+        for entry in (self.store.entries if self.store else []):
+            if entry["margin"] >= entry["constants"].get("MARGEM", 0.0) and entry["margin"] > 0:
+                key = job_key(entry["model"], entry["table"], entry.get("loss"), entry["constants"])
+                self.cache[key] = {"weights": entry["weights"], "margin": entry["margin"], "errors": 0}
+
+    async def submit(self, request: dict) -> dict:
+        t0 = time.perf_counter()
+        job = normalize(request)
+        key = job_key(job["model"], job["table"], job["loss"], job["constants"])
+        self.stats["pedidos"] += 1
+        if key in self.cache:
+            self.stats["cache"] += 1
+            return {**self.cache[key], "cached": True, "time": time.perf_counter() - t0}
+
+        if key in self.inflight:
+            self.stats["deduplicados"] += 1
+        else:
+            loop = asyncio.get_running_loop()
+            self.inflight[key] = loop.create_future()
+            group = (job["model"], job["loss"], job["restarts"], job["epochs"], job["seed"])
+            if group not in self.pending:
+                batch_id = next(self.batch_ids)
+                self.pending[group] = (batch_id, [])
+                # O timer é do lote: se ele fechar cheio antes, não fecha o próximo lote antes da hora
+                loop.call_later(self.window, self._flush, group, batch_id)
+            batch_id, batch = self.pending[group]
+            batch.append((key, job))
+            if len(batch) >= self.max_batch:
+                self._flush(group, batch_id)
+        result = await asyncio.shield(self.inflight[key])
+        return {**result, "cached": False, "time": time.perf_counter() - t0}
+
+    def _flush(self, group, batch_id):
+        # Fecha o lote (se ainda é o mesmo que armou o timer) e manda para o pool
+        if group in self.pending and self.pending[group][0] == batch_id:
+            _, batch = self.pending.pop(group)
+            asyncio.ensure_future(self._run(group, batch))
+
+    async def _run(self, group, batch):
+        model, loss, restarts, epochs, seed = group
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        self.stats["lotes"] += 1
+        # Pedidos ainda em treino: (chave, pedido, população, épocas já usadas)
+        running = [(key, job, None, 0) for key, job in batch]
+        done = 0
+        while running:
+            segment = min(SEGMENT, epochs - done)
+            keys, jobs, states, used = zip(*running)
+            try:
+                results = await loop.run_in_executor(self.pool, train_group,
+                                                     (model, loss, restarts, segment, seed, list(jobs), list(states)))
+            except Exception as exc:
+                for key in keys:
+                    self.inflight.pop(key).set_exception(exc)
+                return
+            done += segment
+            running = []
+            for key, job, prev, result in zip(keys, jobs, used, results):
+                state = result.pop("state")
+                result["epochs"] += prev
+                # Parado não avança mais no próximo trecho (o stop="any" dispara de novo)
+                if result.pop("stopped") or done >= epochs:
+                    self._finish(key, job, result)
+                else:
+                    running.append((key, job, state, prev + segment))
+        self.stats["treinados"] += len(batch)
+        self.stats["tempo_treino"] += time.perf_counter() - t0
+        if self.store is not None:
+            await loop.run_in_executor(self.io, self.store.save)
+
+    def _finish(self, key, job, result):
+        # Responde um pedido do lote; só a solução com a margem pedida vai para o cache e para o banco
+        if result["errors"] == 0 and result["margin"] >= job["constants"]["MARGEM"]:
+            self.cache[key] = {"weights": result["weights"], "margin": result["margin"], "errors": 0}
+            if self.store is not None:
+                self.store.add(job["model"], job["table"], job["constants"], result["weights"], result["margin"],
+                               loss=job["loss"])
+        self.inflight.pop(key).set_result(result)
+
+    async def handle(self, reader, writer):
+        # Uma requisição HTTP/1.1 por conexão
+        status, payload = 200, None
+        try:
+            method, path, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY:
+                raise ValueError("Corpo grande demais")
+            body = await reader.readexactly(length)
+
+            if method == "POST" and path == "/train":
+                payload = await self.submit(json.loads(body or b"{}"))
+            elif method == "GET" and path == "/stats":
+                payload = {**self.stats, "tamanho_cache": len(self.cache), "em_treino": len(self.inflight)}
+            else:
+                status, payload = 404, {"erro": f"{method} {path} não existe"}
+        except (ValueError, KeyError, TypeError) as exc:
+            status, payload = 400, {"erro": str(exc)}
+        except Exception as exc:
+            status, payload = 500, {"erro": f"{type(exc).__name__}: {exc}"}
+
+        data = json.dumps(payload).encode("utf-8")
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.io.shutdown()
+
+async def serve(host: str = "127.0.0.1", port: int = 8765, unix: str = None, **kwargs):
+    server = JobServer(**kwargs)
+    if unix:
+        listener = await asyncio.start_unix_server(server.handle, path=unix)
+        where = unix
+    else:
+        listener = await asyncio.start_server(server.handle, host, port)
+        where = f"http://{host}:{port}"
+    print(f"Servidor de treino em {where} ({server.workers} workers, {len(server.cache)} soluções no cache)")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local de treino com cache, deduplicação e lotes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Escuta em um socket Unix em vez de TCP")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--window", type=float, default=WINDOW, help="Janela para juntar pedidos (s)")
+    parser.add_argument("--store", default=DEFAULT_PATH, help="Banco de soluções usado como cache persistente")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, workers=args.workers, window=args.window,
+                          store_path=args.store))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,86 @@
+"""
+Banco de soluções já treinadas, usado para warm-start do treinamento.
+
+Cada entrada guarda o modelo ("1N" ou "3N"), a tabela verdade como string de
+4 bits na ordem (0,0), (1,0), (0,1), (1,1), as constantes do circuito usadas
+no treino e os pesos (posição dos potenciômetros, 0.0 a 1.0):
+    1N -> [w1, w2, w_bias]
+    3N -> [[w1, w2, w_bias] de N1, de N2, de N3]
+"""
+import json
+import os
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solucoes.json")
+
+def hamming(table_a: str, table_b: str) -> int:
+    # Número de linhas da tabela verdade que mudam de uma para a outra
+    return sum(a != b for a, b in zip(table_a, table_b)) + abs(len(table_a) - len(table_b))
+
+def constants_distance(const_a: dict, const_b: dict) -> float:
+    """
+    Distância relativa entre dois conjuntos de constantes (GAIN, L2_SAT, margem...).
+    Cada constante contribui com |a - b| / max(|a|, |b|); constante ausente conta 1.
+    """
+    d = 0.0
+    for key in set(const_a) | set(const_b):
+        if key not in const_a or key not in const_b:
+            d += 1.0
+            continue
+        a, b = float(const_a[key]), float(const_b[key])
+        scale = max(abs(a), abs(b), 1e-9)
+        d += abs(a - b) / scale
+    return d
+
+class SolutionStore:
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self.entries = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        # Escreve em arquivo temporário e troca, para não corromper o banco se o script cair
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def add(self, model: str, table: str, constants: dict, weights, margin: float, loss: str = None):
+        """
+        Registra uma solução. Se já existe uma para o mesmo modelo, tabela e
+        constantes, só substitui se a nova tiver margem maior.
+        """
+        entry = {
+            "model": model,
+            "table": table,
+            "constants": {k: float(v) for k, v in constants.items()},
+            "weights": weights,
+            "margin": float(margin),
+            "loss": loss,
+        }
+        for i, old in enumerate(self.entries):
+            if (old["model"] == model and old["table"] == table
+                    and constants_distance(old["constants"], entry["constants"]) == 0.0):
+                if entry["margin"] > old["margin"]:
+                    self.entries[i] = entry
+                return
+        self.entries.append(entry)
+
+    def nearest(self, model: str, table: str, constants: dict, max_distance: float = None):
+        """
+        Retorna a entrada mais próxima (ou None), medindo a distância como
+        Hamming entre as tabelas + distância relativa entre as constantes.
+        Em caso de empate, prefere a solução de maior margem.
+        """
+        best, best_key = None, None
+        for entry in self.entries:
+            if entry["model"] != model:
+                continue
+            d = hamming(entry["table"], table) + constants_distance(entry["constants"], constants)
+            if max_distance is not None and d > max_distance:
+                continue
+            key = (d, -entry["margin"])
+            if best_key is None or key < best_key:
+                best, best_key = entry, key
+        return best
@@ -0,0 +1,211 @@
+"""
+Avaliação de sequências longas de entradas (ex: um log de bits passando pela
+rede XOR), sem chamar n1.forward / n2.forward / n3.forward por amostra.
+
+Uma rede treinada é uma função pura das k = 2 entradas: a tabela com as 2^k
+saídas é montada uma vez pelo modelo vetorizado e a sequência inteira vira
+indexação NumPy (zero trabalho Python por amostra). A saída é esparsa por
+natureza: além das saídas, o avaliador marca as bordas (amostras em que a
+saída muda), que é o que um log de bancada precisa.
+
+Formatos de entrada (índice da linha = x1 + 2 * x2, a ordem de INPUTS):
+    index  -> um uint8 por amostra com o índice da linha (0 a 3)
+    bits   -> dois uint8 por amostra (x1, x2)
+    packed -> quatro amostras por byte, 2 bits cada, a primeira nos bits baixos
+Arquivos .npy ou binários crus são abertos com memmap e lidos em blocos de
+CHUNK amostras, então arquivos de vários GB não passam pela RAM de uma vez.
+
+Uso:
+    python -m analogica.stream --table 0110 --samples 100000000 --stats
+    python -m analogica.stream --table 0110 --input log.bin --format packed --out saida.bin --stats
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from .model import INPUTS, KNOWN_GATES, default_constants, evaluate, forward, table_targets
+from .store import SolutionStore
+from .train import train_batch
+
+CHUNK = 1 << 22  # Amostras por bloco (4 MiB de saída em uint8)
+FORMATS = ("index", "bits", "packed")
+
+def row_index(bits):
+    # (N, 2) com (x1, x2) -> (N,) índice da linha na ordem de INPUTS
+    bits = np.asarray(bits, dtype=np.uint8)
+    return bits[:, 0] | (bits[:, 1] << 1)
+
+def output_table(model: str, w, const=None):
+    """
+    Tabela da rede: (saída (S,) uint8, margem (S,)) com margem por linha = menor
+    |Va - Vbias| entre os neurônios (quão longe cada linha está de virar).
+    """
+    res = forward(model, np.asarray(w, dtype=float)[None], const)
+    out = res[-1][3][0].astype(np.uint8)
+    margin = np.min([np.abs(v_a - v_bias)[0] for v_a, v_bias, _, _ in res], axis=0)
+    return out, margin
+
+class StreamEvaluator:
+    """
+    Mapeia blocos de entradas para saídas pela tabela da rede.
+    Com stats, acumula a contagem de cada linha (para a margem ao longo da
+    sequência) e as bordas da saída.
+    """
+    def __init__(self, model: str, w, const=None, stats: bool = False):
+        self.out, self.margin = output_table(model, w, const or default_constants(model))
+        # Um byte compactado (4 amostras) -> 4 saídas, de uma vez
+        shifts = 2 * np.arange(4, dtype=np.uint8)
+        self.byte_table = self.out[(np.arange(256, dtype=np.uint8)[:, None] >> shifts) & 3]
+        self.stats = stats
+        self.counts = np.zeros(len(INPUTS), dtype=np.int64)
+        self.samples = 0
+        self.edges = 0
+        self.prev = None
+
+    def _lookup(self, chunk, fmt: str):
+        # Um bloco de entradas -> saídas uint8, uma por amostra (e a contagem das linhas)
+        chunk = np.asarray(chunk, dtype=np.uint8)
+        if fmt == "packed":
+            out = self.byte_table[chunk].ravel()
+            if self.stats:
+                self.counts += np.bincount(((chunk[:, None] >> (2 * np.arange(4, dtype=np.uint8))) & 3).ravel(),
+                                           minlength=len(INPUTS))
+        else:
+            idx = row_index(chunk) if fmt == "bits" else chunk
+            out = self.out[idx]
+            if self.stats:
+                self.counts += np.bincount(idx, minlength=len(INPUTS))
+        self.samples += out.size
+        return out
+
+    def _edges(self, out):
+        # Posições (no bloco) em que a saída muda, contando a fronteira com o bloco anterior
+        if not out.size:
+            return np.zeros(0, dtype=np.intp)
+        edges = np.flatnonzero(out[1:] != out[:-1]) + 1
+        if self.prev is not None and out[0] != self.prev:
+            edges = np.concatenate([[0], edges])
+        self.prev = out[-1]
+        return edges
+
+    def events(self, chunk, fmt: str = "index", offset: int = 0):
+        """
+        Versão esparsa de map: (posições das bordas, novos valores), com as
+        posições absolutas na sequência (offset = amostras antes do bloco).
+        """
+        out = self._lookup(chunk, fmt)
+        edges = self._edges(out)
+        if self.stats:
+            self.edges += edges.size
+        return edges + offset, out[edges]
+
+    def map(self, chunk, fmt: str = "index"):
+        # Um bloco de entradas -> saídas uint8, uma por amostra
+        out = self._lookup(chunk, fmt)
+        if self.stats:
+            self.edges += self._edges(out).size
+        return out
+
+    def run(self, chunks, fmt: str = "index"):
+        # Gerador: blocos de entrada (arrays ou memmap) -> blocos de saída
+        for chunk in chunks:
+            yield self.map(chunk, fmt)
+
+    def summary(self) -> dict:
+        """
+        Estatísticas da sequência: amostras, contagem por linha, bordas, fração
+        de uns na saída, margem mínima entre as linhas que apareceram e margem
+        média ponderada pelas amostras.
+        """
+        seen = self.counts > 0
+        total = max(int(self.counts.sum()), 1)
+        return {
+            "amostras": self.samples,
+            "linhas": self.counts.tolist(),
+            "bordas": self.edges,
+            "uns": float((self.counts * self.out).sum() / total),
+            "margem_min": float(self.margin[seen].min()) if seen.any() else None,
+            "margem_media": float((self.counts * self.margin).sum() / total),
+        }
+
+def open_stream(path: str, fmt: str = "index", chunk: int = CHUNK):
+    """
+    Blocos de um arquivo (.npy ou binário cru) lido por memmap: cada bloco é
+    uma fatia do mapa, lida do disco só quando usada.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconhecido: {fmt} (use {', '.join(FORMATS)})")
+    data = np.load(path, mmap_mode="r") if path.endswith(".npy") else np.memmap(path, dtype=np.uint8, mode="r")
+    if fmt == "bits":
+        data = data.reshape(-1, 2)
+        step = chunk
+    else:
+        step = chunk // 4 if fmt == "packed" else chunk
+    for start in range(0, len(data), step):
+        yield data[start:start + step]
+
+def random_stream(samples: int, fmt: str = "index", chunk: int = CHUNK, seed=None):
+    # Sequência sorteada em blocos, para medir vazão sem arquivo
+    rng = np.random.default_rng(seed)
+    for start in range(0, samples, chunk):
+        n = min(chunk, samples - start)
+        if fmt == "packed":
+            yield rng.integers(0, 256, -(-n // 4), dtype=np.uint8)
+        elif fmt == "bits":
+            yield rng.integers(0, 2, (n, 2), dtype=np.uint8)
+        else:
+            yield rng.integers(0, 4, n, dtype=np.uint8)
+
+def solution_weights(model: str, table: str, restarts: int = 64):
+    # Pesos do banco de soluções (mesma tabela) ou treinados na hora
+    const = default_constants(model)
+    targets = table_targets(table)
+    entry = SolutionStore().nearest(model, table, const)
+    if entry and entry["table"] == table:
+        _, margin = evaluate(model, np.asarray(entry["weights"])[None], targets, const)
+        if margin[0] > 0:
+            return np.asarray(entry["weights"]), "banco de soluções"
+    w, _ = train_batch(model, targets, restarts=restarts)
+    _, margin = evaluate(model, w, targets)
+    return w[np.argmax(margin)], "treinados agora"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Avaliação de sequências longas de entradas pela tabela da rede")
+    parser.add_argument("--model", choices=["1N", "3N"], default="3N")
+    parser.add_argument("--table", default="0110")
+    parser.add_argument("--input", default=None, help="Arquivo de entradas (.npy ou binário cru); sem ele, sorteia")
+    parser.add_argument("--format", choices=FORMATS, default="index")
+    parser.add_argument("--samples", type=float, default=1e8, help="Amostras sorteadas (sem --input)")
+    parser.add_argument("--chunk", type=int, default=CHUNK)
+    parser.add_argument("--out", default=None, help="Grava as saídas (uint8 por amostra)")
+    parser.add_argument("--stats", action="store_true", help="Conta linhas e bordas e mostra a margem ao longo da sequência")
+    args = parser.parse_args()
+
+    w, source = solution_weights(args.model, args.table)
+    evaluator = StreamEvaluator(args.model, w, stats=args.stats)
+    print(f"{args.table} {KNOWN_GATES.get(args.table, '')}: pesos ({source})")
+    print(f"Tabela da rede: {''.join(str(o) for o in evaluator.out)}, margem por linha "
+          + " ".join(f"{m:.2f}V" for m in evaluator.margin))
+
+    chunks = (open_stream(args.input, args.format, args.chunk) if args.input
+              else random_stream(int(args.samples), args.format, args.chunk, seed=0))
+    t0 = time.perf_counter()
+    sink = open(args.out, "wb") if args.out else None
+    try:
+        for out in evaluator.run(chunks, args.format):
+            if sink:
+                out.tofile(sink)
+    finally:
+        if sink:
+            sink.close()
+    elapsed = time.perf_counter() - t0
+
+    print(f"{evaluator.samples} amostras em {elapsed:.2f}s ({evaluator.samples / max(elapsed, 1e-9) / 1e6:.0f} M amostras/s)")
+    if args.input:
+        print(f"Arquivo: {os.path.getsize(args.input) / 1e9:.2f} GB")
+    if args.stats:
+        s = evaluator.summary()
+        print(f"Linhas (00, 10, 01, 11): {s['linhas']}, bordas na saída: {s['bordas']}, uns: {s['uns'] * 100:.1f}%")
+        print(f"Margem mínima na sequência: {s['margem_min']:.2f}V, média: {s['margem_media']:.2f}V")
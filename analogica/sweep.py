@@ -0,0 +1,213 @@
+"""
+Varredura do espaço de projeto: para uma grade de constantes do circuito
+(GAIN, V_REF, saturações, alimentações), quais portas têm solução e com qual margem.
+
+Os pontos da grade viram um eixo de broadcast do treino vetorizado
+(constantes com shape (G, 1, 1)) e blocos de pontos são distribuídos entre
+processos. O resultado é um mapa de margem por porta, com o shape da grade.
+
+O Hinge para cada restart assim que todas as linhas passam da margem do
+treino, então a margem final ficaria perto de MARGEM em qualquer ponto. Depois
+do treino vêm MARGIN_STEPS rodadas de subida: cada restart volta a treinar a
+partir dos próprios pesos pedindo MARGIN_GROWTH vezes a margem da saída já
+alcançada, e fica com a melhor margem (evaluate) entre as rodadas. No 3N a
+perda só empurra a saída; a margem dos ocultos entra no mapa mas não é
+otimizada.
+
+Tabelas equivalentes (analogica.symmetry: troca de entradas, saída
+complementada) são treinadas uma vez por classe; as outras saem dos pesos do
+representante e são conferidas com o forward. Onde o complemento não dá
+solução, a tabela é treinada direto (--no-symmetry treina todas).
+
+Uso:
+    python -m analogica.sweep --model 1N --grid GAIN=2:5:7 --grid V_SAT=6,7.5
+    python -m analogica.sweep --model 3N --grid L2_SAT=5:7:5 --tables 0110,1001 --out mapa.npz
+    python -m analogica.sweep --model 1N --grid GAIN=2:5:7 --margin-steps 0   # só resolvível ou não
+"""
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .model import KNOWN_GATES, default_constants, evaluate, forward, table_targets
+from .profiling import Profiler
+from .symmetry import equivalence_classes, is_exact, transform_weights
+from .train import train_batch
+
+# Todas as 16 tabelas de 2 entradas, na ordem (0,0), (1,0), (0,1), (1,1)
+ALL_TABLES = ["".join(bits) for bits in itertools.product("01", repeat=4)]
+MARGEM = 0.3         # Margem do treino (a dos scripts)
+MARGIN_STEPS = 3     # Rodadas de subida da margem depois do treino
+MARGIN_GROWTH = 1.5  # Margem pedida em cada rodada, relativa à já alcançada
+
+def parse_axis(spec: str):
+    """
+    "GAIN=2:5:7"   -> ("GAIN", linspace(2, 5, 7))
+    "V_SAT=6,7.5"  -> ("V_SAT", [6.0, 7.5])
+    """
+    name, values = spec.split("=", 1)
+    if ":" in values:
+        start, stop, num = values.split(":")
+        return name.strip(), np.linspace(float(start), float(stop), int(num))
+    return name.strip(), np.array([float(v) for v in values.split(",")])
+
+def grid_points(model: str, axes: dict) -> dict:
+    """
+    Produto cartesiano dos eixos -> dict constante -> array (G,).
+    Constantes derivadas seguem a alimentação quando não são varridas:
+      1N: V_REF = V_PLUS / 2
+      3N: Lx_REF = Lx_VCC / 2 e Lx_SIGNAL = Lx_VCC
+    """
+    const = default_constants(model)
+    for name in axes:
+        if name not in const:
+            raise ValueError(f"Constante desconhecida para o modelo {model}: {name}")
+    mesh = np.meshgrid(*axes.values(), indexing="ij")
+    size = mesh[0].size if mesh else 1
+    points = {name: np.full(size, float(v)) for name, v in const.items()}
+    for name, values in zip(axes, mesh):
+        points[name] = values.ravel().astype(float)
+
+    if model == "1N":
+        if "V_PLUS" in axes and "V_REF" not in axes:
+            points["V_REF"] = points["V_PLUS"] / 2
+    else:
+        for layer in ("L1", "L2"):
+            if f"{layer}_VCC" in axes:
+                if f"{layer}_REF" not in axes:
+                    points[f"{layer}_REF"] = points[f"{layer}_VCC"] / 2
+                if f"{layer}_SIGNAL" not in axes:
+                    points[f"{layer}_SIGNAL"] = points[f"{layer}_VCC"]
+    return points
+
+def sweep_chunk(job):
+    """
+    Treina todas as tabelas para um bloco de pontos da grade (roda no worker).
+    Com symmetry, treina só o representante de cada classe e deriva as outras.
+    Retorna (dict tabela -> melhor margem por ponto (g,), snapshot do profiler ou None).
+    """
+    model, tables, points, restarts, epochs, seed, loss, profile, symmetry, margin_steps = job
+    prof = Profiler() if profile else None
+    const = {name: values[:, None, None] for name, values in points.items()}
+
+    def train(table, mask=slice(None)):
+        sub = {name: values[mask] for name, values in const.items()}
+        targets = table_targets(table)
+        y_sign = 2.0 * targets - 1.0
+        w, _ = train_batch(model, targets, sub, restarts=restarts, epochs=epochs, seed=seed, loss=loss, margem=MARGEM,
+                           profiler=prof)
+        _, margin = evaluate(model, w, targets, sub)
+        for _ in range(margin_steps):
+            v_a, v_bias, _, _ = forward(model, w, sub)[-1]
+            target = np.maximum((y_sign * (v_a - v_bias)).min(axis=-1), MARGEM) * MARGIN_GROWTH
+            w_up, _ = train_batch(model, targets, sub, restarts=restarts, epochs=epochs, seed=seed, loss=loss,
+                                  margem=target[..., None], init=w, profiler=prof)
+            _, margin_up = evaluate(model, w_up, targets, sub)
+            better = margin_up > margin
+            w = np.where(better[(...,) + (None,) * (w.ndim - better.ndim)], w_up, w)
+            margin = np.maximum(margin, margin_up)
+        return w, margin.max(axis=-1)
+
+    if not symmetry:
+        return {table: train(table)[1] for table in tables}, (prof.snapshot() if prof else None)
+
+    best = {}
+    for rep, members in equivalence_classes(tables).items():
+        w, _ = train(rep)
+        for table, transform in members:
+            _, margin = evaluate(model, transform_weights(model, w, transform, const), table_targets(table), const)
+            best[table] = margin.max(axis=-1)
+            # Complemento sem solução derivada: treina a própria tabela nesses pontos
+            missing = best[table] <= 0
+            if not is_exact(transform) and missing.any():
+                best[table][missing] = np.maximum(best[table][missing], train(table, missing)[1])
+    return best, (prof.snapshot() if prof else None)
+
+def sweep(model: str, axes: dict, tables=None, restarts: int = 32, epochs: int = 5000,
+          workers: int = None, chunk: int = 16, seed: int = 0, loss: str = "hinge", profiler=None,
+          symmetry: bool = True, margin_steps: int = MARGIN_STEPS) -> dict:
+    """
+    Mapa de margem por porta: dict tabela -> array com o shape da grade
+    (len(eixo1), len(eixo2), ...). Margem > 0 significa porta resolvível
+    naquele ponto; o valor é a melhor margem entre os restarts, depois de
+    margin_steps rodadas de subida (com 0, fica perto de MARGEM onde resolve).
+    Os blocos têm tamanho fixo e semente própria, então o resultado não
+    depende do número de workers.
+    profiler recebe os tempos por fase de todos os workers, somados.
+    symmetry treina uma tabela por classe de equivalência (analogica.symmetry).
+    """
+    tables = tables or ALL_TABLES
+    points = grid_points(model, axes)
+    size = next(iter(points.values())).size
+    jobs = []
+    for i, start in enumerate(range(0, size, chunk)):
+        block = {name: values[start:start + chunk] for name, values in points.items()}
+        jobs.append((model, tables, block, restarts, epochs, seed + i, loss, profiler is not None, symmetry,
+                     margin_steps))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        results = [sweep_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+            results = list(ex.map(sweep_chunk, jobs))
+
+    if profiler is not None:
+        for _, snapshot in results:
+            profiler.merge(snapshot)
+
+    shape = tuple(len(v) for v in axes.values())
+    return {table: np.concatenate([r[table] for r, _ in results]).reshape(shape) for table in tables}
+
+def print_summary(model: str, axes: dict, maps: dict, margin_steps: int = MARGIN_STEPS):
+    # Sem rodadas de subida a margem só diz se a porta resolve, então não há "melhor margem" para mostrar
+    print(f"=== VARREDURA {model}: " + ", ".join(f"{k} ({len(v)} pts)" for k, v in axes.items()) + " ===")
+    for table, margins in maps.items():
+        name = KNOWN_GATES.get(table, "")
+        ok = margins > 0
+        if not ok.any():
+            print(f"  {table} {name:<10} sem solução na grade (melhor margem {margins.max():+.2f}V)")
+            continue
+        line = f"  {table} {name:<10} resolvível em {ok.mean()*100:5.1f}% da grade"
+        if margin_steps:
+            idx = np.unravel_index(np.argmax(margins), margins.shape)
+            where = ", ".join(f"{k}={v[i]:g}" for (k, v), i in zip(axes.items(), idx))
+            line += f" | melhor margem {margins.max():.2f}V em {where}"
+        print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura de constantes do circuito (mapa de margem por porta)")
+    parser.add_argument("--model", choices=["1N", "3N"], default="1N")
+    parser.add_argument("--grid", action="append", default=[], help="Eixo da grade, ex: GAIN=2:5:7 ou V_SAT=6,7.5")
+    parser.add_argument("--tables", default=None, help="Tabelas separadas por vírgula (padrão: todas as 16)")
+    parser.add_argument("--restarts", type=int, default=32)
+    parser.add_argument("--epochs", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=16, help="Pontos da grade por tarefa")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--loss", default="hinge", help="Perda do registro (hinge, mse, logloss)")
+    parser.add_argument("--out", default=None, help="Salva os mapas em .npz")
+    parser.add_argument("--no-symmetry", action="store_true", help="Treina todas as tabelas, sem derivar as equivalentes")
+    parser.add_argument("--margin-steps", type=int, default=MARGIN_STEPS,
+                        help="Rodadas de subida da margem depois do treino (0: só resolvível ou não)")
+    parser.add_argument("--profile", action="store_true", help="Mostra o tempo por fase do treino (somado entre workers)")
+    parser.add_argument("--profile-out", default=None, help="Exporta o profiling (.json = Chrome trace, outro = collapsed)")
+    args = parser.parse_args()
+
+    axes = dict(parse_axis(spec) for spec in args.grid)
+    tables = args.tables.split(",") if args.tables else None
+    prof = Profiler() if (args.profile or args.profile_out) else None
+    maps = sweep(args.model, axes, tables, args.restarts, args.epochs, args.workers, args.chunk, args.seed, args.loss, prof,
+                 not args.no_symmetry, args.margin_steps)
+    print_summary(args.model, axes, maps, args.margin_steps)
+
+    if prof:
+        print("\n" + prof.report())
+        if args.profile_out:
+            prof.export(args.profile_out)
+
+    if args.out:
+        np.savez(args.out, **{f"axis_{k}": v for k, v in axes.items()}, **{f"margin_{t}": m for t, m in maps.items()})
+        print(f"\nMapas salvos em {args.out}")
@@ -0,0 +1,103 @@
+"""
+Classes de equivalência das tabelas verdade, para a varredura treinar uma
+tabela por classe e derivar as outras.
+
+Transformações (tabela na ordem (0,0), (1,0), (0,1), (1,1)):
+    "swap"       -> troca x1 com x2: as linhas (1,0) e (0,1) trocam de lugar
+                    (ex: INHIBIT A "0100" <-> INHIBIT B "0010"). Nos pesos,
+                    troca w1 com w2 dos neurônios que recebem as entradas.
+                    O divisor é simétrico, então a derivação é exata.
+    "complement" -> inverte a saída. Nos pesos, espelha o neurônio de saída
+                    em torno da referência: w -> 2 Vref / Vsinal - w e
+                    w_bias -> 2 Vref / Valim - w_bias, o que troca o sinal de
+                    Va - Vbias. Só é exato sem saturação (o AmpOp satura em
+                    V_SAT, não em 2 Vref) e com o bias espelhado dentro dos
+                    limites, por isso toda solução derivada é conferida de
+                    novo com o forward.
+
+As 16 tabelas caem em 6 classes; o representante é a menor tabela da classe.
+
+Uso:
+    python -m analogica.symmetry
+"""
+import itertools
+
+import numpy as np
+
+from .model import KNOWN_GATES, layer_constants, weight_bounds
+
+def swap_table(table: str) -> str:
+    return table[0] + table[2] + table[1] + table[3]
+
+def complement_table(table: str) -> str:
+    return "".join("1" if c == "0" else "0" for c in table)
+
+# Transformações na ordem em que são aplicadas ao representante
+TRANSFORMS = [(), ("swap",), ("complement",), ("swap", "complement")]
+TABLE_TRANSFORMS = {"swap": swap_table, "complement": complement_table}
+
+def apply_table(table: str, transform) -> str:
+    for name in transform:
+        table = TABLE_TRANSFORMS[name](table)
+    return table
+
+def canonical(table: str):
+    """
+    Representante da classe e a transformação que leva o representante na
+    tabela: apply_table(rep, transform) == table.
+    """
+    rep = min(apply_table(table, t) for t in TRANSFORMS)
+    transform = next(t for t in TRANSFORMS if apply_table(rep, t) == table)
+    return rep, transform
+
+def equivalence_classes(tables) -> dict:
+    # Representante -> [(tabela, transformação)], na ordem em que as tabelas aparecem
+    classes = {}
+    for table in tables:
+        rep, transform = canonical(table)
+        classes.setdefault(rep, []).append((table, transform))
+    return classes
+
+def _layer_value(v):
+    # Constantes em grade vêm como (G, 1, 1): descarta o eixo S para fazer broadcast com (G, R)
+    v = np.asarray(v, dtype=float)
+    return v[..., 0] if v.ndim >= 2 else v
+
+def swap_inputs(model: str, w):
+    # Troca w1 com w2 de quem recebe x1/x2 (o neurônio no 1N, N1 e N2 no 3N)
+    w = np.array(w, dtype=float)
+    if model == "1N":
+        w[..., [0, 1]] = w[..., [1, 0]]
+    else:
+        w[..., :2, [0, 1]] = w[..., :2, [1, 0]]
+    return w
+
+def mirror_output(model: str, w, const: dict):
+    # Espelha o neurônio de saída em torno da referência (presos aos limites físicos)
+    w = np.array(w, dtype=float)
+    v_signal, v_supply, v_ref, _ = (_layer_value(v) for v in layer_constants(const, model)[-1])
+    out = w if model == "1N" else w[..., 2, :]
+    out[..., 0] = 2 * v_ref / v_signal - out[..., 0]
+    out[..., 1] = 2 * v_ref / v_signal - out[..., 1]
+    out[..., 2] = 2 * v_ref / v_supply - out[..., 2]
+    lo, hi = weight_bounds(model, const)
+    return np.clip(w, lo, hi)
+
+def transform_weights(model: str, w, transform, const: dict):
+    # Pesos de uma solução do representante -> candidatos para apply_table(rep, transform)
+    for name in transform:
+        w = swap_inputs(model, w) if name == "swap" else mirror_output(model, w, const)
+    return w
+
+def is_exact(transform) -> bool:
+    # Só a troca de entradas preserva a solução sempre; o complemento pode falhar
+    return "complement" not in transform
+
+if __name__ == "__main__":
+    tables = ["".join(bits) for bits in itertools.product("01", repeat=4)]
+    classes = equivalence_classes(tables)
+    print(f"{len(tables)} tabelas em {len(classes)} classes:")
+    for rep, members in classes.items():
+        names = ", ".join(f"{t} {KNOWN_GATES.get(t, '')}".strip() + (f" ({'+'.join(tr)})" if tr else "")
+                          for t, tr in members)
+        print(f"  {rep}: {names}")
@@ -0,0 +1,176 @@
+"""
+Treinamento vetorizado: uma população inteira de restarts treinada de uma vez.
+
+A perda é escolhida no registro (analogica.losses: "hinge", "mse", "logloss").
+O gradiente é somado nas 4 linhas da tabela (batch completo) em vez de exemplo
+a exemplo. Cada restart para de andar assim que todas as linhas passam da
+margem, o equivalente vetorizado do "if errors_count == 0: break" dos scripts.
+
+O gradiente vem do autodiff (analogica.autodiff), que enxerga a saturação do
+AmpOp e do bias: peso que só empurra uma tensão já clipada não é mais
+atualizado à toa. Nos clips o treino usa a heurística straight-through parcial
+(clip_st: o gradiente que tira a tensão da saturação passa), não o
+subgradiente exato, que deixa neurônios saturados parados. Regras em GRADIENTS:
+    "autodiff"     -> autodiff com clip_st (padrão)
+    "subgradiente" -> autodiff com o subgradiente exato dos clips (0 fora da faixa)
+    "manual"       -> regra derivada à mão dos scripts (ignora a saturação)
+"""
+import numpy as np
+
+from . import autodiff as ad
+from .losses import get_loss, loss_graph
+from .profiling import NULL_PROFILER
+from .model import (INPUTS, default_constants, forward_1n, forward_3n,
+                    layer_constants, weight_bounds, weight_shape)
+
+def sigmoid(x):
+    # Forma estável para arrays (sem overflow em exp)
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+def sigmoid_derivative(x):
+    s = sigmoid(x)
+    return s * (1 - s)
+
+def init_population(model: str, const: dict, restarts: int, rng, init=None):
+    """
+    Pesos iniciais sorteados em [0, 1] e presos aos limites físicos.
+    init (pesos de uma solução vizinha) substitui o restart 0 (warm-start);
+    uma população inteira (mesmo shape) é usada como está (continuar um treino).
+    """
+    w = rng.uniform(0.0, 1.0, weight_shape(model, const, restarts))
+    if init is not None and np.shape(init) == w.shape:
+        w = np.array(init, dtype=float)
+    elif init is not None:
+        restart0 = (..., 0, slice(None)) if model == "1N" else (..., 0, slice(None), slice(None))
+        w[restart0] = np.asarray(init, dtype=float)
+    lo, hi = weight_bounds(model, const)
+    return np.clip(w, lo, hi)
+
+def autodiff_gradient(model: str, w, targets, const: dict, margem: float, loss="hinge", prof=NULL_PROFILER,
+                      straight_through=True):
+    """
+    Gradiente da perda via autodiff; nos clips, clip_st (straight_through) ou
+    o subgradiente exato.
+    Retorna (grad com o shape de w, restarts que ainda violam a margem).
+    """
+    y_sign = 2.0 * np.asarray(targets, dtype=float) - 1.0
+    with prof.phase("forward"):
+        wt = ad.variable(w)
+        v_a, v_bias, _, _ = ad.forward(model, wt, const, straight_through=straight_through)[-1]
+        z = v_a - v_bias
+    with prof.phase("loss"):
+        total = loss_graph(loss, z, y_sign, margem).sum()
+    with prof.phase("backward"):
+        total.backward()
+    return wt.grad, (y_sign * z.value < margem).any(axis=-1)
+
+def manual_gradient(model: str, w, targets, const: dict, margem: float, loss="hinge", prof=NULL_PROFILER):
+    """
+    Regra derivada à mão dos scripts (ignora a saturação):
+    grad_w = delta * (GAIN / n) * V_signal, com delta = dL/dz da perda, e no 3N
+    o erro chega em N1/N2 por delta3 * w_N3 * sigmoid'(Va - Vbias).
+    """
+    loss = get_loss(loss)
+    y_sign = 2.0 * np.asarray(targets, dtype=float) - 1.0
+    x1, x2 = INPUTS[:, 0], INPUTS[:, 1]
+    layers = layer_constants(const, model)
+    gain = const["GAIN"]
+
+    def neuron_grad(delta, in1, in2, n, layer):
+        dz = gain / n * layer[0]
+        return np.stack([(delta * in1 * dz).sum(axis=-1),
+                         (delta * in2 * dz).sum(axis=-1),
+                         (delta * -layer[1]).sum(axis=-1)], axis=-1)
+
+    if model == "1N":
+        with prof.phase("forward"):
+            v_a, v_bias, n, _ = forward_1n(w, const)
+            z = v_a - v_bias
+        with prof.phase("loss"):
+            delta = loss.grad(z, y_sign, margem)
+        with prof.phase("backward"):
+            grad = neuron_grad(delta, x1, x2, n, layers[0])
+        return grad, (y_sign * z < margem).any(axis=-1)
+
+    with prof.phase("forward"):
+        (va1, vb1, n1, o1), (va2, vb2, n2, o2), (va3, vb3, n3, _) = forward_3n(w, const)
+        z3 = va3 - vb3
+    with prof.phase("loss"):
+        delta3 = loss.grad(z3, y_sign, margem)
+    with prof.phase("backward"):
+        grads = []
+        for k, (va, vb, n) in enumerate([(va1, vb1, n1), (va2, vb2, n2)]):
+            delta = delta3 * w[..., 2, k, None] * sigmoid_derivative(va - vb)
+            grads.append(neuron_grad(delta, x1, x2, n, layers[k]))
+        grads.append(neuron_grad(delta3, o1, o2, n3, layers[2]))
+        grad = np.stack(grads, axis=-2)
+    return grad, (y_sign * z3 < margem).any(axis=-1)
+
+def subgradient(model: str, w, targets, const: dict, margem: float, loss="hinge", prof=NULL_PROFILER):
+    return autodiff_gradient(model, w, targets, const, margem, loss, prof, straight_through=False)
+
+GRADIENTS = {"autodiff": autodiff_gradient, "subgradiente": subgradient, "manual": manual_gradient}
+
+def train_population(model: str, targets, const=None, restarts=64, epochs=20000, lr=0.001, margem=0.3,
+                     momentum=0.0, seed=None, init=None, gradient="autodiff", loss="hinge", profiler=None, stop="all"):
+    """
+    Laço de treino comum ao 1N e ao 3N.
+    profiler (analogica.profiling.Profiler) acumula o tempo de cada fase da época.
+    stop="all" treina até todos os restarts convergirem; stop="any" para cada
+    grupo (eixos antes de R, ex: pedidos empilhados) no primeiro restart que
+    converge, para um grupo difícil não segurar os outros.
+    Retorna (w, epocas): pesos (..., R, 3[, 3]) e épocas usadas por restart (..., R).
+    """
+    prof = profiler or NULL_PROFILER
+    with prof.phase("treino"):
+        return _train_loop(model, targets, const, restarts, epochs, lr, margem, momentum, seed, init, gradient, loss, prof,
+                           stop)
+
+def _train_loop(model, targets, const, restarts, epochs, lr, margem, momentum, seed, init, gradient, loss, prof, stop):
+    const = const or default_constants(model)
+    rng = np.random.default_rng(seed)
+    w = init_population(model, const, restarts, rng, init)
+    lo, hi = weight_bounds(model, const)
+    vel = np.zeros_like(w)
+    gradient = GRADIENTS[gradient]
+    epocas = np.zeros(w.shape[:-2] if model == "3N" else w.shape[:-1], dtype=int)
+
+    for epoch in range(epochs):
+        grad, active = gradient(model, w, targets, const, margem, loss, prof)
+        if stop == "any":
+            active = active & active.all(axis=-1, keepdims=True)
+        if not active.any():
+            break
+        epocas += active
+
+        # Restart que já convergiu fica parado (inclusive o momentum)
+        with prof.phase("clip"):
+            mask = active[(...,) + (None,) * (w.ndim - active.ndim)]
+            vel = np.where(mask, momentum * vel + lr * grad, 0.0)
+            w = np.clip(w - vel, lo, hi)
+
+    return w, epocas
+
+def train_neuron_batch(targets, const=None, restarts=64, epochs=20000, lr=0.001, margem=0.3, seed=None, init=None,
+                       gradient="autodiff", loss="hinge", profiler=None, stop="all"):
+    """
+    Versão vetorizada do train_neuron (1 neurônio).
+    targets: saídas desejadas na ordem de INPUTS.
+    """
+    return train_population("1N", targets, const, restarts, epochs, lr, margem, 0.0, seed, init, gradient, loss, profiler,
+                            stop)
+
+def train_network_batch(targets, const=None, restarts=64, epochs=20000, lr=0.005, margem=0.3, momentum=0.9, seed=None, init=None,
+                        gradient="autodiff", loss="hinge", profiler=None, stop="all"):
+    """
+    Versão vetorizada do train_network (Backprop com Momentum, 3 neurônios).
+    O erro chega em N1/N2 pela derivada da sigmoide (surrogate do comparador).
+    """
+    return train_population("3N", targets, const, restarts, epochs, lr, margem, momentum, seed, init, gradient, loss, profiler,
+                            stop)
+
+def train_batch(model: str, targets, const=None, **kwargs):
+    # Atalho: escolhe o treinador vetorizado pelo modelo ("1N" ou "3N")
+    if model == "1N":
+        return train_neuron_batch(targets, const, **kwargs)
+    return train_network_batch(targets, const, **kwargs)
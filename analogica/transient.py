@@ -0,0 +1,311 @@
+"""
+Modelo transitório dos neurônios: o forward de model.py é estático, mas o
+LM324 real tem slew rate e banda finitos (capacitores C1/C2 do macromodelo
+em ltspice/LM324.ti.lib), e no 3N os comparadores ocultos ainda precisam
+virar antes que N3 comece a andar.
+
+Cada AmpOp (amplificador e comparador) vira uma EDO de dois polos discretizada
+com passo fixo (Euler), vetorizada sobre (..., R, T), T = transições de entrada:
+    ds/dt = clip(wp * (A0 * vd - s), -SLEW, +SLEW)  -> polo dominante (C2)
+    dz/dt = w2 * (s - z),  y = clip(z, 0, v_sat)    -> segundo polo (C1), y = saída
+    amplificador: vd = v_in - (v_ref + (y - v_ref) / GAIN)  (realimentação 220k/100k)
+    comparador:   vd = v_a - v_bias                         (malha aberta)
+O nó interno s pode passar WINDUP volts além dos trilhos (limite de corrente
+HLIM/VLIM sobre RO1 no macromodelo): um AmpOp saturado leva WINDUP / SLEW a
+mais para sair da saturação, o que pesa nos comparadores, que vivem saturados.
+O divisor de entrada é resistivo (instantâneo). No 3N as chaves de N3 seguem
+a saída dos comparadores ocultos com o limiar/histerese do .model sw do .asc,
+e os pots de peso de N3 são alimentados por essa mesma saída (L2_SIGNAL em regime).
+
+O tempo 0 de cada transição é o instante em que as chaves de entrada viram.
+Para cada uma das 12 transições entre linhas da tabela:
+    settle -> último instante em que a saída está fora de tol do valor final
+    delay  -> quando a saída cruza v_sat/2 para o lado certo (nan se não muda)
+    glitch -> a saída cruzou v_sat/2 numa transição em que não devia mudar
+
+Uso:
+    python -m analogica.transient --validate
+    python -m analogica.transient --model 3N --table 0110
+"""
+import argparse
+import math
+import os
+
+import numpy as np
+
+from .ltspice import LM324_LIB, LTSPICE_DIR, read_raw, read_subckt, spice_value
+from .model import INPUTS, KNOWN_GATES, default_constants, forward, layer_constants
+from .stream import solution_weights
+
+DT = 20e-9          # Passo da integração (s), bem abaixo de 1/W2 (~90 ns)
+T_MAX = 200e-6      # Horizonte de cada transição (s)
+SETTLE_TOL = 0.01   # Tolerância de acomodação (fração de v_sat)
+
+# Chaves controladas por tensão do 3N (.model sw SW(Vt=2.5 Vh=0.2 ...))
+SWITCH_VT = 2.5
+SWITCH_VH = 0.2
+
+EDGE_MERGE = 1e-6   # Trocas das fontes mais próximas que isso são a mesma transição (s)
+
+# Todas as transições entre linhas da tabela (origem, destino), na ordem de INPUTS
+TRANSITIONS = [(i, j) for i in range(len(INPUTS)) for j in range(len(INPUTS)) if i != j]
+
+# Simulação transitória que acompanha o projeto: XNOR de 3 neurônios.
+# Pesos tirados das fontes W1..W6, W9 e do .param w7/w8 do .asc (tensão / alimentação
+# da camada); nós identificados pelos níveis estáticos de cada linha da tabela.
+TRACE_3N = {
+    "path": os.path.join(LTSPICE_DIR, "Draft1 (perceptron) - 3N.raw"),
+    "weights": [[5.78 / 9.0, 0.97 / 9.0, 1.58 / 9.0],
+                [7.03 / 9.0, 1.83 / 9.0, 7.46 / 9.0],
+                [4.88 / 7.5, 1.32 / 7.5, 4.14 / 7.5]],
+    "inputs": ("V(sw1)", "V(sw2)"),
+    "input_vt": 2.5,
+    "nodes": {"N1": "V(n005)", "N2": "V(n020)", "N3": "V(n012)"},
+}
+
+def opamp_params(path: str = LM324_LIB) -> dict:
+    """
+    Parâmetros dinâmicos do macromodelo de Boyle do LM324:
+      GBW  = GA / (2 pi C2)            produto ganho-banda (Hz)
+      SLEW = IEE / C2                  slew rate (V/s)
+      A0   = GA * FB * RO2             ganho DC em malha aberta
+      F2   = 1 / (2 pi (RC1 + RC2) C1) segundo polo (Hz)
+      WINDUP = VLP / HLIM * RO1        quanto o nó interno passa do trilho na saturação (V)
+    """
+    elements = read_subckt(path)
+    c1 = spice_value(elements["C1"][3])
+    c2 = spice_value(elements["C2"][3])
+    ga = spice_value(elements["GA"][5])
+    iee = spice_value(elements["IEE"][-1])
+    rc = spice_value(elements["RC1"][3]) + spice_value(elements["RC2"][3])
+    ro1 = spice_value(elements["RO1"][3])
+    ro2 = spice_value(elements["RO2"][3])
+    # FB 7 99 POLY(5) VB VC VE VLP VLN c0 c1 ... -> c1 multiplica a corrente de VB
+    fb = spice_value(elements["FB"][10])
+    i_lim = spice_value(elements["VLP"][-1]) / spice_value(elements["HLIM"][-1])
+
+    gbw = ga / (2 * math.pi * c2)
+    a0 = ga * fb * ro2
+    f2 = 1.0 / (2 * math.pi * rc * c1)
+    # WP/W2: polos em rad/s, usados na integração
+    return {"GBW": gbw, "SLEW": iee / c2, "A0": a0, "F2": f2, "WINDUP": i_lim * ro1,
+            "WP": 2 * math.pi * gbw / a0, "W2": 2 * math.pi * f2}
+
+class _OpAmp:
+    # Estado de um AmpOp da população: nó interno s, segundo polo z e saída y
+    __slots__ = ("s", "z", "y", "v_sat")
+
+    def __init__(self, drive, v_sat, amp):
+        # drive: tensão que a saída teria sem os trilhos (regime estático)
+        self.v_sat = v_sat
+        self.s = np.clip(drive, -amp["WINDUP"], v_sat + amp["WINDUP"])
+        self.z = self.s.copy()
+        self.y = np.clip(self.z, 0.0, v_sat)
+
+    def step(self, vd, amp, dt):
+        ds = np.clip(amp["WP"] * (amp["A0"] * vd - self.s), -amp["SLEW"], amp["SLEW"])
+        self.s = np.clip(self.s + dt * ds, -amp["WINDUP"], self.v_sat + amp["WINDUP"])
+        self.z = self.z + dt * amp["W2"] * (self.s - self.z)
+        self.y = np.clip(self.z, 0.0, self.v_sat)
+        return self.y
+
+def _divider(w, x1, x2, s1, s2, v_ref):
+    # Mesmo divisor de model.neuron (resistivo, sem dinâmica); s1/s2 = tensão sobre cada pot de peso
+    return (v_ref + x1 * (w[..., 0, None] * s1) + x2 * (w[..., 1, None] * s2)) / (1.0 + x1 + x2)
+
+def simulate(model: str, w, const=None, amp=None, transitions=TRANSITIONS, dt=DT, t_max=T_MAX,
+             tol=SETTLE_TOL, record=False) -> dict:
+    """
+    Integra todas as transições de toda a população de uma vez.
+    w: (..., R, 3) ou (..., R, 3, 3). Retorna dict com arrays (..., R, T):
+      "settle", "delay", "glitch" (ver docstring do módulo)
+    e, com record=True, "t" e "trace": nome do nó -> (passos, ..., R, T).
+    """
+    const = const or default_constants(model)
+    amp = amp or opamp_params()
+    w = np.asarray(w, dtype=float)
+    src = np.array([i for i, _ in transitions])
+    dst = np.array([j for _, j in transitions])
+    layers = layer_constants(const, model)
+    gain = const["GAIN"]
+
+    # Estado inicial = regime estático na linha de origem; entradas já na linha de destino
+    static = forward(model, w, const)
+    x1, x2 = INPUTS[dst, 0], INPUTS[dst, 1]
+    wn = [w] if model == "1N" else [w[..., k, :] for k in range(3)]
+
+    amps, comps = [], []
+    for h, ((_, v_b, _, out), layer) in enumerate(zip(static, layers)):
+        if h < 2 or model == "1N":
+            in1, in2 = INPUTS[src, 0], INPUTS[src, 1]
+        else:
+            in1, in2 = static[0][3][..., src], static[1][3][..., src]
+        drive = layer[2] + gain * (_divider(wn[h], in1, in2, layer[0], layer[0], layer[2]) - layer[2])
+        amps.append(_OpAmp(drive, layer[3], amp))
+        # Comparador saturado: nó interno todo para o lado da saída
+        comps.append(_OpAmp(np.where(out[..., src] > 0, np.inf, -np.inf), layer[3], amp))
+    v_bias = [np.clip(wk[..., 2, None] * layer[1], 0.0, layer[3]) for wk, layer in zip(wn, layers)]
+    switch = [out[..., src] for (_, _, _, out) in static[:-1]]  # chaves de N3 (0/1)
+
+    v_sat = layers[-1][3]
+    final = static[-1][3][..., dst] * v_sat
+    mid = v_sat / 2
+    side = final > mid
+    changes = static[-1][3][..., dst] != static[-1][3][..., src]
+
+    shape = np.broadcast_shapes(final.shape, comps[-1].y.shape)
+    late = np.zeros(shape)
+    delay = np.full(shape, np.nan)
+    glitch = np.zeros(shape, dtype=bool)
+    steps = int(round(t_max / dt))
+    trace = {}
+    names = ["N1"] if model == "1N" else ["N1", "N2", "N3"]
+
+    for k in range(1, steps + 1):
+        t = k * dt
+        n_hidden = len(amps) - 1
+        for h in range(len(amps)):
+            layer = layers[h]
+            if h < n_hidden or model == "1N":
+                v_in = _divider(wn[h], x1, x2, layer[0], layer[0], layer[2])
+            else:
+                # Os pots de peso de N3 são alimentados pela própria saída dos ocultos
+                s1, s2 = (comps[k].y * (layer[0] / layers[k][3]) for k in range(2))
+                v_in = _divider(wn[h], switch[0], switch[1], s1, s2, layer[2])
+            v_a = amps[h].step(v_in - (layer[2] + (amps[h].y - layer[2]) / gain), amp, dt)
+            out = comps[h].step(v_a - v_bias[h], amp, dt)
+            if h < n_hidden:
+                # Chave com histerese: liga acima de Vt + Vh, desliga abaixo de Vt - Vh
+                switch[h] = np.where(out > SWITCH_VT + SWITCH_VH, 1.0,
+                                     np.where(out < SWITCH_VT - SWITCH_VH, 0.0, switch[h]))
+            if record:
+                trace.setdefault(names[h], []).append(out)
+                trace.setdefault(names[h] + ".va", []).append(v_a)
+
+        y = comps[-1].y
+        right_side = (y > mid) == side
+        late = np.where(np.abs(y - final) > tol * v_sat, t, late)
+        delay = np.where(np.isnan(delay) & changes & right_side, t, delay)
+        glitch |= ~changes & ~right_side
+
+    settle = np.where(late >= steps * dt, np.inf, late)
+    res = {"settle": settle, "delay": delay, "glitch": glitch, "transitions": transitions}
+    if record:
+        res["t"] = np.arange(1, steps + 1) * dt
+        res["trace"] = {name: np.stack(values) for name, values in trace.items()}
+    return res
+
+def timing_report(model: str, w, const=None, **kwargs) -> dict:
+    """
+    Resumo por restart (..., R):
+      settle_max -> pior tempo de acomodação entre as transições (s)
+      delay_max  -> pior atraso de propagação (s)
+      worst      -> índice em TRANSITIONS da transição mais lenta
+      glitches   -> número de transições com glitch na saída
+      max_rate   -> maior taxa de troca de entradas suportada (1 / settle_max, Hz)
+    """
+    res = simulate(model, w, const, **kwargs)
+    settle_max = res["settle"].max(axis=-1)
+    return {
+        "settle_max": settle_max,
+        "delay_max": np.nanmax(np.where(np.isnan(res["delay"]), -np.inf, res["delay"]), axis=-1),
+        "worst": res["settle"].argmax(axis=-1),
+        "glitches": res["glitch"].sum(axis=-1),
+        "max_rate": 1.0 / settle_max,
+        "detail": res,
+    }
+
+def _measure(t, v, t0, t1, v_sat, tol=SETTLE_TOL):
+    # Atraso (cruzamento de v_sat/2) e acomodação de uma forma de onda entre t0 e t1
+    window = (t > t0) & (t < t1)
+    tt, vv = t[window], v[window]
+    final = vv[-1]
+    before = v[t <= t0][-1]
+    delay = np.nan
+    if (before > v_sat / 2) != (final > v_sat / 2):
+        delay = tt[np.argmax((vv > v_sat / 2) == (final > v_sat / 2))] - t0
+    out = np.abs(vv - final) > tol * v_sat
+    settle = tt[out].max() - t0 if out.any() else 0.0
+    return delay, settle
+
+def validate_trace(trace=TRACE_3N, amp=None, dt=DT) -> list:
+    """
+    Compara o modelo com a simulação transitória do LTspice: para cada troca
+    das fontes de entrada, atraso e acomodação de cada comparador medidos no
+    .raw e previstos por simulate() com os mesmos pesos.
+    """
+    _, data = read_raw(trace["path"])
+    t = data["time"]
+    bits = np.stack([data[name] > trace["input_vt"] for name in trace["inputs"]], axis=-1).astype(int)
+    rows_of = {tuple(r): k for k, r in enumerate(INPUTS.astype(int))}
+    row = np.array([rows_of[tuple(b)] for b in bits])
+    edges = np.nonzero(np.diff(row))[0] + 1
+    # Fontes que trocam juntas (ex: 10 -> 01) passam um instante por 11; vira uma troca só
+    edges = edges[np.concatenate([[True], np.diff(t[edges]) > EDGE_MERGE])]
+    # Fim da janela de cada troca: a próxima troca (ou o fim da simulação)
+    ends = list(t[edges[1:]]) + [t[-1]]
+
+    model = "3N" if len(trace["nodes"]) == 3 else "1N"
+    const = default_constants(model)
+    v_sats = [layer[3] for layer in layer_constants(const, model)]
+    settled = list(edges[1:] - 1) + [len(row) - 1]
+    transitions = [(row[e - 1], row[k]) for e, k in zip(edges, settled)]
+    # As trocas do .raw são espaçadas de segundos; o modelo só precisa do começo de cada janela
+    sim = simulate(model, np.asarray(trace["weights"])[None], const, amp, transitions, dt, 2 * T_MAX, record=True)
+
+    results = []
+    for k, (e, end) in enumerate(zip(edges, ends)):
+        for (name, node), v_sat in zip(trace["nodes"].items(), v_sats):
+            measured = _measure(t, data[node], t[e], end, v_sat)
+            v_model = sim["trace"][name][:, 0, k]
+            predicted = _measure(np.concatenate([[0.0], sim["t"]]),
+                                 np.concatenate([[v_model[0]], v_model]), 0.0, sim["t"][-1] + dt, v_sat)
+            results.append({"t": float(t[e]), "from": int(transitions[k][0]), "to": int(transitions[k][1]),
+                            "node": name, "delay_spice": measured[0], "delay_model": predicted[0],
+                            "settle_spice": measured[1], "settle_model": predicted[1]})
+    return results
+
+def _row_name(k: int) -> str:
+    return "".join(str(int(b)) for b in INPUTS[k])
+
+def _us(x) -> str:
+    return "-" if x is None or np.isnan(x) else ("inf" if np.isinf(x) else f"{x * 1e6:.1f}µs")
+
+def print_validation(results):
+    print(f"{'t (s)':>6} {'Entrada':>9} {'Nó':>3} {'Atraso SPICE':>13} {'Modelo':>9} {'Acomod. SPICE':>14} {'Modelo':>9}")
+    for r in results:
+        step = f"{_row_name(r['from'])}->{_row_name(r['to'])}"
+        print(f"{r['t']:6.1f} {step:>9} {r['node']:>3} {_us(r['delay_spice']):>13} {_us(r['delay_model']):>9} "
+              f"{_us(r['settle_spice']):>14} {_us(r['settle_model']):>9}")
+
+def print_report(report, transitions=TRANSITIONS):
+    detail = report["detail"]
+    for r in range(report["settle_max"].shape[-1]):
+        worst = transitions[report["worst"][..., r]]
+        print(f"Restart {r}: acomodação {_us(report['settle_max'][..., r])} "
+              f"(pior: {_row_name(worst[0])}->{_row_name(worst[1])}), atraso {_us(report['delay_max'][..., r])}, "
+              f"glitches {report['glitches'][..., r]}, taxa máx. {report['max_rate'][..., r] / 1e3:.1f} kHz")
+        for (i, j), s, d, g in zip(transitions, detail["settle"][..., r, :], detail["delay"][..., r, :],
+                                   detail["glitch"][..., r, :]):
+            print(f"    {_row_name(i)}->{_row_name(j)}: acomodação {_us(s):>8}  atraso {_us(d):>8}{'  GLITCH' if g else ''}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tempo de acomodação e atraso de propagação de uma solução")
+    parser.add_argument("--validate", action="store_true", help="Compara com a simulação transitória do LTspice (3N)")
+    parser.add_argument("--model", choices=["1N", "3N"], default="3N")
+    parser.add_argument("--table", default="0110")
+    parser.add_argument("--restarts", type=int, default=64, help="Restarts se a tabela não estiver no banco")
+    parser.add_argument("--dt", type=float, default=DT)
+    args = parser.parse_args()
+
+    amp = opamp_params()
+    print(f"LM324 ({os.path.basename(LM324_LIB)}): GBW {amp['GBW'] / 1e6:.2f} MHz, slew {amp['SLEW'] / 1e6:.2f} V/µs, "
+          f"A0 {amp['A0']:.3g}, 2º polo {amp['F2'] / 1e6:.2f} MHz\n")
+
+    if args.validate:
+        print_validation(validate_trace(amp=amp, dt=args.dt))
+    else:
+        # Mesma busca do stream: entrada do banco com a mesma tabela, conferida por evaluate
+        w, source = solution_weights(args.model, args.table, args.restarts)
+        print(f"{args.table} {KNOWN_GATES.get(args.table, '')}: pesos ({source})")
+        print_report(timing_report(args.model, w[None], amp=amp, dt=args.dt))
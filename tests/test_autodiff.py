@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from analogica import autodiff as ad
+from analogica.model import default_constants, forward
+
+H = 1e-6
+
+def neuron_z(model, w, const):
+    # z = Va - Vbias de cada neurônio pelo modelo NumPy, (..., R, S, N)
+    return np.stack([v_a - v_bias for v_a, v_bias, _, _ in forward(model, w, const)], axis=-1)
+
+@pytest.mark.parametrize("model", ["1N", "3N"])
+def test_clip_gradient_matches_finite_differences(model):
+    # Com o clip exato, o gradiente de z de cada neurônio em relação aos próprios pots é a derivada do modelo
+    const = default_constants(model)
+    rng = np.random.default_rng(1)
+    shape = (128, 3) if model == "1N" else (128, 3, 3)
+    w = rng.uniform(0.05, 0.95, shape)
+    coef = rng.normal(size=neuron_z(model, w, const).shape)
+
+    for k in range(1 if model == "1N" else 3):
+        wt = ad.variable(w)
+        res = ad.forward(model, wt, const)
+        ((res[k][0] - res[k][1]) * coef[..., k]).sum().backward()
+        for j in range(3):
+            idx = (..., j) if model == "1N" else (..., k, j)
+            up, down = w.copy(), w.copy()
+            up[idx] += H
+            down[idx] -= H
+            fd = ((neuron_z(model, up, const) - neuron_z(model, down, const))[..., k] * coef[..., k]).sum(axis=-1) / (2 * H)
+            np.testing.assert_allclose(wt.grad[idx], fd, atol=1e-5)
+
+def test_clip_st_only_passes_gradient_back_into_range():
+    x = ad.variable(np.array([-1.0, -1.0, 0.5, 2.0, 2.0]))
+    y = ad.clip_st(x, 0.0, 1.0)
+    # Descida é -g: g < 0 empurra x para cima, g > 0 para baixo
+    (y * ad.lift(np.array([-1.0, 1.0, 1.0, 1.0, -1.0]))).sum().backward()
+    np.testing.assert_array_equal(x.grad, [-1.0, 0.0, 1.0, 1.0, 0.0])
+    x = ad.variable(np.array([-1.0, 0.5, 2.0]))
+    ad.clip(x, 0.0, 1.0).sum().backward()
+    np.testing.assert_array_equal(x.grad, [0.0, 1.0, 0.0])
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from analogica import autodiff as ad
+from analogica.losses import LOSSES, get_loss, loss_graph
+
+MARGEM = 0.3
+
+@pytest.fixture(params=sorted(LOSSES))
+def loss(request):
+    return get_loss(request.param)
+
+def points():
+    # z longe das quinas (y*z == margem), onde hinge e mse não são deriváveis
+    z = np.linspace(-2.0, 2.0, 41)[:, None] + np.array([0.013, 0.037])
+    y_sign = np.array([1.0, -1.0])
+    return z, y_sign
+
+def test_grad_matches_finite_difference(loss):
+    z, y_sign = points()
+    h = 1e-6
+    numeric = (loss.value(z + h, y_sign, MARGEM) - loss.value(z - h, y_sign, MARGEM)) / (2 * h)
+    np.testing.assert_allclose(loss.grad(z, y_sign, MARGEM), numeric, atol=1e-6)
+
+def test_zero_past_margin(loss):
+    # Hinge e mse zeram quando a linha passa da margem; logloss só fica pequena
+    z, y_sign = points()
+    past = y_sign * z > MARGEM + 1.5
+    if loss.name == "logloss":
+        assert (loss.value(z, y_sign, MARGEM)[past] < 0.2).all()
+    else:
+        assert (loss.value(z, y_sign, MARGEM)[past] == 0).all()
+        assert (loss.grad(z, y_sign, MARGEM)[past] == 0).all()
+
+def test_graph_backward_uses_registry_grad(loss):
+    z, y_sign = points()
+    zt = ad.variable(z)
+    loss_graph(loss.name, zt, y_sign, MARGEM).sum().backward()
+    np.testing.assert_array_equal(zt.grad, loss.grad(z, y_sign, MARGEM))
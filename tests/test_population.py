@@ -0,0 +1,32 @@
+import numpy as np
+
+from analogica.model import default_constants, evaluate, table_targets
+from analogica.population import chunk_size, open_population, record_dtype, search, summary, top_k
+
+def test_record_layout():
+    dtype = record_dtype("3N")
+    assert dtype.itemsize == 53
+    assert dtype["w"].base == np.float32 and dtype["w"].shape == (3, 3)
+    assert dtype["margin"].base == np.float32 and dtype["margin"].shape == (4,)
+    assert dtype["errors"] == np.uint8
+    assert record_dtype("1N")["w"].shape == (3,)
+
+def test_file_round_trip_matches_ram_and_workers(tmp_path):
+    n = 10_007
+    ram = search("3N", "0110", n, max_ram=0.1, seed=3)
+    path = str(tmp_path / "pop.npy")
+    disk = search("3N", "0110", n, path, max_ram=0.1, workers=2, seed=3)
+    assert chunk_size("3N", 0.1) < n  # Vários blocos
+    assert disk.dtype == record_dtype("3N")
+    reopened = open_population(path)
+    for field in ("w", "margin", "errors"):
+        np.testing.assert_array_equal(ram[field], reopened[field])
+    assert summary(reopened, chunk=999) == summary(ram)
+    np.testing.assert_array_equal(top_k(reopened, 5, chunk=1000), np.argsort(-ram["margin"].min(axis=-1))[:5])
+
+def test_margins_match_evaluate():
+    targets = table_targets("0110")
+    pop = search("3N", "0110", 4096, seed=0)
+    errors, margin = evaluate("3N", pop["w"].astype(float), targets, default_constants("3N"))
+    np.testing.assert_array_equal(pop["errors"], errors)
+    np.testing.assert_allclose(pop["margin"].min(axis=-1), margin, atol=1e-5)
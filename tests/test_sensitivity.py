@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from analogica.model import table_targets
+from analogica.sensitivity import jacobian, sensitivity_report
+from analogica.train import train_batch
+
+H = 1e-6
+
+def finite_difference(model, w, targets):
+    # Diferença central da margem por neurônio em relação a cada pot do próprio neurônio
+    margin, _ = jacobian(model, w, targets)
+    fd = np.zeros(margin.shape + (3,))
+    for k in range(margin.shape[-1]):
+        for j in range(3):
+            idx = (..., j) if model == "1N" else (..., k, j)
+            up, down = w.copy(), w.copy()
+            up[idx] += H
+            down[idx] -= H
+            fd[..., k, j] = (jacobian(model, up, targets)[0][..., k] - jacobian(model, down, targets)[0][..., k]) / (2 * H)
+    return fd
+
+def test_saturated_row_has_zero_slope():
+    # 1N AND com w = [0.9, 0.9, 0.5]: a linha (1,1) satura o Va em V_SAT
+    w = np.array([[0.9, 0.9, 0.5]])
+    targets = table_targets("0001")
+    _, jac = jacobian("1N", w, targets)
+    fd = finite_difference("1N", w, targets)
+    assert jac[0, 3, 0, 0] == 0.0 and jac[0, 3, 0, 1] == 0.0
+    np.testing.assert_allclose(jac, fd, atol=1e-6)
+
+@pytest.mark.parametrize("model,table", [("1N", "0001"), ("1N", "0111"), ("3N", "0110"), ("3N", "1001")])
+def test_jacobian_matches_finite_differences(model, table):
+    rng = np.random.default_rng(0)
+    shape = (256, 3) if model == "1N" else (256, 3, 3)
+    w = rng.uniform(0.05, 0.95, shape)
+    targets = table_targets(table)
+    _, jac = jacobian(model, w, targets)
+    fd = finite_difference(model, w, targets)
+    # Longe das quinas (clips, troca de saída dos ocultos) a derivada é exata
+    smooth = np.abs(fd) < 1e3
+    assert smooth.mean() > 0.99
+    np.testing.assert_allclose(jac[smooth], fd[smooth], atol=1e-5)
+    # Parte das linhas satura: o teste cobre os dois trechos
+    assert (jac[..., :2] == 0).any() and (jac[..., :2] != 0).any()
+
+@pytest.mark.parametrize("model,table", [("1N", "0001"), ("3N", "0110")])
+def test_report_trim_matches_printed_slope(model, table):
+    # O trim de cada pot sai da derivada que o relatório mostra, na linha crítica
+    targets = table_targets(table)
+    w, _ = train_batch(model, targets, restarts=32, epochs=5000, seed=0)
+    margin, _ = jacobian(model, w, targets)
+    report = sensitivity_report(model, w, targets)
+    own = np.maximum(np.repeat(margin, 3, axis=-1), 0.0)
+    row = report["worst"][..., None, :]
+    slope = np.abs(np.take_along_axis(report["jac"], row, axis=-2))[..., 0, :]
+    tight = report["trim"] < 1.0
+    assert tight.any() and (slope[tight] > 0).all()
+    own_row = np.take_along_axis(own, row, axis=-2)[..., 0, :]
+    np.testing.assert_allclose(report["trim"][tight], own_row[tight] / slope[tight])
@@ -0,0 +1,31 @@
+import asyncio
+
+from analogica.server import JobServer, normalize, train_group
+
+def finish(result, margem=0.3):
+    # Resolve um pedido 3N XOR pelo _finish e devolve o cache do servidor
+    server = JobServer(workers=1, store_path=None)
+    job = normalize({"model": "3N", "table": "0110", "margem": margem})
+
+    async def run():
+        future = server.inflight["k"] = asyncio.get_running_loop().create_future()
+        server._finish("k", job, result)
+        return await future
+
+    try:
+        assert asyncio.run(run()) is result
+        return server.cache
+    finally:
+        server.close()
+
+def test_below_requested_margin_is_not_cached():
+    assert finish({"weights": [], "margin": 0.072, "errors": 0}) == {}
+
+def test_requested_margin_is_cached():
+    assert list(finish({"weights": [], "margin": 0.3, "errors": 0}).values())[0]["margin"] == 0.3
+
+def test_stopped_group_has_requested_margin():
+    # 3N XOR: o restart que para pela perda tem margem só na saída; o trecho continua até a margem de evaluate
+    job = normalize({"model": "3N", "table": "0110", "margem": 0.3})
+    (result,) = train_group(("3N", "hinge", 64, 2000, 0, [job], [None]))
+    assert result["errors"] == 0 and result["margin"] >= 0.3
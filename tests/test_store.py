@@ -0,0 +1,35 @@
+import pytest
+
+from analogica.model import default_constants
+from analogica.store import SolutionStore, constants_distance
+
+CONST = {"GAIN": 3.2, "V_SAT": 7.5}
+
+def store_with(tmp_path, *entries):
+    store = SolutionStore(str(tmp_path / "solucoes.json"))
+    for table, constants, margin in entries:
+        store.add("1N", table, constants, [0.5, 0.5, 0.5], margin)
+    return store
+
+def test_constants_distance():
+    assert constants_distance(CONST, dict(CONST)) == 0.0
+    assert constants_distance(CONST, {**CONST, "GAIN": 1.6}) == pytest.approx(0.5)
+    # Constante que só um dos lados tem conta 1, qualquer que seja o valor
+    assert constants_distance(CONST, {**CONST, "MARGEM": 0.3}) == 1.0
+
+def test_nearest_ranks_table_then_constants_then_margin(tmp_path):
+    store = store_with(tmp_path, ("0001", CONST, 0.3), ("0001", {**CONST, "GAIN": 3.0}, 0.9),
+                       ("0111", CONST, 0.5), ("0000", CONST, 0.4))
+    assert store.nearest("1N", "0001", CONST)["margin"] == 0.3
+    assert store.nearest("1N", "0001", {**CONST, "GAIN": 3.05})["constants"]["GAIN"] == 3.0
+    # 0011 está a uma linha de 0001 e de 0111 (e a duas de 0000): no empate ganha a maior margem
+    assert store.nearest("1N", "0011", CONST)["table"] == "0111"
+    assert store.nearest("3N", "0001", CONST) is None
+
+def test_nearest_missing_key_counts_one(tmp_path):
+    # Entrada salva pelos scripts (com MARGEM) buscada com as constantes do modelo (sem MARGEM)
+    const = default_constants("1N")
+    store = store_with(tmp_path, ("0001", {**const, "MARGEM": 0.3}, 0.3))
+    assert store.nearest("1N", "0001", const, max_distance=0) is None
+    assert store.nearest("1N", "0001", const, max_distance=1)["table"] == "0001"
+    assert store.nearest("1N", "0001", {**const, "MARGEM": 0.3}, max_distance=0)["table"] == "0001"
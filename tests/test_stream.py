@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from analogica.model import INPUTS, forward
+from analogica.stream import StreamEvaluator, open_stream, random_stream, row_index
+
+@pytest.fixture(params=["1N", "3N"])
+def network(request):
+    rng = np.random.default_rng(0)
+    model = request.param
+    return model, rng.uniform(0.0, 1.0, (3,) if model == "1N" else (3, 3))
+
+def reference(model, w, idx):
+    # Saída amostra a amostra pelo forward vetorizado, com as entradas da própria sequência
+    return forward(model, w[None], inputs=INPUTS[idx])[-1][3][0].astype(np.uint8)
+
+def test_formats_match_forward(network):
+    model, w = network
+    idx = next(random_stream(5000, "index", seed=1))
+    expected = reference(model, w, idx)
+    bits = np.stack([idx & 1, idx >> 1], axis=-1).astype(np.uint8)
+    np.testing.assert_array_equal(row_index(bits), idx)
+    packed = (idx[0::4] | (idx[1::4] << 2) | (idx[2::4] << 4) | (idx[3::4] << 6)).astype(np.uint8)
+    for chunk, fmt in ((idx, "index"), (bits, "bits"), (packed, "packed")):
+        np.testing.assert_array_equal(StreamEvaluator(model, w).map(chunk, fmt), expected)
+
+def test_edges_across_chunks(network, tmp_path):
+    model, w = network
+    idx = next(random_stream(10_000, "index", seed=2))
+    expected = reference(model, w, idx)
+    path = str(tmp_path / "log.bin")
+    idx.tofile(path)
+
+    evaluator = StreamEvaluator(model, w, stats=True)
+    positions, values = [], []
+    offset = 0
+    for chunk in open_stream(path, "index", chunk=777):
+        pos, val = evaluator.events(chunk, "index", offset)
+        positions.append(pos)
+        values.append(val)
+        offset += len(chunk)
+    changes = np.flatnonzero(expected[1:] != expected[:-1]) + 1
+    np.testing.assert_array_equal(np.concatenate(positions), changes)
+    np.testing.assert_array_equal(np.concatenate(values), expected[changes])
+    assert evaluator.summary()["amostras"] == len(idx)
+    assert evaluator.summary()["linhas"] == np.bincount(idx, minlength=4).tolist()
@@ -0,0 +1,9 @@
+from analogica.sweep import MARGEM, sweep
+
+def test_margin_steps_raise_margin_past_training_margin():
+    # Sem subida, o Hinge para perto de MARGEM; as rodadas continuam até a margem que o ponto permite
+    axes = {"L2_SAT": [7.0]}
+    flat = sweep("3N", axes, ["0001"], restarts=4, epochs=1000, workers=1, margin_steps=0)["0001"]
+    raised = sweep("3N", axes, ["0001"], restarts=4, epochs=1000, workers=1)["0001"]
+    assert 0 < flat[0] < 2 * MARGEM
+    assert raised[0] > flat[0] + 0.1
@@ -0,0 +1,52 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from analogica.model import default_constants, forward, table_targets
+from analogica.symmetry import apply_table, canonical, equivalence_classes, is_exact, transform_weights
+
+TABLES = ["".join(bits) for bits in itertools.product("01", repeat=4)]
+SWAP_ROWS = [0, 2, 1, 3]  # (0,0), (1,0), (0,1), (1,1) com x1 e x2 trocados
+
+def test_canonical_round_trip():
+    classes = equivalence_classes(TABLES)
+    assert len(classes) == 6
+    for table in TABLES:
+        rep, transform = canonical(table)
+        assert apply_table(rep, transform) == table
+        assert canonical(rep) == (rep, ())
+        assert rep <= table and (table, transform) in classes[rep]
+
+@pytest.mark.parametrize("model", ["1N", "3N"])
+def test_swap_is_exact(model):
+    const = default_constants(model)
+    w = np.random.default_rng(0).uniform(0.0, 1.0, (256, 3) if model == "1N" else (256, 3, 3))
+    res = forward(model, w, const)
+    swapped = forward(model, transform_weights(model, w, ("swap",), const), const)
+    for (v_a, v_bias, _, out), (v_a_s, v_bias_s, _, out_s) in zip(res, swapped):
+        np.testing.assert_array_equal(out_s[..., SWAP_ROWS], out)
+        np.testing.assert_allclose((v_a_s - v_bias_s)[..., SWAP_ROWS], v_a - v_bias, atol=1e-12)
+
+@pytest.mark.parametrize("model", ["1N", "3N"])
+def test_complement_flips_z_without_saturation(model):
+    # Neurônio de saída perto da referência: Va não satura e o bias espelhado fica nos limites
+    const = default_constants(model)
+    out = [0.55, 0.45, 0.5]
+    w = np.array([out]) if model == "1N" else np.array([[[0.8, 0.3, 0.4], [0.2, 0.7, 0.6], out]])
+    z = [v_a - v_bias for v_a, v_bias, _, _ in forward(model, w, const)]
+    z_c = [v_a - v_bias for v_a, v_bias, _, _ in forward(model, transform_weights(model, w, ("complement",), const), const)]
+    np.testing.assert_allclose(z_c[-1], -z[-1], atol=1e-12)
+    for hidden, hidden_c in zip(z[:-1], z_c[:-1]):
+        np.testing.assert_array_equal(hidden_c, hidden)
+
+def test_complement_not_exact_when_saturated():
+    # w1 = 1 satura Va na linha (1,0); o espelho (w1 = 0) satura em 0 e não troca o sinal de z por inteiro
+    const = default_constants("1N")
+    w = np.array([[1.0, 0.5, 0.5]])
+    v_a, v_bias, _, _ = forward("1N", w, const)[0]
+    v_a_c, v_bias_c, _, _ = forward("1N", transform_weights("1N", w, ("complement",), const), const)[0]
+    assert v_a[0, 1] == const["V_SAT"] and v_a_c[0, 1] == 0.0
+    assert not np.isclose(v_a_c[0, 1] - v_bias_c[0, 0], -(v_a[0, 1] - v_bias[0, 0]))
+    assert not is_exact(("complement",)) and is_exact(("swap",))
+    assert table_targets(apply_table("0001", ("complement",))).tolist() == [1, 1, 1, 0]
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from analogica.model import default_constants, evaluate, table_targets
+from analogica.train import init_population, train_batch
+
+@pytest.mark.parametrize("model", ["1N", "3N"])
+def test_warm_start_replaces_restart_zero(model):
+    const = default_constants(model)
+    init = np.full((3,) if model == "1N" else (3, 3), 0.25)
+    init[..., 0] = 0.75
+    w = init_population(model, const, 8, np.random.default_rng(0), init)
+    np.testing.assert_array_equal(w[0], init)
+    assert not np.array_equal(w[1], init)
+
+def test_warm_start_from_solution_keeps_it():
+    # Uma solução correta como init: o restart 0 já nasce convergido e não anda
+    targets = table_targets("0110")
+    w, _ = train_batch("3N", targets, restarts=64, epochs=20000, seed=0)
+    _, margin = evaluate("3N", w, targets)
+    solution = w[np.argmax(margin)]
+    w2, epocas = train_batch("3N", targets, restarts=4, epochs=10, seed=1, init=solution)
+    np.testing.assert_array_equal(w2[0], solution)
+    assert epocas[0] == 0